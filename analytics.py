@@ -3,27 +3,45 @@
 # ----------------------------------------
 # Install: pip install matplotlib
 
-import json
+import asyncio
 import os
+import time
 from datetime import datetime
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import config
 import llm_client
+import runtime
+from records import LogEntry, TabTable, session_to_json, iter_sessions, append_session
 
 # ── In-memory log for the current session ─────────────────────────────────────
-_session_log: list[dict] = []
-_session_start: str = ""
+_session_log: list[LogEntry] = []
+_session_tabs: TabTable = TabTable()   # distinct tab lists, referenced by LogEntry.tabs_id
+_session_start: int = 0                # epoch seconds
+
+# ── Rolling AI recap (built in the background while the session runs) ─────────
+_interval_start = 0                    # index into _session_log where the current interval begins
+_recap          = ""                   # running session recap, updated after each interval
+_recap_session  = 0                    # bumped by start_session; stale jobs are dropped
+_summary_lock   = asyncio.Lock()       # intervals are folded into the recap one at a time, in order
+_recap_until    = 0                    # _session_log[:_recap_until] is covered by _recap
+_last_summary   = None                 # Future of the latest queued interval summary
 
 
 # ── Logging ────────────────────────────────────────────────────────────────────
 
 def start_session():
     """Call this when monitoring begins to mark the session start time."""
-    global _session_start, _session_log
+    global _session_start, _session_log, _session_tabs
+    global _interval_start, _recap, _recap_until, _recap_session
     _session_log    = []
-    _session_start  = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[Analytics] Session started at {_session_start}")
+    _session_tabs   = TabTable()
+    _session_start  = int(time.time())
+    _interval_start = 0
+    _recap          = ""
+    _recap_until    = 0
+    _recap_session += 1
+    print(f"[Analytics] Session started at {datetime.fromtimestamp(_session_start):%Y-%m-%d %H:%M:%S}")
 
 
 def log_entry(score: int, reason: str, tabs: list[str]):
@@ -35,44 +53,34 @@ def log_entry(score: int, reason: str, tabs: list[str]):
         reason: Gemini's one-line explanation
         tabs:   list of open tab titles at the time
     """
-    entry = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "score": score,
-        "reason": reason,
-        "tabs": tabs,
-    }
+    entry = LogEntry(int(time.time()), int(score), reason, _session_tabs.add(tabs))
     _session_log.append(entry)
     print(f"[Analytics] Logged score {score}: {reason}")
+    _maybe_close_interval()
 
 
 def save_session():
     """
     Append this session's log to the JSON log file on disk.
-    Call this when the user ends their session.
+    Call this when the user ends their session. Also queues the last, partial
+    interval for the recap (get_ai_summary waits a little for it).
     """
     if not _session_log:
         print("[Analytics] Nothing to save.")
         return
+    _close_interval()
 
-    session = {
-        "session_start": _session_start,
-        "session_end": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "entries": _session_log,
-    }
-
-    # Load existing data or start fresh
-    all_sessions = []
-    if os.path.exists(config.LOG_FILE):
-        try:
-            with open(config.LOG_FILE, "r") as f:
-                all_sessions = json.load(f)
-        except (json.JSONDecodeError, IOError):
-            all_sessions = []
-
-    all_sessions.append(session)
+    session = session_to_json(_session_start, int(time.time()), _session_tabs, _session_log)
 
-    with open(config.LOG_FILE, "w") as f:
-        json.dump(all_sessions, f, indent=2)
+    # Append in place — the history file is never read back in full
+    try:
+        append_session(config.LOG_FILE, session)
+    except (ValueError, IOError) as e:
+        # Unreadable history: keep it aside rather than overwrite it
+        backup = f"{config.LOG_FILE}.corrupt-{int(time.time())}"
+        print(f"[Analytics] Log file unusable ({e}); moved to {backup}")
+        os.replace(config.LOG_FILE, backup)
+        append_session(config.LOG_FILE, session)
 
     print(f"[Analytics] Session saved to {config.LOG_FILE}")
 
@@ -84,7 +92,7 @@ def get_session_stats() -> dict:
     if not _session_log:
         return {"avg_score": 0, "total_checks": 0, "low_count": 0, "high_count": 0}
 
-    scores    = [e["score"] for e in _session_log]
+    scores    = [e.score for e in _session_log]
     avg       = sum(scores) / len(scores)
     low_count = sum(1 for s in scores if s < config.LOW_SCORE_THRESHOLD)
     high_count = sum(1 for s in scores if s >= 7)
@@ -98,9 +106,61 @@ def get_session_stats() -> dict:
     }
 
 
-def get_ai_summary() -> str:
-    """Ask Gemini to write a friendly session recap."""
-    return llm_client.generate_session_summary(_session_log)
+def get_history_stats() -> dict:
+    """Totals across every saved session, computed in one streaming pass."""
+    stats = {"sessions": 0, "total_checks": 0, "avg_score": 0, "low_count": 0, "focused_minutes": 0}
+    total = 0
+    for _start, entries in _history_sessions():
+        stats["sessions"] += 1
+        for e in entries:
+            total += e.score
+            stats["total_checks"] += 1
+            stats["low_count"] += e.score < config.LOW_SCORE_THRESHOLD
+            if e.score >= 7:
+                stats["focused_minutes"] += config.SCREENSHOT_INTERVAL_SECONDS / 60
+    if stats["total_checks"]:
+        stats["avg_score"] = round(total / stats["total_checks"], 1)
+    stats["focused_minutes"] = round(stats["focused_minutes"])
+    return stats
+
+
+def get_ai_summary(wait: float = None) -> str:
+    """
+    Session recap for the quit screen. Waits at most `wait` seconds (default
+    SUMMARY_FINAL_WAIT_SECONDS) for the last interval to be folded in; after
+    that it returns the recap so far plus plain stats for the checks it misses.
+    """
+    stats = get_session_stats()
+    if not stats["total_checks"]:
+        return "No check-ins this session."
+
+    pending = _last_summary
+    if pending is not None and not pending.done():
+        try:
+            pending.result(timeout=config.SUMMARY_FINAL_WAIT_SECONDS if wait is None else wait)
+        except Exception:
+            pass                          # too slow or failed: fall back to the stats below
+
+    totals = (f"Average {stats['avg_score']}/10 over {stats['total_checks']} checks "
+              f"({stats['low_count']} low).")
+    recap = _recap
+    if not recap:
+        return totals + _all_time_line()
+
+    tail = _session_log[_recap_until:]
+    if tail:
+        tail_avg = round(sum(e.score for e in tail) / len(tail), 1)
+        return f"{recap}\n{totals} Last {len(tail)} checks averaged {tail_avg}/10.{_all_time_line()}"
+    return f"{recap}\n{totals}{_all_time_line()}"
+
+
+def _all_time_line() -> str:
+    """Lifetime totals from the history log (one streaming pass), if there's more than this session."""
+    history = get_history_stats()
+    if history["sessions"] < 2:
+        return ""
+    return (f"\nAll time: {history['sessions']} sessions, average {history['avg_score']}/10, "
+            f"about {history['focused_minutes']} focused minutes.")
 
 
 # ── Graphs ─────────────────────────────────────────────────────────────────────
@@ -114,11 +174,8 @@ def show_session_graph():
         print("[Analytics] No data to graph yet.")
         return
 
-    timestamps = [e["timestamp"] for e in _session_log]
-    scores     = [e["score"]     for e in _session_log]
-
-    # Convert strings to datetime objects
-    times = [datetime.strptime(t, "%Y-%m-%d %H:%M:%S") for t in timestamps]
+    times  = [datetime.fromtimestamp(e.ts) for e in _session_log]
+    scores = [e.score for e in _session_log]
 
     fig, ax = plt.subplots(figsize=(10, 5))
     fig.patch.set_facecolor("#1a1a2e")
@@ -164,21 +221,12 @@ def show_history_graph():
         print("[Analytics] No history file found.")
         return
 
-    with open(config.LOG_FILE, "r") as f:
-        all_sessions = json.load(f)
-
     dates  = []
     avgs   = []
 
-    for session in all_sessions:
-        entries = session.get("entries", [])
-        if not entries:
-            continue
-        scores = [e["score"] for e in entries]
-        avg    = sum(scores) / len(scores)
-        date   = datetime.strptime(session["session_start"], "%Y-%m-%d %H:%M:%S")
-        dates.append(date)
-        avgs.append(round(avg, 1))
+    for start, avg in _session_averages(_history_sessions()):
+        dates.append(datetime.fromtimestamp(start))
+        avgs.append(avg)
 
     if not dates:
         print("[Analytics] No session data in history.")
@@ -204,3 +252,68 @@ def show_history_graph():
     fig.autofmt_xdate()
     plt.tight_layout()
     plt.show()
+
+
+# ── Rolling recap ─────────────────────────────────────────────────────────────
+
+def _maybe_close_interval():
+    """Once the open interval spans SUMMARY_INTERVAL_MINUTES, queue it for summarizing."""
+    interval = _session_log[_interval_start:]
+    if interval and interval[-1].ts - interval[0].ts >= config.SUMMARY_INTERVAL_MINUTES * 60:
+        _close_interval()
+
+
+def _close_interval():
+    """Queue the open interval (however short) for summarizing."""
+    global _interval_start, _last_summary
+    interval = _session_log[_interval_start:]
+    if not interval:
+        return
+    checkins = [_checkin_line(e) for e in interval]
+    end = len(_session_log)
+    _interval_start = end
+    stats = {k: v for k, v in get_session_stats().items() if k != "scores"}
+    _last_summary = runtime.submit(_summarize(_recap_session, checkins, stats, end))
+
+
+def _checkin_line(e: LogEntry) -> str:
+    windows = ", ".join(t[:50] for t in _session_tabs.get(e.tabs_id)[:3])
+    return f"{datetime.fromtimestamp(e.ts):%H:%M} | {e.score} | {e.reason} | {windows}"
+
+
+async def _summarize(session: int, checkins: list[str], stats: dict, end: int):
+    """Fold one interval (the log up to index `end`) into the recap, on the runtime loop."""
+    global _recap, _recap_until
+    async with _summary_lock:            # asyncio.Lock is FIFO, so intervals land in order
+        if session != _recap_session:
+            return
+        try:
+            interval = await runtime.run_blocking(llm_client.summarize_interval, checkins,
+                                                  limit="llm")
+            recap = await runtime.run_blocking(llm_client.generate_session_summary,
+                                               interval, _recap, stats, limit="llm")
+        except Exception as e:
+            print(f"[Analytics] Summary error: {e}")
+            return
+        if session == _recap_session:
+            _recap, _recap_until = recap, end
+
+
+# ── History pipeline ──────────────────────────────────────────────────────────
+# Generators over the log file, one session in memory at a time.
+
+def _history_sessions():
+    """(start, entries) for each saved session with at least one check."""
+    if not os.path.exists(config.LOG_FILE):
+        return
+    try:
+        for start, _end, _tabs, entries in iter_sessions(config.LOG_FILE):
+            if entries:
+                yield start, entries
+    except (ValueError, IOError) as e:
+        print(f"[Analytics] Stopped reading history: {e}")
+
+
+def _session_averages(sessions):
+    for start, entries in sessions:
+        yield start, round(sum(e.score for e in entries) / len(entries), 1)
@@ -2,190 +2,408 @@
 # Task input, Pomodoro timer, and break scheduling
 # ----------------------------------------
 # This module manages the user's assignments and runs the Pomodoro timer.
-# It is beginner-friendly — mostly data management + a timer thread.
+# It is beginner-friendly — mostly data management + timer callbacks.
 
+import functools
+import heapq
+import itertools
+import sqlite3
 import threading
 import time
 from datetime import datetime
-from plyer import notification
 import config
+import notifier
+import push_client
+import state
+import store
+import timers
+from records import Assignment
 
 # ── Data Storage ───────────────────────────────────────────────────────────────
-# List of assignment dicts:
-# { "name": str, "estimated_minutes": int, "due_date": str, "completed": bool, "created_at": str }
-assignments: list[dict] = []
+# Indexed task store:
+#   _tasks — normalized name -> Assignment (see records.py), O(1) lookups
+#   _queue — heap of (due, priority, intervals, seq, key) for picking the next task
+# Heap entries are never removed in place: completing, removing or replacing a
+# task just makes its entry stale, and stale entries are skipped when popped.
+#
+# Everything is written through to store.py (SQLite), so tasks survive restarts
+# and are shared with the extension via server.py. sync() pulls in changes
+# made elsewhere since the last version we saw. Saved tasks are loaded on the
+# first call into the module, not at import, so importing it never touches DB_FILE.
+#
+# The Tk thread, runtime workers (timers.py) and the push listener all call in here, so
+# every public function that touches the index holds _lock (@_locked).
+_lock = threading.RLock()
+_tasks: dict[str, Assignment] = {}
+_queue: list[tuple] = []
+_queue_seq: dict[str, int] = {}        # key -> seq of its live heap entry
+_seq = itertools.count()
+_synced_version = 0                    # last store version applied locally
+_loaded = False                        # saved tasks pulled in (first public call)
+
+PRIORITIES = {"high": 0, "medium": 1, "low": 2}
+_NO_DUE_DATE = float("inf")
 
 # ── Pomodoro State ─────────────────────────────────────────────────────────────
-_pomodoro_thread   = None
-_pomodoro_running  = False
-_current_interval  = 0          # which interval we're on (0-indexed)
+# pomodoro_running / pomodoro_interval live in state.py
+_phase_timer       = None       # timers.Timer for the end of the current work/break phase
 _on_break_callback = None       # called when a break starts
 _on_work_callback  = None       # called when work resumes
 
 
+def _locked(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with _lock:
+            _load_once()
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def _load_once():
+    """Caller holds _lock. Load saved assignments on first use."""
+    global _loaded
+    if not _loaded:
+        _loaded = True
+        sync()
+
+
 # ── Assignment CRUD ────────────────────────────────────────────────────────────
 
-def add_assignment(name: str, estimated_minutes: int, due_date: str = "") -> dict:
+@_locked
+def add_assignment(name: str, estimated_minutes: int, due_date: str = "",
+                   priority: str = "medium") -> Assignment:
     """
-    Add a new assignment.
+    Add a new assignment (replaces an existing one with the same name).
 
     Args:
         name: assignment title e.g. "Write essay intro"
         estimated_minutes: how long the user thinks it'll take
         due_date: optional string like "2025-03-15"
+        priority: "high", "medium" or "low"
 
     Returns:
-        the new assignment dict
+        the new Assignment
     """
-    assignment = {
-        "name": name,
-        "estimated_minutes": estimated_minutes,
-        "due_date": due_date,
-        "completed": False,
-        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
-    }
-    assignments.append(assignment)
-    print(f"[Assignments] Added: '{name}' ({estimated_minutes} min)")
+    priority = (priority or "medium").lower()
+    if priority not in PRIORITIES:
+        priority = "medium"
+
+    assignment = Assignment(name, estimated_minutes, due_date, priority=priority,
+                            created_at=int(time.time()))
+    _put(assignment)
+    _persist(store.save_assignment, assignment)
+    print(f"[Assignments] Added: '{name}' ({estimated_minutes} min, {priority})")
     return assignment
 
 
+@_locked
 def complete_assignment(name: str):
     """Mark an assignment as completed by name."""
-    for a in assignments:
-        if a["name"].lower() == name.lower():
-            a["completed"] = True
-            print(f"[Assignments] Completed: '{name}'")
-            return
-    print(f"[Assignments] Not found: '{name}'")
+    a = _tasks.get(_key(name))
+    if a is None:
+        print(f"[Assignments] Not found: '{name}'")
+        return
+    a.completed = True
+    _queue_seq.pop(_key(name), None)   # its heap entry is now stale
+    _persist(store.complete_assignment, name)
+    print(f"[Assignments] Completed: '{name}'")
+
+
+@_locked
+def get_assignment(name: str) -> Assignment | None:
+    return _tasks.get(_key(name))
 
 
-def get_active_assignments() -> list[dict]:
+@_locked
+def get_all_assignments() -> list[Assignment]:
+    """Every assignment, in the order they were added."""
+    return list(_tasks.values())
+
+
+@_locked
+def get_active_assignments() -> list[Assignment]:
     """Return all assignments that are not yet completed."""
-    return [a for a in assignments if not a["completed"]]
+    return [a for a in _tasks.values() if not a.completed]
+
+
+@_locked
+def get_next_assignment() -> Assignment | None:
+    """
+    The task to work on now: earliest due date, then highest priority, then
+    fewest Pomodoro intervals. O(log n) amortized (stale entries are popped here).
+    """
+    while _queue:
+        *_, seq, key = _queue[0]
+        if _queue_seq.get(key) == seq:
+            return _tasks[key]
+        heapq.heappop(_queue)
+    return None
 
 
 def get_current_assignment_name() -> str:
-    """Return the name of the first active assignment, or a default."""
-    active = get_active_assignments()
-    return active[0]["name"] if active else "General work"
+    """Return the name of the next assignment to work on, or a default."""
+    nxt = get_next_assignment()
+    return nxt.name if nxt else "General work"
 
 
+@_locked
 def remove_assignment(name: str):
-    """Remove an assignment from the list entirely."""
-    assignments[:] = [a for a in assignments if a["name"].lower() != name.lower()]
+    """Remove an assignment from the store entirely."""
+    key = _key(name)
+    _tasks.pop(key, None)
+    _queue_seq.pop(key, None)
+    _persist(store.delete_assignment, name)
+
+
+@_locked
+def sync() -> bool:
+    """
+    Apply changes other processes (server.py / the extension) made to the store.
+    Cheap when nothing changed: one indexed query. Returns True if anything changed.
+    """
+    global _synced_version
+    try:
+        version, rows = store.changes_since(_synced_version)
+    except sqlite3.Error as e:
+        print(f"[Assignments] Sync error: {e}")
+        return False
+
+    for row in rows:
+        if row["deleted"]:
+            _tasks.pop(row["key"], None)
+            _queue_seq.pop(row["key"], None)
+        else:
+            _put(store.row_to_assignment(row))
+    _synced_version = version
+    return bool(rows)
+
+
+@_locked
+def plan_schedule(num_intervals: int = 0) -> list[dict]:
+    """
+    Fit active tasks, in queue order, into the upcoming Pomodoro intervals.
+
+    Args:
+        num_intervals: how many intervals to plan (default: one full Pomodoro cycle)
+
+    Returns:
+        [{"interval": 1, "start": epoch, "name": str, "part": 1, "parts": 2}, ...]
+    """
+    num_intervals = num_intervals or config.POMODORO_INTERVALS
+    live = [e for e in _queue if _queue_seq.get(e[-1]) == e[-2]]
+    ordered = [_tasks[e[-1]] for e in heapq.nsmallest(num_intervals, live)]
+
+    plan = []
+    start = time.time()
+    snap = state.get()
+    interval = snap.pomodoro_interval if snap.pomodoro_running else 0
+    for task in ordered:
+        parts = estimate_pomodoro_intervals(task)
+        for part in range(1, parts + 1):
+            if len(plan) >= num_intervals:
+                return plan
+            interval += 1
+            plan.append({"interval": interval, "start": int(start),
+                         "name": task.name, "part": part, "parts": parts})
+            start += _interval_seconds(interval)
+    return plan
+
+
+def _key(name: str) -> str:
+    return store.task_key(name)
+
+
+def _put(a: Assignment):
+    """Insert/replace locally and (re)queue it if it's still active."""
+    key = _key(a.name)
+    _tasks[key] = a
+    if a.completed:
+        _queue_seq.pop(key, None)
+    else:
+        _enqueue(key, a)
+
+
+def _persist(write, arg):
+    """Write through to the store. Our own writes are already applied, so skip them in sync()."""
+    global _synced_version
+    try:
+        version = write(arg)
+    except sqlite3.Error as e:
+        print(f"[Assignments] Store error: {e}")
+        return
+    if version is None:
+        return
+    if version == _synced_version + 1:
+        _synced_version = version
+    push_client.publish("tasks", version=version)   # tell the extension to sync now
+
+
+def _enqueue(key: str, a: Assignment):
+    seq = next(_seq)
+    _queue_seq[key] = seq
+    heapq.heappush(_queue, (_due_epoch(a.due_date), PRIORITIES.get(a.priority, 1),
+                            estimate_pomodoro_intervals(a), seq, key))
+
+
+def _due_epoch(due_date: str) -> float:
+    try:
+        return datetime.strptime(due_date, "%Y-%m-%d").timestamp()
+    except (TypeError, ValueError):
+        return _NO_DUE_DATE
+
+
+def _interval_seconds(interval: int) -> int:
+    """Length of one work interval plus the break that follows it."""
+    is_long = interval % config.POMODORO_INTERVALS == 0
+    brk = config.POMODORO_LONG_BREAK if is_long else config.POMODORO_SHORT_BREAK
+    return (config.POMODORO_WORK_MINUTES + brk) * 60
+
 
 # ── Pomodoro Timer ─────────────────────────────────────────────────────────────
+# Each phase is one deadline on the shared timer service (timers.py). The next
+# phase is scheduled from the previous phase's *deadline*, so 25-minute
+# intervals stay exact no matter how long notifications or callbacks take.
 
 def start_pomodoro(on_break=None, on_work=None):
     """
-    Start the Pomodoro timer loop in a background thread.
+    Start the Pomodoro timer.
 
     Args:
         on_break: callback(break_minutes: int, is_long: bool) — called when break starts
         on_work:  callback(interval: int) — called when work resumes
     """
-    global _pomodoro_running, _pomodoro_thread, _on_break_callback, _on_work_callback
-    global _current_interval
+    global _on_break_callback, _on_work_callback, _phase_timer
 
-    # Prevent starting twice (minor fix)
-    if _pomodoro_thread and _pomodoro_thread.is_alive() and _pomodoro_running:
+    # Only one caller can flip running False -> True, so there's never a second cycle
+    if not state.compare_and_set("pomodoro_running", False, True):
         print("[Pomodoro] Already running.")
         return
 
     _on_break_callback = on_break
     _on_work_callback  = on_work
-    _current_interval  = 0
-    _pomodoro_running  = True
+    _phase_timer       = None
+    state.update(pomodoro_interval=0)
 
-    _pomodoro_thread = threading.Thread(target=_pomodoro_loop, daemon=True)
-    _pomodoro_thread.start()
     print(f"[Pomodoro] Started — {config.POMODORO_WORK_MINUTES}min work / "
           f"{config.POMODORO_SHORT_BREAK}min break / "
           f"{config.POMODORO_LONG_BREAK}min long break every {config.POMODORO_INTERVALS} intervals")
+    _phase_timer_start(0, _begin_work)
 
 
 def stop_pomodoro():
-    """Stop the Pomodoro timer."""
-    global _pomodoro_running
-    _pomodoro_running = False
+    """Stop the Pomodoro timer. Safe to call when already stopped."""
+    if not state.compare_and_set("pomodoro_running", True, False):
+        return
+    if _phase_timer:
+        _phase_timer.cancel()
     print("[Pomodoro] Stopped.")
 
 
-def _pomodoro_loop():
-    global _current_interval
+def pause_pomodoro():
+    """Freeze the current work/break countdown."""
+    if state.get().pomodoro_running and _phase_timer:
+        _phase_timer.pause()
+        print(f"[Pomodoro] Paused — {int(_phase_timer.remaining())}s left in this phase")
+
 
-    while _pomodoro_running:
-        _current_interval += 1
-        print(f"[Pomodoro] Work interval {_current_interval} started")
+def resume_pomodoro():
+    """Continue a paused countdown from where it stopped."""
+    if state.get().pomodoro_running and _phase_timer and _phase_timer.paused:
+        _phase_timer.resume()
+        print("[Pomodoro] Resumed.")
 
-        if _on_work_callback:
-            _on_work_callback(_current_interval)
 
-        # ── Work Period ────────────────────────────────────────────────────────
-        _notify("FocusOrb ⏱️ — Work time!", f"Interval {_current_interval} started. Stay focused!")
-        _sleep_interruptible(config.POMODORO_WORK_MINUTES * 60)
+def is_pomodoro_paused() -> bool:
+    return bool(state.get().pomodoro_running and _phase_timer and _phase_timer.paused)
 
-        if not _pomodoro_running:
-            break
 
-        # ── Break Period ───────────────────────────────────────────────────────
-        is_long = (_current_interval % config.POMODORO_INTERVALS == 0)
-        break_mins = config.POMODORO_LONG_BREAK if is_long else config.POMODORO_SHORT_BREAK
-        break_label = "Long break" if is_long else "Short break"
+def get_time_left() -> int:
+    """Seconds left in the current work/break phase (0 if not running)."""
+    if not state.get().pomodoro_running or not _phase_timer:
+        return 0
+    return int(_phase_timer.remaining())
 
-        print(f"[Pomodoro] {break_label}: {break_mins} minutes")
-        _notify(
-            f"FocusOrb 🟢 — {break_label}!",
-            f"Great work! Take {break_mins} minutes. You earned it."
-        )
 
-        if _on_break_callback:
-            _on_break_callback(break_mins, is_long)
+def _phase_timer_start(seconds: float, callback):
+    """Schedule the next phase `seconds` after the previous phase's deadline."""
+    global _phase_timer
+    if _phase_timer is None or seconds == 0:
+        _phase_timer = timers.call_later(seconds, callback)
+    else:
+        _phase_timer = timers.call_at(_phase_timer.deadline + seconds, callback)
 
-        _sleep_interruptible(break_mins * 60)
 
-        if not _pomodoro_running:
-            break
+def _begin_work(after_break: bool = False):
+    if not state.get().pomodoro_running:
+        return
+
+    _, snap = state.mutate(lambda s: {"pomodoro_interval": s.pomodoro_interval + 1})
+    interval = snap.pomodoro_interval
+    print(f"[Pomodoro] Work interval {interval} started")
+
+    if _on_work_callback:
+        _on_work_callback(interval)
+
+    # One notice per phase change: "Break over" and "Work time" would replace each other
+    if after_break:
+        _notify("FocusOrb ⏱️ — Break over!", f"Time to get back to work! Interval {interval} started.")
+    else:
+        _notify("FocusOrb ⏱️ — Work time!", f"Interval {interval} started. Stay focused!")
+    _phase_timer_start(config.POMODORO_WORK_MINUTES * 60, _begin_break)
+
+
+def _begin_break():
+    snap = state.get()
+    if not snap.pomodoro_running:
+        return
+
+    is_long = (snap.pomodoro_interval % config.POMODORO_INTERVALS == 0)
+    break_mins = config.POMODORO_LONG_BREAK if is_long else config.POMODORO_SHORT_BREAK
+    break_label = "Long break" if is_long else "Short break"
+
+    print(f"[Pomodoro] {break_label}: {break_mins} minutes")
+    _notify(
+        f"FocusOrb 🟢 — {break_label}!",
+        f"Great work! Take {break_mins} minutes. You earned it."
+    )
 
-        _notify("FocusOrb ⏱️ — Break over!", "Time to get back to work!")
+    if _on_break_callback:
+        _on_break_callback(break_mins, is_long)
 
-    print("[Pomodoro] Loop ended.")
+    _phase_timer_start(break_mins * 60, _end_break)
 
 
-def _sleep_interruptible(seconds: int):
-    """Sleep in small chunks so we can stop the timer quickly."""
-    seconds = int(seconds)
-    for _ in range(seconds):
-        if not _pomodoro_running:
-            break
-        time.sleep(1)
+def _end_break():
+    if not state.get().pomodoro_running:
+        return
+    _begin_work(after_break=True)
 
 
 def _notify(title: str, message: str):
-    """Send a desktop notification."""
-    try:
-        notification.notify(title=title, message=message, timeout=6)
-    except Exception as e:
-        print(f"[Pomodoro] Notification error: {e}")
+    """Queue a desktop notification (all Pomodoro phases share one key, newest wins)."""
+    notifier.notify(title, message, key="pomodoro", min_gap=0)
 
 
 # ── Utilities ──────────────────────────────────────────────────────────────────
 
-def estimate_pomodoro_intervals(assignment: dict) -> int:
+def estimate_pomodoro_intervals(assignment: Assignment) -> int:
     """
     Given an assignment, estimate how many Pomodoro intervals it'll take.
     """
-    mins = assignment.get("estimated_minutes", 25)
+    mins = assignment.estimated_minutes or 25
     intervals = max(1, round(mins / config.POMODORO_WORK_MINUTES))
     return intervals
 
 
+@_locked
 def get_summary() -> str:
     """Return a quick text summary of all assignments."""
-    if not assignments:
+    if not _tasks:
         return "No assignments added yet."
     lines = []
-    for a in assignments:
-        status = "✅" if a["completed"] else "🔲"
-        lines.append(f"{status} {a['name']} ({a['estimated_minutes']} min) — due: {a['due_date'] or 'N/A'}")
-    return "\n".join(lines)
\ No newline at end of file
+    for a in _tasks.values():
+        status = "✅" if a.completed else "🔲"
+        lines.append(f"{status} {a.name} ({a.estimated_minutes} min, {a.priority}) — due: {a.due_date or 'N/A'}")
+    return "\n".join(lines)
+
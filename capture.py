@@ -0,0 +1,182 @@
+# capture.py
+# Region-of-interest capture — active window crop + changed-tile diffing
+# ----------------------------------------
+# Install: pip install Pillow pyautogui
+# Optional: pygetwindow (Windows/Mac) or xdotool (Linux) for active window bounds
+#
+# Instead of sending the whole screen to the vision model, we send either:
+#   • the focused window only, or
+#   • just the tiles that changed since the last check, stitched together.
+# Smaller images = fewer image tokens, and small text survives the thumbnail.
+
+import subprocess
+import sys
+from PIL import Image, ImageChops
+import config
+
+# ── State ─────────────────────────────────────────────────────────────────────
+_prev_frame = None     # grayscale, downscaled copy of the last capture (for diffing)
+_prev_size  = None     # full-resolution size of the last capture
+
+_DIFF_SCALE = 4        # diff on a 1/4 size grayscale copy — plenty for tile detection
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def capture_region(screenshot: Image.Image) -> tuple[Image.Image, str]:
+    """
+    Pick the part of the screenshot worth sending to the model.
+
+    Returns:
+        (image, region) where region is "full", "window" or "changes"
+    """
+    mode = config.CAPTURE_MODE
+    changed = _update_frame(screenshot)
+
+    if mode == "full":
+        return screenshot, "full"
+
+    if mode in ("diff", "auto") and changed:
+        tile = config.CAPTURE_TILE_SIZE
+        cols = -(-screenshot.width // tile)
+        rows = -(-screenshot.height // tile)
+        if len(changed) <= config.CAPTURE_MAX_DIFF_AREA * cols * rows:
+            return stitch_tiles(screenshot, changed), "changes"
+
+    crop = crop_active_window(screenshot)
+    if crop is not None:
+        return crop, "window"
+
+    return screenshot, "full"
+
+
+def crop_active_window(screenshot: Image.Image) -> Image.Image | None:
+    """Return the focused window cut out of the screenshot, or None if unknown."""
+    bounds = get_active_window_bounds()
+    if not bounds:
+        return None
+    left, top, right, bottom = _clamp(bounds, screenshot.size)
+    if right <= left or bottom <= top:
+        return None                     # window is off-screen / on another monitor
+    return screenshot.crop((left, top, right, bottom))
+
+
+def reset():
+    """Forget the previous frame (next capture won't diff)."""
+    global _prev_frame, _prev_size
+    _prev_frame = None
+    _prev_size  = None
+
+
+def get_active_window_bounds() -> tuple[int, int, int, int] | None:
+    """
+    Return (left, top, right, bottom) of the focused window in screen pixels,
+    or None if it can't be detected on this platform.
+    """
+    try:
+        import pygetwindow as gw
+        win = gw.getActiveWindow()
+        if win and win.width > 0 and win.height > 0:
+            return (win.left, win.top, win.left + win.width, win.top + win.height)
+    except Exception:
+        pass
+
+    if sys.platform.startswith("linux"):
+        try:
+            out = subprocess.check_output(
+                ["xdotool", "getactivewindow", "getwindowgeometry", "--shell"],
+                text=True, timeout=2,
+            )
+            geo = dict(l.split("=", 1) for l in out.splitlines() if "=" in l)
+            x, y = int(geo["X"]), int(geo["Y"])
+            return (x, y, x + int(geo["WIDTH"]), y + int(geo["HEIGHT"]))
+        except Exception:
+            pass
+
+    return None
+
+
+def changed_tiles(prev: Image.Image, cur: Image.Image, tile: int) -> list[tuple[int, int]]:
+    """
+    Compare two same-size grayscale frames and return the (col, row) of every
+    tile whose share of changed pixels is above CAPTURE_MIN_TILE_CHANGE.
+    Tile size is given in the frames' own pixel units.
+    """
+    diff = ImageChops.difference(prev, cur)
+    mask = diff.point(lambda p: 255 if p > config.CAPTURE_PIXEL_THRESHOLD else 0)
+
+    cols = -(-mask.width // tile)
+    rows = -(-mask.height // tile)
+    # Box-resampling a 0/255 mask to one pixel per tile = fraction of changed pixels
+    grid = mask.resize((cols, rows), Image.BOX)
+    cutoff = 255 * config.CAPTURE_MIN_TILE_CHANGE
+
+    changed = []
+    for i, value in enumerate(grid.getdata()):
+        if value > cutoff:
+            changed.append((i % cols, i // cols))
+    return changed
+
+
+def stitch_tiles(screenshot: Image.Image, tiles: list[tuple[int, int]]) -> Image.Image:
+    """
+    Cut the changed tiles out of the full-resolution screenshot and pack them
+    into one compact image. Neighbouring tiles in a row stay joined so text
+    that spans several tiles remains readable.
+    """
+    tile = config.CAPTURE_TILE_SIZE
+
+    # Merge horizontally adjacent tiles into runs: (row, first_col, last_col)
+    runs = []
+    for col, row in sorted(tiles, key=lambda t: (t[1], t[0])):
+        if runs and runs[-1][0] == row and runs[-1][2] == col - 1:
+            runs[-1][2] = col
+        else:
+            runs.append([row, col, col])
+
+    crops = []
+    for row, first, last in runs:
+        box = _clamp((first * tile, row * tile, (last + 1) * tile, (row + 1) * tile),
+                     screenshot.size)
+        crops.append(screenshot.crop(box))
+
+    # Simple shelf packing: every run is one tile tall, fill shelves left to right
+    width = max(c.width for c in crops)
+    shelves = [[]]
+    used = 0
+    for c in crops:
+        if used + c.width > width:
+            shelves.append([])
+            used = 0
+        shelves[-1].append(c)
+        used += c.width
+
+    canvas = Image.new("RGB", (width, tile * len(shelves)), "black")
+    for y, shelf in enumerate(shelves):
+        x = 0
+        for c in shelf:
+            canvas.paste(c, (x, y * tile))
+            x += c.width
+    return canvas
+
+
+# ── Internal ───────────────────────────────────────────────────────────────────
+
+def _update_frame(screenshot: Image.Image) -> list[tuple[int, int]]:
+    """Store this frame for next time and return tiles changed since the last one."""
+    global _prev_frame, _prev_size
+
+    small = screenshot.convert("L").reduce(_DIFF_SCALE)
+    changed = []
+    if _prev_frame is not None and _prev_size == screenshot.size:
+        changed = changed_tiles(_prev_frame, small, config.CAPTURE_TILE_SIZE // _DIFF_SCALE)
+
+    _prev_frame = small
+    _prev_size  = screenshot.size
+    return changed
+
+
+def _clamp(box: tuple[int, int, int, int], size: tuple[int, int]) -> tuple[int, int, int, int]:
+    left, top, right, bottom = box
+    w, h = size
+    return (max(0, left), max(0, top), min(w, right), min(h, bottom))
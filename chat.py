@@ -6,15 +6,19 @@
 
 import tkinter as tk
 from tkinter import scrolledtext, font as tkfont
-import threading
 import config
+import focus_profile
 import llm_client
+import local_scorer
+import runtime
+import state
+import timers
+from transcript import Transcript
 import assignments as assign_manager
 
 # ── State ──────────────────────────────────────────────────────────────────────
-_conversation_history: list[dict] = []   # tracks full chat for context
-_flagged_tabs:         list[str]  = []   # tabs that triggered the alert
-_excuse_mode:          bool       = False  # True if user was flagged and must explain
+# excuse_mode / flagged_tabs / conversation live in state.py (shared with the
+# AI calls on the runtime loop and with the break timer)
 
 
 class ChatWindow:
@@ -29,21 +33,26 @@ class ChatWindow:
             parent:       the orb Tkinter root (or None to create standalone)
             flagged_tabs: if provided, opens in excuse mode
         """
-        global _flagged_tabs, _excuse_mode
-        _flagged_tabs = flagged_tabs or []
-        _excuse_mode  = bool(_flagged_tabs)
+        flagged = tuple(flagged_tabs or ())
+        state.update(flagged_tabs=flagged, excuse_mode=bool(flagged))
 
         # Create a Toplevel if we have a parent, otherwise a new root
         if parent:
             self.root = tk.Toplevel(parent)
         else:
             self.root = tk.Tk()
+            runtime.attach_tk(self.root)
+
+        # AI calls for this window: one at a time, replies in order, cancelled on close
+        self._requests = runtime.RequestQueue(limit=config.CHAT_MAX_IN_FLIGHT,
+                                              max_waiting=config.CHAT_MAX_WAITING)
+        self.root.bind("<Destroy>", self._on_destroy)
 
         self._build_ui()
 
         # If in excuse mode, show a warning message first
-        if _excuse_mode:
-            tabs_str = ", ".join(_flagged_tabs[:3])
+        if flagged:
+            tabs_str = ", ".join(flagged[:3])
             self._add_message(
                 "FocusOrb",
                 f"⚠️ Hey! I noticed you had some distracting tabs open: {tabs_str}.\n"
@@ -102,6 +111,7 @@ class ChatWindow:
             height=20
         )
         self.chat_display.pack(fill="both", expand=True, padx=10, pady=(5, 0))
+        self.transcript = Transcript(self.chat_display)
 
         # Color tags for messages
         self.chat_display.tag_config("bot",  foreground="#4A90D9", font=("Arial", 11, "bold"))
@@ -146,13 +156,8 @@ class ChatWindow:
     # ── Messaging ──────────────────────────────────────────────────────────────
 
     def _add_message(self, sender: str, message: str, is_bot: bool):
-        """Append a message to the chat display."""
-        self.chat_display.config(state="normal")
-        tag = "bot" if is_bot else "user"
-        self.chat_display.insert("end", f"\n{sender}\n", tag)
-        self.chat_display.insert("end", f"{message}\n", "body")
-        self.chat_display.config(state="disabled")
-        self.chat_display.see("end")
+        """Append a message to the chat display (drawn with the next frame)."""
+        self.transcript.add(sender, message, is_bot)
 
     def _send(self):
         """Handle user sending a message."""
@@ -162,43 +167,69 @@ class ChatWindow:
         self.input_field.delete(0, "end")
         self._add_message("You", text, is_bot=False)
 
-        # Run Gemini call in background thread (keeps UI responsive)
-        threading.Thread(target=self._get_response, args=(text,), daemon=True).start()
+        # Run the AI call on the runtime loop (keeps UI responsive)
+        # The reply streams into this message as it's generated
+        reply = self.transcript.new_message("FocusOrb")
+        self._requests.submit(self._get_response, text, reply,
+                              on_result=lambda full: self.transcript.finish(reply, full),
+                              on_skip=self._skipped)
+
+    def _reply(self, message: str):
+        self._add_message("FocusOrb", message, True)
+
+    def _skipped(self):
+        self._add_message("FocusOrb", "(Skipped that one — you sent newer messages while I was thinking.)", True)
 
-    def _get_response(self, user_text: str):
-        """Call Gemini in a background thread, then update the UI."""
-        global _excuse_mode, _conversation_history, _flagged_tabs
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self._requests.close()
+            self.transcript.close()
 
+    async def _get_response(self, user_text: str, stream) -> str:
+        """Ask the AI on the runtime loop, streaming into `stream`; returns the full reply."""
         assignment = assign_manager.get_current_assignment_name()
+        snap = state.get()
+        flagged = list(snap.flagged_tabs)
 
         try:
-            if _excuse_mode:
+            if snap.excuse_mode:
                 # Excuse evaluation mode
-                result = llm_client.evaluate_excuse(user_text, assignment, _flagged_tabs)
+                result = await runtime.run_blocking(llm_client.evaluate_excuse, user_text, assignment,
+                                                    flagged, limit="llm")
                 reply  = result.get("response", "Let's get back on track!")
                 accepted = result.get("accepted", False)
                 close_tab = result.get("close_tab", False)
+                # Teach the focus profile which flagged sites this excuse was about. The
+                # topic is the monitor's (the extension's focus topic when one is set),
+                # the same key /evaluate uses
+                try:
+                    for host in local_scorer.blocked_sites(flagged):
+                        await runtime.run_blocking(focus_profile.record_excuse, host, snap.assignment, accepted)
+                except Exception as e:
+                    print(f"[Chat] Focus profile update failed: {e}")
 
                 if accepted:
-                    _excuse_mode = False
+                    state.update(excuse_mode=False)
                     reply += "\n✅ Enjoy your 5-minute break!! I'll close this this tab for you once time's up."
-                    threading.Thread(target=self._start_break_timer, args=(5,), daemon=True).start()
+                    self._start_break_timer(5)
                 else:
                     reply += "\n❌ Closing that tab for you."
                     if close_tab:
-                        self._close_flagged_tabs()
+                        await runtime.run_blocking(self._close_flagged_tabs)
 
             else:
                 # Normal chat
-                _conversation_history.append({"role": "user", "content": user_text})
-                reply = llm_client.chat_response(user_text, assignment, _conversation_history, _flagged_tabs)
-                _conversation_history.append({"role": "assistant", "content": reply})
+                history = [{"role": r, "content": c} for r, c in snap.conversation]
+                history.append({"role": "user", "content": user_text})
+                on_delta = lambda d: runtime.call_in_ui(self.transcript.append, stream, d)
+                reply = await runtime.run_blocking(llm_client.chat_response, user_text, assignment,
+                                                   history, flagged, on_delta=on_delta, limit="llm")
+                state.mutate(lambda s: {"conversation": (s.conversation + (("user", user_text), ("assistant", reply)))[-40:]})
 
         except Exception as e:
             reply = f"(Connection error: {e})"
 
-        # Update UI on main thread
-        self.root.after(0, self._add_message, "FocusOrb", reply, True)
+        return reply
 
     def _prompt_url(self):
         """Open a small dialog for the user to paste a URL."""
@@ -221,20 +252,32 @@ class ChatWindow:
             dialog.destroy()
             if url:
                 self._add_message("You", f"[Checking URL: {url}]", is_bot=False)
-                threading.Thread(target=self._check_url, args=(url,), daemon=True).start()
+                self._requests.submit(self._check_url, url, on_result=self._reply)
 
         tk.Button(dialog, text="Check", bg="#4A90D9", fg="white",
                   font=("Arial", 10), relief="flat", command=check).pack(pady=8)
         url_entry.bind("<Return>", lambda e: check())
 
-    def _check_url(self, url: str):
-        """Fetch and analyze a URL in a background thread."""
+    async def _check_url(self, url: str) -> str:
+        """Fetch and analyze a URL on the runtime loop; returns the reply."""
         assignment = assign_manager.get_current_assignment_name()
         try:
-            result = llm_client.read_url_and_summarize(url, assignment)
+            result = await runtime.run_blocking(llm_client.read_url_and_summarize, url, assignment,
+                                                limit="llm")
         except Exception as e:
             result = f"Error reading URL: {e}"
-        self.root.after(0, self._add_message, "FocusOrb", result, True)
+        return result
+
+    def _start_break_timer(self, minutes: int):
+        """Schedule the end of an accepted break on the shared timer service."""
+        self._break_timer = timers.call_later(minutes * 60, self._end_break)
+
+    def _end_break(self):
+        """Break's over: close the tabs that got the user flagged and say so."""
+        self._close_flagged_tabs()
+        state.update(excuse_mode=bool(state.get().flagged_tabs))
+        runtime.call_in_ui(self._add_message, "FocusOrb",
+                           "⏰ Break's over — closed those tabs. Back to work!", True)
 
     def _close_flagged_tabs(self):
         """
@@ -246,7 +289,7 @@ class ChatWindow:
             # Bring browser to front (Windows)
             import pygetwindow as gw
             browsers = ["chrome", "firefox", "edge"]
-            for title in _flagged_tabs:
+            for title in state.get().flagged_tabs:
                 for b in browsers:
                     if b in title.lower():
                         wins = gw.getWindowsWithTitle(title)
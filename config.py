@@ -6,6 +6,51 @@ SCREENSHOT_INTERVAL_SECONDS = 45    # how often to take a screenshot
 LOW_SCORE_THRESHOLD         = 4     # score below this is "unproductive" (1-10)
 CONSECUTIVE_LOW_BEFORE_ALERT = 3    # how many low scores in a row before notification
 
+# ── Window Watcher ────────────────────────────────────────────────────────────
+WINDOW_WATCHER_ENABLED        = True   # react to focus changes instead of only polling
+WINDOW_POLL_SECONDS           = 5      # fallback poll rate without X11 events (pygetwindow only;
+                                       # osascript / PowerShell listers poll every check instead)
+WINDOW_CHANGE_MIN_GAP_SECONDS = 10     # don't re-check more often than this on window changes
+WINDOW_CHANGE_SETTLE_SECONDS  = 1.5    # wait for the new window to render before the screenshot
+
+# ── Screen Capture ────────────────────────────────────────────────────────────
+CAPTURE_MODE            = "auto"  # "full", "window" (active window crop), "diff" or "auto"
+CAPTURE_TILE_SIZE       = 64      # tile size in pixels for change detection
+CAPTURE_PIXEL_THRESHOLD = 24      # grayscale delta (0-255) that counts as a changed pixel
+CAPTURE_MIN_TILE_CHANGE = 0.02    # fraction of changed pixels before a tile counts as changed
+CAPTURE_MAX_DIFF_AREA   = 0.4     # above this share of changed tiles, send the window crop instead
+CAPTURE_MAX_SIDE        = 900     # longest side of the image sent to the vision model
+
+# ── Local Scoring Tier ────────────────────────────────────────────────────────
+LOCAL_TIER_ENABLED         = True   # score obvious cases on-device before calling the cloud model
+LOCAL_CONFIDENCE_THRESHOLD = 0.6    # 0-1; below this the check is escalated to the cloud
+LOCAL_OCR_ENABLED          = False  # OCR the focused window with tesseract (needs pytesseract)
+LOCAL_OCR_MAX_CHARS        = 4000   # cap on OCR text fed to the classifier
+
+# ── Model Routing ─────────────────────────────────────────────────────────────
+# Page checks and screen scoring try the fast model first (OPENAI_MODEL_TEXT /
+# OPENAI_MODEL_VISION) and only re-ask the strong one (OPENAI_MODEL_TEXT_STRONG /
+# OPENAI_MODEL_VISION_STRONG) when the answer is unclear.
+ROUTER_ENABLED        = True
+ROUTER_AMBIGUOUS_LOW  = 4     # scores in [LOW, HIGH] are too close to call -> escalate
+ROUTER_AMBIGUOUS_HIGH = 6
+
+# ── Focus Profile ─────────────────────────────────────────────────────────────
+# Page verdicts and excuse outcomes are remembered per (site, focus topic).
+# Once a pair has enough recent, consistent decisions, /evaluate answers from
+# the profile without calling the model.
+PROFILE_ENABLED        = True
+PROFILE_HALF_LIFE_DAYS = 14    # evidence counts half as much after this long
+PROFILE_MIN_EVIDENCE   = 3.0   # decayed decisions needed before the profile answers alone
+PROFILE_CONFIDENCE     = 0.85  # share of that evidence that must agree
+PROFILE_EXCUSE_WEIGHT  = 2.0   # an excuse outcome counts this many AI verdicts
+# Sites where one page can be a lecture and the next a distraction: the profile
+# never answers for them (each URL goes to the model; repeats hit the verdict cache)
+PROFILE_MIXED_HOSTS = [
+    "youtube.com", "reddit.com", "twitter.com", "x.com", "facebook.com",
+    "instagram.com", "tiktok.com", "twitch.tv", "medium.com", "google.com",
+]
+
 # ── Pomodoro / Break Settings ─────────────────────────────────────────────────
 POMODORO_WORK_MINUTES  = 25   # work interval
 POMODORO_SHORT_BREAK   = 5    # short break after each interval
@@ -26,6 +71,19 @@ BLOCKED_SITES = [
     "netflix.com",
 ]
 
+# ── Notifications ─────────────────────────────────────────────────────────────
+NOTIFY_MIN_GAP_SECONDS = 120   # same kind of alert (e.g. "focus up") at most this often
+NOTIFY_STALE_SECONDS   = 30    # drop notifications that waited longer than this to be shown
+NOTIFY_QUEUE_MAX       = 50    # pending notifications before new ones are dropped
+
+# ── Runtime (event loop) ──────────────────────────────────────────────────────
+RUNTIME_BLOCKING_WORKERS = 4   # threads for blocking work (OpenAI, screenshots, plyer, SQLite)
+RUNTIME_UI_POLL_MS       = 30  # how often Tk picks up work queued from the loop
+RUNTIME_LIMITS = {             # max concurrent blocking calls per kind of work
+    "llm":    2,
+    "notify": 1,
+}
+
 # ── Orb UI ────────────────────────────────────────────────────────────────────
 ORB_SIZE         = 60      # diameter in pixels
 ORB_POSITION_X   = 50     # distance from right edge of screen
@@ -37,9 +95,36 @@ COLOR_BORDERLINE    = "#FF9800"   # amber  (score 4-6)
 COLOR_UNPRODUCTIVE  = "#F44336"   # red    (score 1-3)
 COLOR_IDLE          = "#9E9E9E"   # grey   (not monitoring)
 
+# ── Local Server / Push Channel ───────────────────────────────────────────────
+SERVER_URL   = "http://localhost:8000"   # server.py (also used by the Chrome extension)
+PUSH_ENABLED = True                      # share score/focus/break/verdict updates via server.py
+STORE_SYNC_SECONDS = 30                  # how often the desktop app pulls task changes from the store
+VERDICT_CACHE_SECONDS = 600              # server.py keeps page verdicts this long (per focus topic + URL)
+VERDICT_CACHE_MAX     = 2000             # max cached verdicts before old ones are evicted
+DWELL_FLUSH_SECONDS   = 60               # how often server.py writes per-host dwell time to DB_FILE
+DWELL_MAX_GAP_SECONDS = 120              # longest stretch credited without a new event (the extension
+                                         # sends a heartbeat every 30 s; silence means the browser is gone)
+INGEST_MAX_KB         = 1024             # largest telemetry batch /ingest accepts (after decompression)
+
+# ── URL Reader (chat "Check a URL") ───────────────────────────────────────────
+URL_FETCH_MAX_KB   = 512          # stop downloading a page after this much HTML
+URL_FETCH_TIMEOUT  = (3, 5)       # (connect, read) seconds
+URL_TEXT_MAX_CHARS = 6000         # readable text sent to the model, at most
+URL_CACHE_DIR      = "url_cache"  # extracted pages, keyed by URL (revalidated with ETag)
+URL_CACHE_SECONDS  = 3600         # reuse a cached page without asking the server for this long
+
 # ── Analytics ─────────────────────────────────────────────────────────────────
 LOG_FILE = "focusorb_log.json"    # where session data is saved
+DB_FILE  = "focusorb.db"          # SQLite store (assignments), shared with server.py
+SUMMARY_INTERVAL_MINUTES = 25     # condense the log into the running AI recap this often (one Pomodoro)
+SUMMARY_FINAL_WAIT_SECONDS = 10   # on quit, wait this long for the last (partial) interval's recap
 
 # ── Chat Window ───────────────────────────────────────────────────────────────
 CHAT_WIDTH  = 400
 CHAT_HEIGHT = 500
+CHAT_MAX_IN_FLIGHT = 1   # AI calls running at once per chat window
+CHAT_MAX_WAITING   = 3   # queued messages beyond this skip the oldest one
+CHAT_VISIBLE_MESSAGES = 80    # messages kept in the Text widget; older ones page in on scroll
+CHAT_RING_MESSAGES    = 500   # recent messages kept in memory (all are saved to DB_FILE)
+CHAT_PAGE_MESSAGES    = 20    # messages loaded per scroll to the top / bottom
+CHAT_FRAME_MS         = 16    # new messages and streamed text are drawn once per frame
@@ -26,17 +26,375 @@ chrome.runtime.onInstalled.addListener(async () => {
   await chrome.storage.local.set({ ...defaults, ...existing });
 });
 
-function notify(title, message) {
+// ---------- In-memory settings + verdict cache ----------
+// chrome.storage.local is read in full once per service-worker lifetime and
+// then kept current through storage.onChanged. Verdicts are cached per URL
+// (and per host once a host has answered the same way a few times), backed
+// by chrome.storage.session so they survive the worker being suspended.
+
+const URL_VERDICT_TTL_MS = 10 * 60 * 1000;
+const HOST_VERDICT_TTL_MS = 30 * 60 * 1000;
+const HOST_VERDICT_MIN_AGREE = 3; // same answer this many times -> trust it for the whole host
+
+let settings = {};
+let blockSet = new Set(); // precompiled blocklist host suffixes
+let verdicts = { url: {}, host: {} }; // key -> { allowed, reason, score, expires, n? }
+
+const ready = (async () => {
+  settings = await chrome.storage.local.get(null);
+  compileBlocklist(settings.blocklist);
+  const { verdicts: saved } = await chrome.storage.session.get("verdicts");
+  if (saved?.topic === settings.focusTopic) verdicts = saved.data;
+})();
+
+chrome.storage.onChanged.addListener((changes, area) => {
+  if (area !== "local") return;
+  for (const [key, { newValue }] of Object.entries(changes)) settings[key] = newValue;
+  if (changes.blocklist) compileBlocklist(settings.blocklist);
+  if (changes.focusTopic) {
+    // Verdicts are relative to the focus topic — start over
+    verdicts = { url: {}, host: {} };
+    persistVerdicts();
+  }
+});
+
+function compileBlocklist(list) {
+  blockSet = new Set((list || []).map((d) => String(d).toLowerCase().replace(/^www\./, "")));
+}
+
+// "m.youtube.com" matches "youtube.com": check each parent domain in the Set
+function isBlockedHost(host) {
+  let h = String(host || "").toLowerCase();
+  while (h) {
+    if (blockSet.has(h)) return true;
+    const dot = h.indexOf(".");
+    if (dot < 0) return false;
+    h = h.slice(dot + 1);
+  }
+  return false;
+}
+
+function urlKey(url) {
+  return String(url || "").split("#")[0];
+}
+
+function cachedVerdict(host, url) {
+  const now = Date.now();
+  const byUrl = verdicts.url[urlKey(url)];
+  if (byUrl && byUrl.expires > now) return byUrl;
+  const byHost = verdicts.host[host];
+  if (byHost && byHost.expires > now && byHost.n >= HOST_VERDICT_MIN_AGREE) return byHost;
+  return null;
+}
+
+function rememberVerdict(host, url, data) {
+  const now = Date.now();
+  const v = { allowed: data.allowed, reason: data.reason, score: data.score };
+  verdicts.url[urlKey(url)] = { ...v, expires: now + URL_VERDICT_TTL_MS };
+
+  const prev = verdicts.host[host];
+  const agrees = prev && prev.expires > now && prev.allowed === data.allowed;
+  verdicts.host[host] = { ...v, n: agrees ? prev.n + 1 : 1, expires: now + HOST_VERDICT_TTL_MS };
+  persistVerdicts();
+}
+
+let persistTimer = null;
+function persistVerdicts() {
+  // Coalesce bursts of writes into one session-storage write
+  clearTimeout(persistTimer);
+  persistTimer = setTimeout(() => {
+    const now = Date.now();
+    for (const map of [verdicts.url, verdicts.host]) {
+      for (const [k, v] of Object.entries(map)) if (v.expires <= now) delete map[k];
+    }
+    chrome.storage.session.set({ verdicts: { topic: settings.focusTopic, data: verdicts } });
+  }, 500);
+}
+
+// ---------- Push channel (server.py /ws) ----------
+// One WebSocket shared by the whole extension. The server fans out score
+// updates, focus topic changes, break state and verdicts from every client.
+
+const PUSH_URL = "ws://localhost:8000/ws";
+let pushSocket = null;
+let pushRetryMs = 1000;
+
+function connectPush() {
+  if (pushSocket && pushSocket.readyState <= WebSocket.OPEN) return;
   try {
-    chrome.notifications.create({
-      type: "basic",
-      iconUrl: "icon.png",
-      title: title || "FocusOrb",
-      message: message || ""
+    pushSocket = new WebSocket(PUSH_URL);
+  } catch {
+    return schedulePushReconnect();
+  }
+
+  pushSocket.onopen = () => {
+    pushRetryMs = 1000;
+  };
+
+  pushSocket.onmessage = (ev) => {
+    let msg;
+    try {
+      msg = JSON.parse(ev.data);
+    } catch {
+      return;
+    }
+    const events = msg.type === "snapshot" ? Object.values(msg.state || {}) : [msg];
+    for (const e of events) applyPush(e);
+  };
+
+  pushSocket.onclose = () => {
+    pushSocket = null;
+    schedulePushReconnect();
+  };
+}
+
+function schedulePushReconnect() {
+  setTimeout(connectPush, pushRetryMs);
+  pushRetryMs = Math.min(pushRetryMs * 2, 30000);
+}
+
+// Publish a local change to the other clients and to our own tabs
+function publishPush(event) {
+  if (pushSocket?.readyState === WebSocket.OPEN) {
+    pushSocket.send(JSON.stringify(event));
+  }
+  forwardToTabs(event);
+}
+
+// Apply an event from another client, then forward it to open tabs
+async function applyPush(e) {
+  if (e.type === "tasks") {
+    await syncTasks();
+  } else if (e.type === "focus") {
+    await chrome.storage.local.set({ focusTopic: e.topic || "", focusSince: e.since || 0 });
+  } else if (e.type === "break") {
+    await chrome.storage.local.set({ breakUntil: e.until || 0, breakHost: e.host || "" });
+  }
+  forwardToTabs(e);
+}
+
+async function forwardToTabs(e) {
+  const tabs = await chrome.tabs.query({});
+  for (const t of tabs) {
+    chrome.tabs.sendMessage(t.id, { type: "FO_PUSH", event: e }).catch(() => {});
+  }
+}
+
+connectPush();
+
+// ---------- Assignment sync (server.py /assignments) ----------
+// Tasks live in the shared SQLite store. We keep a copy in chrome.storage
+// and only ask for rows changed since the last version we saw; the ETag
+// turns "nothing changed" into an empty 304.
+
+const API = "http://localhost:8000";
+let tasksEtag = "";
+
+async function syncTasks() {
+  try {
+    const { tasks = {}, tasksVersion = 0 } = await chrome.storage.local.get(["tasks", "tasksVersion"]);
+    const res = await fetch(`${API}/assignments?since=${tasksVersion}`, {
+      headers: tasksEtag ? { "If-None-Match": tasksEtag } : {}
+    });
+    if (res.status === 304 || !res.ok) return;
+    tasksEtag = res.headers.get("ETag") || "";
+
+    const data = await res.json(); // { version, reset, changes: [...] }
+    const next = data.reset ? {} : { ...tasks };
+    for (const t of data.changes || []) {
+      if (t.deleted) delete next[t.key];
+      else next[t.key] = t;
+    }
+    await chrome.storage.local.set({ tasks: next, tasksVersion: data.version });
+  } catch {
+    // backend not running — keep the last synced copy
+  }
+}
+
+async function saveTask(name) {
+  try {
+    await fetch(`${API}/assignments`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ name, estimatedMinutes: 25 })
     });
   } catch {}
 }
 
+syncTasks();
+setInterval(syncTasks, 60 * 1000);
+
+// ---------- Speculative prefetch ----------
+// As soon as a top-level navigation starts, ask the backend to evaluate the
+// URL in the background. By the time content.js asks (document_idle), the
+// verdict is usually already cached server-side.
+
+const lastPrefetch = new Map(); // tabId -> url (skip duplicate events for one navigation)
+
+async function prefetchVerdict(tabId, url) {
+  if (!/^https?:/.test(url || "") || lastPrefetch.get(tabId) === url) return;
+  lastPrefetch.set(tabId, url);
+
+  await ready;
+  const { enabled = true, focusTopic = "" } = settings;
+  if (!enabled || !focusTopic) return;
+
+  const host = new URL(url).hostname.replace(/^www\./, "");
+  if (isBlockedHost(host) || cachedVerdict(host, url)) return; // answer already known locally
+  fetch(`${API}/prefetch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ host, url, focusTopic })
+  }).catch(() => {});
+}
+
+chrome.webNavigation.onBeforeNavigate.addListener((d) => {
+  if (d.frameId === 0) prefetchVerdict(d.tabId, d.url);
+});
+
+chrome.tabs.onUpdated.addListener((tabId, changeInfo) => {
+  // Catches SPA route changes that never fire onBeforeNavigate
+  if (changeInfo.url) prefetchVerdict(tabId, changeInfo.url);
+});
+
+chrome.tabs.onRemoved.addListener((tabId) => lastPrefetch.delete(tabId));
+
+// ---------- Telemetry transport (server.py /ingest) ----------
+// Small records (attention events, verdicts) wait in a fixed-size ring and go
+// out together — once TELEMETRY_BATCH_MAX are waiting or every
+// TELEMETRY_FLUSH_MS — as one gzip-compressed POST. The body is sent as
+// text/plain so it stays a CORS "simple" request (no preflight); the server
+// recognizes the gzip header. If the backend is down, records stay in the
+// ring and the oldest are overwritten once it's full.
+
+const TELEMETRY_RING_SIZE = 512;
+const TELEMETRY_BATCH_MAX = 64;
+const TELEMETRY_FLUSH_MS = 15 * 1000;
+
+const ring = new Array(TELEMETRY_RING_SIZE);
+let ringHead = 0; // index of the oldest record
+let ringCount = 0;
+let flushing = false;
+
+function enqueue(record) {
+  ring[(ringHead + ringCount) % TELEMETRY_RING_SIZE] = record;
+  if (ringCount < TELEMETRY_RING_SIZE) ringCount++;
+  else ringHead = (ringHead + 1) % TELEMETRY_RING_SIZE; // full: drop the oldest
+  if (ringCount >= TELEMETRY_BATCH_MAX) flushTelemetry();
+}
+
+function takeAll() {
+  const out = new Array(ringCount);
+  for (let i = 0; i < ringCount; i++) out[i] = ring[(ringHead + i) % TELEMETRY_RING_SIZE];
+  ringHead = ringCount = 0;
+  return out;
+}
+
+// Send failed: put the records back in front of anything queued meanwhile (as room allows)
+function putBack(records) {
+  for (let i = records.length - 1; i >= 0 && ringCount < TELEMETRY_RING_SIZE; i--) {
+    ringHead = (ringHead - 1 + TELEMETRY_RING_SIZE) % TELEMETRY_RING_SIZE;
+    ring[ringHead] = records[i];
+    ringCount++;
+  }
+}
+
+async function gzipJson(obj) {
+  const stream = new Blob([JSON.stringify(obj)]).stream().pipeThrough(new CompressionStream("gzip"));
+  return new Response(stream).arrayBuffer();
+}
+
+async function flushTelemetry() {
+  if (flushing || !ringCount) return;
+  flushing = true;
+  const records = takeAll();
+  try {
+    const res = await fetch(`${API}/ingest`, {
+      method: "POST",
+      headers: { "Content-Type": "text/plain" },
+      body: await gzipJson({ v: 1, records })
+    });
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+  } catch {
+    putBack(records);
+  } finally {
+    flushing = false;
+  }
+}
+
+setInterval(flushTelemetry, TELEMETRY_FLUSH_MS);
+
+// ---------- Attention events ----------
+// Which host has the user's attention, and since when. Tab switches, URL
+// changes in the active tab, window focus and idle state are recorded as
+// ["a", epochSeconds, host] ("" = away from the browser); the server turns
+// them into time per host per day (GET /dwell).
+
+let attentionHost = null; // last recorded host (null until the first event)
+
+function hostOf(url) {
+  if (!/^https?:/.test(url || "")) return "";
+  try {
+    return new URL(url).hostname.replace(/^www\./, "");
+  } catch {
+    return "";
+  }
+}
+
+function recordAttention(host, heartbeat = false) {
+  if (host === attentionHost && !heartbeat) return;
+  attentionHost = host;
+  enqueue(["a", Date.now() / 1000, host]);
+}
+
+async function refreshAttention() {
+  const [tab] = await chrome.tabs.query({ active: true, lastFocusedWindow: true });
+  recordAttention(tab ? hostOf(tab.url) : "");
+}
+
+chrome.tabs.onActivated.addListener(() => refreshAttention());
+chrome.tabs.onUpdated.addListener((tabId, changeInfo, tab) => {
+  if (changeInfo.url && tab.active) refreshAttention();
+});
+chrome.windows.onFocusChanged.addListener((windowId) => {
+  if (windowId === chrome.windows.WINDOW_ID_NONE) recordAttention("");
+  else refreshAttention();
+});
+chrome.idle.onStateChanged.addListener((state) => {
+  if (state === "active") refreshAttention();
+  else recordAttention("");
+});
+
+// The service worker sleeps when nothing happens; the alarm wakes it to
+// confirm the current host (heartbeat) and send whatever is waiting
+chrome.alarms.create("fo-events", { periodInMinutes: 0.5 });
+chrome.alarms.onAlarm.addListener((alarm) => {
+  if (alarm.name !== "fo-events") return;
+  if (attentionHost) recordAttention(attentionHost, true);
+  flushTelemetry();
+});
+refreshAttention();
+
+// Notifications with the same key replace each other instead of stacking up,
+// and an identical one within NOTIFY_MIN_GAP_MS of the last is skipped.
+const NOTIFY_MIN_GAP_MS = 10 * 1000;
+const lastNotified = new Map(); // key -> { message, at }
+
+function notify(title, message, key = title || "FocusOrb") {
+  const now = Date.now();
+  const last = lastNotified.get(key);
+  if (last && last.message === message && now - last.at < NOTIFY_MIN_GAP_MS) return;
+  lastNotified.set(key, { message, at: now });
+
+  // Fire-and-forget: never awaited, so message handlers don't wait on the OS
+  chrome.notifications.create(`fo-${key}`, {
+    type: "basic",
+    iconUrl: "icon.png",
+    title: title || "FocusOrb",
+    message: message || ""
+  }).catch(() => {});
+}
+
 chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
   // Close current tab
   if (msg?.type === "CLOSE_TAB" && sender?.tab?.id) {
@@ -54,15 +412,18 @@ chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
 
   // Get all settings/state
   if (msg?.type === "GET_SETTINGS") {
-    chrome.storage.local.get(null).then((data) => sendResponse({ ok: true, data }));
+    ready.then(() => sendResponse({ ok: true, data: settings }));
     return true;
   }
 
   // Set focus topic (from popup OR orb chat if you want later)
   if (msg?.type === "SET_FOCUS") {
     const topic = String(msg.topic || "").trim();
-    chrome.storage.local.set({ focusTopic: topic, focusSince: topic ? Date.now() : 0 }).then(() => {
-      notify("FocusOrb", topic ? `Focus set: ${topic}` : "Focus cleared");
+    const since = topic ? Date.now() : 0;
+    chrome.storage.local.set({ focusTopic: topic, focusSince: since }).then(() => {
+      publishPush({ type: "focus", topic, since });
+      if (topic) saveTask(topic); // share the focus topic as a task with the desktop app
+      notify("FocusOrb", topic ? `Focus set: ${topic}` : "Focus cleared", "focus");
       sendResponse({ ok: true });
     });
     return true;
@@ -74,7 +435,8 @@ chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
     const ms = Math.max(0, minutes) * 60 * 1000;
     const host = msg.host || "";
 
-    chrome.storage.local.get(["breakUntil", "breakHost"]).then(({ breakUntil = 0, breakHost = "" }) => {
+    ready.then(() => {
+      const { breakUntil = 0, breakHost = "" } = settings;
       const now = Date.now();
 
       const sameHostActive = breakUntil > now && breakHost === host;
@@ -89,7 +451,8 @@ chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
           breakReason: msg.reason || ""
         })
         .then(() => {
-          notify("FocusOrb", `Break granted ✅ (+${minutes} min) for ${host}`);
+          publishPush({ type: "break", until: newBreakUntil, host });
+          notify("FocusOrb", `Break granted ✅ (+${minutes} min) for ${host}`, "break");
           sendResponse({ ok: true, breakUntil: newBreakUntil, breakHost: host });
         });
     });
@@ -99,14 +462,18 @@ chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
 
   // GET_BREAK: used by content.js to enforce break end
   if (msg?.type === "GET_BREAK") {
-    chrome.storage.local.get(["breakUntil", "breakHost"]).then((data) => sendResponse({ ok: true, data }));
+    ready.then(() => {
+      const { breakUntil = 0, breakHost = "" } = settings;
+      sendResponse({ ok: true, data: { breakUntil, breakHost } });
+    });
     return true;
   }
 
   // END_BREAK (optional)
   if (msg?.type === "END_BREAK") {
     chrome.storage.local.set({ breakUntil: 0, breakHost: "", breakReason: "" }).then(() => {
-      notify("FocusOrb", "Break ended.");
+      publishPush({ type: "break", until: 0, host: "" });
+      notify("FocusOrb", "Break ended.", "break");
       sendResponse({ ok: true });
     });
     return true;
@@ -117,21 +484,54 @@ chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
   if (msg?.type === "EVAL_WITH_AI") {
     (async () => {
       try {
-        const res = await fetch("http://localhost:8000/evaluate", {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify(msg.payload || {})
-        });
+        await ready;
+        const payload = msg.payload || {};
+        const host = payload.host || "";
 
-        const data = await res.json(); // { allowed: boolean, reason: string, score?: number }
+        // A justification always goes to the AI, even for a blocklisted host.
+        // Otherwise blocklist and cached verdicts never touch the backend.
+        let source = payload.reason ? "excuse" : isBlockedHost(host) ? "blocklist" : "cache";
+        let data =
+          source === "blocklist"
+            ? { allowed: false, reason: `${host} is on your blocklist.`, score: 1 }
+            : source === "excuse"
+              ? null // a justification always goes to the AI
+              : cachedVerdict(host, payload.url);
 
-        await chrome.storage.local.set({
-          lastDecision: { at: Date.now(), input: msg.payload || {}, output: data }
-        });
+        if (!data) {
+          if (source === "cache") source = "ai";
+          const res = await fetch(`${API}/evaluate`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify(payload)
+          });
 
-        notify("FocusOrb", data.reason || (data.allowed ? "Allowed ✅" : "Blocked ❌"));
+          data = await res.json(); // { allowed: boolean, reason: string, score?: number }
+          if (!payload.reason) rememberVerdict(host, payload.url, data);
+
+          await chrome.storage.local.set({
+            lastDecision: { at: Date.now(), input: payload, output: data }
+          });
+        }
+
+        enqueue([
+          "v",
+          Date.now() / 1000,
+          host,
+          payload.url || "",
+          settings.focusTopic || "",
+          data.allowed === false ? 0 : 1,
+          data.score ?? null,
+          source
+        ]);
+
+        // Automatic page checks (quiet) only warn, and only when the page is
+        // off-topic; the tab is closed only for a check the user started
+        if (!msg.quiet || data.allowed === false) {
+          notify("FocusOrb", data.reason || (data.allowed ? "Allowed ✅" : "Blocked ❌"), "verdict");
+        }
 
-        if (data.allowed === false && sender?.tab?.id) {
+        if (!msg.quiet && data.allowed === false && sender?.tab?.id) {
           chrome.tabs.remove(sender.tab.id);
         }
 
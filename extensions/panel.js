@@ -0,0 +1,245 @@
+// panel.js - FocusOrb chat panel
+//
+// Loaded by content.js on the first orb click and built inside the orb's
+// shadow root, so pages that never open the chat never pay for it.
+
+function fmtTime(ts) {
+  try {
+    return new Date(ts).toLocaleTimeString([], { hour: "2-digit", minute: "2-digit" });
+  } catch {
+    return "";
+  }
+}
+
+function parseBreakMinutes(text) {
+  const t = (text || "").toLowerCase().trim();
+  const m = t.match(/break\s+(\d+)\s*(min|mins|minute|minutes)?/);
+  if (!m) return null;
+  return Number(m[1]);
+}
+
+function bubble(role, text, ts) {
+  const wrap = document.createElement("div");
+  wrap.style.cssText = `
+    align-self: ${role === "user" ? "flex-end" : "flex-start"};
+    max-width: 78%;
+    padding: 7px 10px;
+    border-radius: 14px;
+    font-size: 13px;
+    line-height: 1.28;
+    white-space: pre-wrap;
+    word-break: break-word;
+    background: ${role === "user" ? "rgba(120,180,255,0.18)" : "rgba(255,255,255,0.08)"};
+    border: 1px solid rgba(255,255,255,0.12);
+    color: rgba(255,255,255,0.92);
+  `;
+
+  const body = document.createElement("div");
+  body.textContent = text;
+
+  const time = document.createElement("div");
+  time.textContent = ts ? fmtTime(ts) : "";
+  time.style.cssText = `
+    margin-top: 4px;
+    font-size: 10px;
+    opacity: 0.55;
+    text-align: ${role === "user" ? "right" : "left"};
+  `;
+
+  wrap.appendChild(body);
+  if (ts) wrap.appendChild(time);
+  return wrap;
+}
+
+// root: the orb's ShadowRoot. ctx: { host(), getSettings(), verdict(), clearVerdict() }
+// from content.js — verdict() is set while this page's automatic check says it's off-topic
+export function createPanel(root, ctx) {
+  const state = {
+    open: false,
+    messages: [], // { role: "user"|"assistant", text: string, ts: number }
+    busy: false
+  };
+
+  const panel = document.createElement("div");
+  panel.style.cssText = `
+    position: fixed;
+    right: 18px;
+    bottom: 18px;
+    width: 360px;
+    height: 520px;
+    z-index: 2147483647;
+    border-radius: 18px;
+    border: 1px solid rgba(255,255,255,0.14);
+    background: rgba(15,20,35,0.92);
+    box-shadow: 0 22px 60px rgba(0,0,0,0.55);
+    backdrop-filter: blur(10px);
+    overflow: hidden;
+    display: none;
+    color: rgba(255,255,255,0.92);
+    font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial;
+  `;
+
+  panel.innerHTML = `
+    <div style="display:flex;align-items:center;justify-content:space-between;gap:10px;padding:12px;border-bottom:1px solid rgba(255,255,255,0.12);">
+      <div style="display:flex;align-items:center;gap:10px;">
+        <div style="width:10px;height:10px;border-radius:999px;background:rgba(120,220,255,1);box-shadow:0 0 18px rgba(120,220,255,0.45);"></div>
+        <div style="font-weight:900;">FocusOrb</div>
+      </div>
+      <button id="fo-close-panel" style="border:1px solid rgba(255,255,255,0.14);background:transparent;color:rgba(255,255,255,0.8);border-radius:10px;padding:4px 8px;cursor:pointer;">✕</button>
+    </div>
+
+    <div id="fo-sub" style="padding:8px 12px;font-size:12px;color:rgba(255,255,255,0.65);border-bottom:1px solid rgba(255,255,255,0.10);"></div>
+
+    <div id="fo-messages" style="
+      padding:12px;
+      display:flex;
+      flex-direction:column;
+      gap:8px;
+      overflow:auto;
+      height:360px;
+    "></div>
+
+    <div style="padding:12px;border-top:1px solid rgba(255,255,255,0.12);display:flex;gap:8px;align-items:center;">
+      <input id="fo-input" placeholder="Message… (or: break 5)"
+        style="flex:1;padding:10px 12px;border-radius:12px;border:1px solid rgba(255,255,255,0.14);outline:none;background:rgba(0,0,0,0.25);color:rgba(255,255,255,0.92);" />
+      <button id="fo-send" style="width:44px;height:44px;border-radius:14px;border:1px solid rgba(255,255,255,0.14);background:rgba(120,180,255,0.18);color:white;font-weight:900;cursor:pointer;">➤</button>
+    </div>
+  `;
+
+  root.appendChild(panel);
+
+  const sub = panel.querySelector("#fo-sub");
+  const box = panel.querySelector("#fo-messages");
+  const input = panel.querySelector("#fo-input");
+
+  panel.querySelector("#fo-close-panel").onclick = () => close();
+  panel.querySelector("#fo-send").onclick = () => sendChat();
+  input.addEventListener("keydown", (e) => {
+    if (e.key === "Enter") sendChat();
+  });
+
+  function open() {
+    state.open = true;
+    panel.style.display = "block";
+    sub.innerHTML = "";
+    sub.append("Site: ");
+    sub.appendChild(document.createElement("b")).textContent = ctx.host();
+    if (ctx.verdict()) sub.append(" — looks off-topic. Tell me why you need it.");
+    setTimeout(() => input.focus(), 50);
+  }
+
+  function close() {
+    state.open = false;
+    panel.style.display = "none";
+  }
+
+  function renderMessages() {
+    box.innerHTML = "";
+
+    for (const m of state.messages) {
+      box.appendChild(bubble(m.role, m.text, m.ts));
+    }
+
+    // typing indicator
+    if (state.busy) {
+      const typing = bubble("assistant", "typing…", Date.now());
+      typing.style.opacity = "0.75";
+      box.appendChild(typing);
+    }
+
+    box.scrollTop = box.scrollHeight;
+  }
+
+  async function sendChat() {
+    if (state.busy) return;
+
+    const text = input.value.trim();
+    if (!text) return;
+    input.value = "";
+
+    // Break command inside chat
+    const mins = parseBreakMinutes(text);
+    if (mins != null) {
+      chrome.runtime.sendMessage({ type: "START_BREAK", minutes: mins, host: ctx.host(), reason: text });
+      state.messages.push({
+        role: "assistant",
+        text: `Break: ${mins} min ✅`,
+        ts: Date.now()
+      });
+      renderMessages();
+      return;
+    }
+
+    state.messages.push({ role: "user", text, ts: Date.now() });
+    state.busy = true;
+    renderMessages();
+
+    // The page was flagged: this message is the justification
+    if (ctx.verdict()) return justify(text);
+
+    const settings = await ctx.getSettings();
+    const payload = {
+      message: text,
+      host: ctx.host(),
+      url: location.href,
+      title: document.title,
+      focusTopic: settings.focusTopic || "",
+      focusSince: settings.focusSince || 0,
+      // OPTIONAL: send last few messages as history if your backend supports it later
+      // history: state.messages.slice(-10).map(m => ({ role: m.role, content: m.text }))
+    };
+
+    chrome.runtime.sendMessage({ type: "CHAT", payload }, (resp) => {
+      state.busy = false;
+
+      if (!resp?.ok) {
+        state.messages.push({
+          role: "assistant",
+          text: `Error: ${resp?.error || "unknown"}`,
+          ts: Date.now()
+        });
+        renderMessages();
+        return;
+      }
+
+      const reply = resp.data?.reply || "(no reply)";
+      state.messages.push({ role: "assistant", text: reply, ts: Date.now() });
+      renderMessages();
+    });
+  }
+
+  // The AI re-judges the page with the user's reason. If it still says no,
+  // background.js closes the tab (a check the user started).
+  async function justify(reason) {
+    const settings = await ctx.getSettings();
+    const payload = {
+      host: ctx.host(),
+      url: location.href,
+      title: document.title,
+      focusTopic: settings.focusTopic || "",
+      reason
+    };
+
+    chrome.runtime.sendMessage({ type: "EVAL_WITH_AI", payload }, (resp) => {
+      state.busy = false;
+
+      if (!resp?.ok) {
+        state.messages.push({ role: "assistant", text: `Error: ${resp?.error || "unknown"}`, ts: Date.now() });
+        renderMessages();
+        return;
+      }
+
+      const data = resp.data || {};
+      if (data.allowed !== false) ctx.clearVerdict();
+      const text = `${data.allowed === false ? "❌" : "✅"} ${data.reason || ""}`.trim();
+      state.messages.push({ role: "assistant", text, ts: Date.now() });
+      renderMessages();
+    });
+  }
+
+  return {
+    toggle: () => (state.open ? close() : open()),
+    open,
+    close
+  };
+}
@@ -1,11 +1,27 @@
 async function refresh() {
-  const { focusTopic = "", focusSince = 0 } = await chrome.storage.local.get(["focusTopic", "focusSince"]);
+  const { focusTopic = "", focusSince = 0, tasks = {} } = await chrome.storage.local.get(["focusTopic", "focusSince", "tasks"]);
   const el = document.getElementById("current");
   if (!focusTopic) {
     el.textContent = "No focus set.";
   } else {
     el.textContent = `Current focus: ${focusTopic} (since ${new Date(focusSince).toLocaleTimeString()})`;
   }
+  renderTasks(tasks);
+}
+
+// Tasks synced from the desktop app — click one to focus on it
+function renderTasks(tasks) {
+  const box = document.getElementById("tasks");
+  box.textContent = "";
+  const active = Object.values(tasks).filter((t) => !t.completed);
+  for (const t of active) {
+    const btn = document.createElement("button");
+    btn.textContent = t.dueDate ? `${t.name} — due ${t.dueDate}` : t.name;
+    btn.style.cssText =
+      "text-align:left;padding:8px;border-radius:8px;border:1px solid rgba(255,255,255,.12);background:rgba(255,255,255,.06);color:white;cursor:pointer;";
+    btn.onclick = () => chrome.runtime.sendMessage({ type: "SET_FOCUS", topic: t.name }, refresh);
+    box.appendChild(btn);
+  }
 }
 
 document.getElementById("set").onclick = async () => {
@@ -0,0 +1,113 @@
+# focus_profile.py
+# What this user keeps open while working on what — learned from decisions
+# ----------------------------------------
+# Every AI page verdict and every excuse outcome (extension or desktop chat)
+# adds "allow" or "deny" evidence for a (host, focus topic) pair. Evidence
+# decays with a half-life of PROFILE_HALF_LIFE_DAYS, so old habits fade.
+#
+# predict() answers on its own only when a pair has enough recent evidence
+# and it mostly agrees, and never for PROFILE_MIXED_HOSTS — a host-level
+# verdict can't tell a lecture video from a distraction. Everything else
+# returns None: the caller asks the model, and that verdict is recorded here
+# in turn. Profile answers are
+# never recorded, so the profile can't reinforce itself.
+#
+# Stored in the shared SQLite store (profile table), so server.py and the
+# desktop app learn from each other.
+
+import threading
+import time
+import config
+import store
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "recorded": 0}
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def record(host: str, topic: str, allowed: bool, weight: float = 1.0):
+    """Add one decision for (host, topic)."""
+    host, topic = host_key(host), topic_key(topic)
+    if not host or not topic:
+        return
+    now = time.time()
+    with store.transaction() as conn:
+        allow, deny = _evidence(store.profile_row(conn, host, topic), now)
+        if allowed:
+            allow += weight
+        else:
+            deny += weight
+        store.put_profile_row(conn, host, topic, allow, deny, now)
+    _count("recorded")
+
+
+def record_excuse(host: str, topic: str, accepted: bool):
+    """An excuse was judged: the user said why they need this site for this topic."""
+    record(host, topic, accepted, config.PROFILE_EXCUSE_WEIGHT)
+
+
+def predict(host: str, topic: str) -> dict | None:
+    """A verdict ({allowed, reason, score, source, confidence}) if the profile is sure, else None."""
+    if not config.PROFILE_ENABLED:
+        return None
+    h, t = host_key(host), topic_key(topic)
+    if not h or not t or is_mixed(h):
+        return None
+    allow, deny = _evidence(store.profile_row(store.connect(), h, t), time.time())
+    total = allow + deny
+    confidence = max(allow, deny) / total if total else 0.0
+    if round(total, 3) < config.PROFILE_MIN_EVIDENCE or confidence < config.PROFILE_CONFIDENCE:
+        _count("misses")
+        return None
+
+    _count("hits")
+    allowed = allow > deny
+    reason = (f"You usually keep {h} open while working on {topic.strip()}." if allowed
+              else f"{h} usually isn't part of working on {topic.strip()}.")
+    return {
+        "allowed": allowed,
+        "reason": reason,
+        "score": max(1, min(10, round(10 * allow / total))),
+        "source": "profile",
+        "confidence": round(confidence, 2),
+    }
+
+
+def stats() -> dict:
+    """How often predict() answered without the model since startup."""
+    with _stats_lock:
+        out = dict(_stats)
+    asked = out["hits"] + out["misses"]
+    out["hit_rate"] = round(out["hits"] / asked, 3) if asked else 0.0
+    return out
+
+
+def is_mixed(host: str) -> bool:
+    """Is `host` (or a parent domain) in PROFILE_MIXED_HOSTS?"""
+    host = host_key(host)
+    return any(host == m or host.endswith("." + m) for m in config.PROFILE_MIXED_HOSTS)
+
+
+def host_key(host: str) -> str:
+    host = host.strip().lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def topic_key(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+
+# ── Internal ───────────────────────────────────────────────────────────────────
+
+def _evidence(row, now: float) -> tuple[float, float]:
+    """(allow, deny) decayed to `now`."""
+    if row is None:
+        return 0.0, 0.0
+    factor = 0.5 ** (max(0.0, now - row["updated"]) / (config.PROFILE_HALF_LIFE_DAYS * 86400))
+    return row["allow"] * factor, row["deny"] * factor
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
@@ -5,12 +5,17 @@ import base64
 import io
 import os
 import json
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
 
 from dotenv import load_dotenv
 from openai import OpenAI
 from PIL import Image
 
+import config
+import url_reader
+
 load_dotenv()
 
 # ✅ Accept either env var name
@@ -24,6 +29,151 @@ client = OpenAI(api_key=API_KEY)
 MODEL_TEXT = os.getenv("OPENAI_MODEL_TEXT") or "gpt-4o-mini"
 MODEL_VISION = os.getenv("OPENAI_MODEL_VISION") or "gpt-4o-mini"
 
+# Stronger models the router escalates to when the fast model's answer is unclear
+MODEL_TEXT_STRONG = os.getenv("OPENAI_MODEL_TEXT_STRONG") or "gpt-4o"
+MODEL_VISION_STRONG = os.getenv("OPENAI_MODEL_VISION_STRONG") or "gpt-4o"
+
+
+# ----------------------------
+# PROMPT REGISTRY
+# ----------------------------
+# Every call below is laid out as:
+#   1. system message: a static template from PROMPTS, byte-identical on every call
+#   2. conversation history, if any (the last 8 turns)
+#   3. one final user message with everything that changes per call
+# Never format per-call values into a PROMPTS entry.
+#
+# OpenAI only caches prompt prefixes of 1024+ tokens. Each entry here is
+# ~65-120 tokens, so the page check and screen scoring never hit the cache
+# (cached_tokens in /usage stays 0) — padding them up to 1024 tokens would
+# cost more per call than the cache discount saves. The chats can reach the
+# threshold, but their history window slides by a turn each message, so only
+# the system message stays a stable prefix; the layout is kept so longer
+# prompts cache as soon as they grow past the threshold.
+
+PROMPTS: Dict[str, str] = {
+  "orb_chat": (
+    "You are FocusOrb, a productivity coach. "
+    "Be extremely concise. 1 short sentence unless asked for detail. "
+    "If the user is distracted, please call it out and suggest the next action. "
+    "If the user asks for a break, suggest a reasonable break length.\n"
+    "Each user turn starts with the current focus topic and page, then the message."
+  ),
+  "evaluate_page": (
+    "You are a productivity classifier for a browser extension.\n"
+    "Decide if the current page is relevant to the user's focus topic.\n"
+    "Return ONLY valid JSON with keys: allowed (boolean), reason (string), score (1-10 integer).\n"
+    "allowed=false if it's likely a distraction.\n"
+  ),
+  "score_productivity": (
+    "You are a productivity assistant monitoring someone's screen.\n"
+    "You will be told what the user is working on, their open browser tabs, "
+    "and which part of the screen the image shows.\n"
+    "Look at the screenshot and rate their productivity from 1 to 10.\n"
+    "1 = completely distracted, 10 = deeply focused.\n\n"
+    'Respond ONLY with valid JSON: {"score": , "reason": "...", "is_productive": true}\n'
+  ),
+  "evaluate_excuse": (
+    "You are a strict but fair productivity coach.\n"
+    "The user was flagged as unproductive. You will be given the tabs they had open, "
+    "their current assignment and their excuse.\n\n"
+    "Respond ONLY with valid JSON:\n"
+    '{"accepted": false, "response": "...", "close_tab": true}'
+  ),
+  "desktop_chat": (
+    "You are FocusOrb, a helpful and encouraging productivity assistant built into a desktop app.\n"
+    "The user was flagged as unproductive.\n"
+    "Harshly punish the user if they have too many tasks and tell them they are not worthy.\n"
+    "Be concise and keep responses under 3 sentences unless asked for detail.\n"
+    "You can help with: task planning, motivation, break suggestions, or answering questions.\n"
+    "Each user turn starts with the tabs they had open and their current assignment, then the message."
+  ),
+  "url_check": (
+    "You are FocusOrb, a productivity assistant. The user pasted a link while working on an assignment.\n"
+    "You get the assignment and the page's title, headings and an excerpt of its text.\n"
+    "In at most 3 sentences: say what the page is about, whether it helps with the assignment, "
+    "and if it does, which part to read first. Start with ✅ if relevant or ⚠️ if not."
+  ),
+  "interval_summary": (
+    "You summarize one Pomodoro interval of a FocusOrb work session.\n"
+    "You get one line per check-in: time, productivity score (1-10), the reason given, and the open windows.\n"
+    "Write 1-2 plain sentences: what the user mostly worked on, and when/why they drifted, if they did.\n"
+    "No greetings, no advice, no lists."
+  ),
+  "session_summary": (
+    "You are FocusOrb, a friendly productivity coach writing a running recap of today's work session.\n"
+    "You get the recap so far (possibly empty), the summary of the interval that just ended, and session stats.\n"
+    "Rewrite the recap to cover the whole session in at most 4 sentences: what got done, focus trends, "
+    "the biggest distraction, and one concrete tip for next time.\n"
+    "Plain text only."
+  ),
+}
+
+# Per-prompt token usage: {name: {"calls", "prompt_tokens", "cached_tokens", "completion_tokens",
+#                                 "models": {model: {same counters}}}}
+_usage: Dict[str, Dict[str, int]] = {}
+_usage_lock = threading.Lock()
+
+
+def _complete(prompt_name: str, model: str, tail: List[Dict[str, Any]], **kwargs) -> str:
+  """Run a chat completion with PROMPTS[prompt_name] as the cached prefix; returns the text."""
+  messages = [{"role": "system", "content": PROMPTS[prompt_name]}, *tail]
+  resp = client.chat.completions.create(model=model, messages=messages, **kwargs)
+  _record_usage(prompt_name, model, resp.usage)
+  return resp.choices[0].message.content or ""
+
+
+def _complete_stream(prompt_name: str, model: str, tail: List[Dict[str, Any]], on_delta: Callable[[str], None], **kwargs) -> str:
+  """Like _complete, but calls on_delta(text) as tokens arrive. Returns the full text."""
+  messages = [{"role": "system", "content": PROMPTS[prompt_name]}, *tail]
+  stream = client.chat.completions.create(
+    model=model, messages=messages, stream=True, stream_options={"include_usage": True}, **kwargs
+  )
+  parts: List[str] = []
+  for chunk in stream:
+    if chunk.usage is not None:           # last chunk: usage only, no choices
+      _record_usage(prompt_name, model, chunk.usage)
+    if chunk.choices:
+      delta = chunk.choices[0].delta.content
+      if delta:
+        parts.append(delta)
+        on_delta(delta)
+  return "".join(parts)
+
+
+def _record_usage(prompt_name: str, model: str, usage: Any) -> None:
+  if usage is None:
+    return
+  details = getattr(usage, "prompt_tokens_details", None)
+  cached = getattr(details, "cached_tokens", 0) or 0
+  with _usage_lock:
+    stats = _usage.setdefault(prompt_name, {**_zero_usage(), "models": {}})
+    for counters in (stats, stats["models"].setdefault(model, _zero_usage())):
+      counters["calls"] += 1
+      counters["prompt_tokens"] += usage.prompt_tokens or 0
+      counters["cached_tokens"] += cached
+      counters["completion_tokens"] += usage.completion_tokens or 0
+
+
+def _zero_usage() -> Dict[str, int]:
+  return {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+
+
+def usage_stats() -> Dict[str, Dict[str, int]]:
+  """
+  Token usage per prompt since startup. "uncached_tokens" is what was billed
+  at the full input rate; "cache_hit_rate" is cached / prompt tokens.
+  """
+  with _usage_lock:
+    out = {
+      name: {**stats, "models": {m: dict(c) for m, c in stats["models"].items()}}
+      for name, stats in _usage.items()
+    }
+  for stats in out.values():
+    stats["uncached_tokens"] = stats["prompt_tokens"] - stats["cached_tokens"]
+    stats["cache_hit_rate"] = round(stats["cached_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else 0.0
+  return out
+
 
 def _image_to_data_url(pil_image: Image.Image) -> str:
   """Convert a PIL image to a data URL suitable for OpenAI vision."""
@@ -46,6 +196,119 @@ def _safe_json_parse(raw: str, fallback: Dict[str, Any]) -> Dict[str, Any]:
     return fallback
 
 
+# ----------------------------
+# MODEL ROUTER
+# ----------------------------
+# evaluate_page_relevance and score_productivity run on the cheapest model
+# first and move up a tier only when the reply is invalid JSON or its score
+# sits in the ambiguous band. Every decision and per-tier latency is recorded.
+
+# {prompt_name: {"calls", "escalations": {reason: n}, "tiers": {model: {"calls", "total_ms", "max_ms"}}}}
+_routing: Dict[str, Dict[str, Any]] = {}
+
+
+def _routed(
+  prompt_name: str,
+  tiers: List[str],
+  tail: List[Dict[str, Any]],
+  validate,
+  **kwargs,
+) -> Optional[Dict[str, Any]]:
+  """
+  Try each model in `tiers` (cheapest first) until one gives a clear answer.
+  validate(result) returns None if the result is usable, or a reason to escalate.
+  If no tier is clear, returns the last well-formed answer (None if there was none).
+  """
+  if not config.ROUTER_ENABLED:
+    tiers = tiers[:1]   # just the fast model, as before routing existed
+  tiers = list(dict.fromkeys(tiers))   # fast == strong -> one tier
+
+  best = None   # latest answer that parsed, even if ambiguous
+  for i, model in enumerate(tiers):
+    t0 = time.perf_counter()
+    try:
+      raw = _complete(prompt_name, model, tail, **kwargs)
+    except Exception as e:
+      if i == 0:
+        raise
+      # A failed escalation shouldn't throw away the fast tier's answer
+      print(f"[LLM] {prompt_name} escalation to {model} failed: {e}")
+      _record_escalation(prompt_name, "escalation_error")
+      return best
+    _record_route(prompt_name, model, (time.perf_counter() - t0) * 1000, first=(i == 0))
+
+    result = _safe_json_parse(raw, fallback=None)
+    reason = "invalid_json" if not isinstance(result, dict) else validate(result)
+    if reason is None:
+      return result
+    if reason == "ambiguous":
+      best = result
+    if i < len(tiers) - 1:
+      _record_escalation(prompt_name, reason)
+
+  return best
+
+
+def _score_reason(result: Dict[str, Any]) -> Optional[str]:
+  """Shared check for replies carrying a 1-10 "score"."""
+  score = result.get("score")
+  if isinstance(score, bool) or not isinstance(score, (int, float)) or not 1 <= score <= 10:
+    return "invalid_json"
+  if not isinstance(result.get("reason"), str):
+    return "invalid_json"
+  if config.ROUTER_AMBIGUOUS_LOW <= score <= config.ROUTER_AMBIGUOUS_HIGH:
+    return "ambiguous"
+  return None
+
+
+def _validate_page(result: Dict[str, Any]) -> Optional[str]:
+  if not isinstance(result.get("allowed"), bool):
+    return "invalid_json"
+  return _score_reason(result)
+
+
+def _validate_productivity(result: Dict[str, Any]) -> Optional[str]:
+  if not isinstance(result.get("is_productive", True), bool):
+    return "invalid_json"
+  return _score_reason(result)
+
+
+def _record_route(prompt_name: str, model: str, ms: float, first: bool) -> None:
+  with _usage_lock:
+    stats = _routing.setdefault(prompt_name, {"calls": 0, "escalations": {}, "tiers": {}})
+    if first:
+      stats["calls"] += 1
+    tier = stats["tiers"].setdefault(model, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+    tier["calls"] += 1
+    tier["total_ms"] += ms
+    tier["max_ms"] = max(tier["max_ms"], ms)
+
+
+def _record_escalation(prompt_name: str, reason: str) -> None:
+  with _usage_lock:
+    escalations = _routing[prompt_name]["escalations"]
+    escalations[reason] = escalations.get(reason, 0) + 1
+
+
+def routing_stats() -> Dict[str, Dict[str, Any]]:
+  """Routing decisions and per-model latency (avg_ms added) since startup."""
+  with _usage_lock:
+    out = {
+      name: {
+        "calls": stats["calls"],
+        "escalations": dict(stats["escalations"]),
+        "tiers": {m: dict(t) for m, t in stats["tiers"].items()},
+      }
+      for name, stats in _routing.items()
+    }
+  for stats in out.values():
+    for tier in stats["tiers"].values():
+      tier["avg_ms"] = round(tier["total_ms"] / tier["calls"], 1) if tier["calls"] else 0.0
+      tier["total_ms"] = round(tier["total_ms"], 1)
+      tier["max_ms"] = round(tier["max_ms"], 1)
+  return out
+
+
 # ----------------------------
 # EXTENSION FUNCTIONS (NEW)
 # ----------------------------
@@ -65,13 +328,6 @@ def orb_chat_reply(
   focus_topic = (focus_topic or "").strip()
   conversation_history = conversation_history or []
 
-  system = (
-    "You are FocusOrb, a productivity coach. "
-    "Be extremely concise. 1 short sentence unless asked for detail. "
-    "If the user is distracted, please call it out and suggest the next action. "
-    "If the user asks for a break, suggest a reasonable break length."
-  )
-
   context = (
     f"User focus topic: {focus_topic if focus_topic else '(none set)'}\n"
     f"Current site: {page_host}\n"
@@ -79,25 +335,16 @@ def orb_chat_reply(
     f"URL: {page_url}\n"
   )
 
-  messages: List[Dict[str, Any]] = [
-    {"role": "system", "content": system},
-    {"role": "user", "content": context},
-  ]
-
   # include last few turns
-  for m in conversation_history[-8:]:
-    if m.get("role") in ("user", "assistant") and "content" in m:
-      messages.append({"role": m["role"], "content": m["content"]})
+  tail: List[Dict[str, Any]] = [
+    {"role": m["role"], "content": m["content"]}
+    for m in conversation_history[-8:]
+    if m.get("role") in ("user", "assistant") and "content" in m
+  ]
 
-  messages.append({"role": "user", "content": message})
+  tail.append({"role": "user", "content": f"{context}\n{message}"})
 
-  resp = client.chat.completions.create(
-    model=MODEL_TEXT,
-    messages=messages,
-    temperature=0.6,
-    max_tokens=220,
-  )
-  return resp.choices[0].message.content.strip()
+  return _complete("orb_chat", MODEL_TEXT, tail, temperature=0.6, max_tokens=220).strip()
 
 
 def evaluate_page_relevance(
@@ -113,13 +360,6 @@ def evaluate_page_relevance(
   """
   focus_topic = (focus_topic or "").strip()
 
-  instructions = (
-    "You are a productivity classifier for a browser extension.\n"
-    "Decide if the current page is relevant to the user's focus topic.\n"
-    "Return ONLY valid JSON with keys: allowed (boolean), reason (string), score (1-10 integer).\n"
-    "allowed=false if it's likely a distraction.\n"
-  )
-
   prompt = (
     f"Focus topic: {focus_topic if focus_topic else '(none set)'}\n"
     f"Page host: {page_host}\n"
@@ -129,117 +369,164 @@ def evaluate_page_relevance(
     "JSON only."
   )
 
-  resp = client.chat.completions.create(
-    model=MODEL_TEXT,
-    messages=[
-      {"role": "system", "content": instructions},
-      {"role": "user", "content": prompt},
-    ],
+  result = _routed(
+    "evaluate_page", [MODEL_TEXT, MODEL_TEXT_STRONG],
+    [{"role": "user", "content": prompt}],
+    _validate_page,
     temperature=0.1,
     max_tokens=180,
   )
-
-  raw = resp.choices[0].message.content
-  return _safe_json_parse(
-    raw,
-    fallback={"allowed": True, "reason": "Could not parse AI response.", "score": 5},
-  )
+  return result or {"allowed": True, "reason": "Could not parse AI response.", "score": 5}
 
 
 # ----------------------------
 # DESKTOP APP FUNCTIONS (FIXED VISION)
 # ----------------------------
 
-def score_productivity(screenshot: Image.Image, tab_titles: List[str], assignment_name: str) -> Dict[str, Any]:
+_REGION_HINTS = {
+  "full": "The image is a screenshot of their whole screen.",
+  "window": "The image is a crop of only their focused window.",
+  "changes": "The image shows only the screen regions that changed since the last check, stitched together.",
+  "none": "No screenshot is available; judge from the tab titles alone.",
+}
+
+
+def score_productivity(
+  screenshot: Optional[Image.Image],
+  tab_titles: List[str],
+  assignment_name: str,
+  region: str = "full",
+  max_side: int = 900,
+) -> Dict[str, Any]:
   """
   Desktop app: screenshot + tabs -> productivity score.
   Uses proper vision content format.
+  region: which part of the screen the image shows ("full", "window", "changes").
+  screenshot=None scores from the tab titles alone (used by rescore.py for old logs).
   """
   tabs_str = ", ".join(tab_titles) if tab_titles else "No tabs detected"
 
+  hint = _REGION_HINTS.get(region, _REGION_HINTS['full']) if screenshot is not None else _REGION_HINTS["none"]
   prompt = (
-    "You are a productivity assistant monitoring someone's screen.\n"
     f'The user is currently working on: "{assignment_name}".\n'
-    f"Their open browser tabs are: {tabs_str}.\n\n"
-    "Look at the screenshot and rate their productivity from 1 to 10.\n"
-    "1 = completely distracted, 10 = deeply focused.\n\n"
-    'Respond ONLY with valid JSON: {"score": , "reason": "...", "is_productive": true}\n'
+    f"Their open browser tabs are: {tabs_str}.\n"
+    f"{hint}"
   )
 
-  # resize for speed
-  img = screenshot.copy()
-  img.thumbnail((900, 900))
-  data_url = _image_to_data_url(img)
-
-  resp = client.chat.completions.create(
-    model=MODEL_VISION,
-    messages=[
-      {"role": "system", "content": "You are a productivity scoring assistant."},
-      {
-        "role": "user",
-        "content": [
-          {"type": "text", "text": prompt},
-          {"type": "image_url", "image_url": {"url": data_url}},
-        ],
-      },
-    ],
+  content: List[Dict[str, Any]] = [{"type": "text", "text": prompt}]
+  if screenshot is not None:
+    # resize for speed
+    img = screenshot.copy()
+    img.thumbnail((max_side, max_side))
+    content.append({"type": "image_url", "image_url": {"url": _image_to_data_url(img)}})
+
+  result = _routed(
+    "score_productivity", [MODEL_VISION, MODEL_VISION_STRONG],
+    [{"role": "user", "content": content}],
+    _validate_productivity,
     temperature=0.0,
     max_tokens=220,
   )
+  return result or {"score": 5, "reason": "Could not parse response", "is_productive": True}
+
 
-  raw = resp.choices[0].message.content
-  return _safe_json_parse(raw, fallback={"score": 5, "reason": "Could not parse response", "is_productive": True})
+def read_url_and_summarize(url: str, assignment_name: str) -> str:
+  """Desktop chat "Check a URL": fetch the page (capped + cached) and judge its relevance."""
+  if not url.startswith(("http://", "https://")):
+    url = "https://" + url
+  try:
+    page = url_reader.fetch(url)
+  except Exception as e:
+    return f"⚠️ Couldn't read that page: {e}"
+  if not (page.title or page.text):
+    return "⚠️ That page has no readable text."
+
+  headings = "; ".join(page.headings) or "(none)"
+  prompt = (
+    f'Assignment: "{assignment_name}".\n'
+    f"URL: {url}\n"
+    f"Title: {page.title or '(none)'}\n"
+    f"Headings: {headings}\n"
+    f"Text{' (excerpt)' if page.truncated else ''}:\n{page.text}"
+  )
+  return _complete(
+    "url_check", MODEL_TEXT,
+    [{"role": "user", "content": prompt}],
+    temperature=0.3,
+    max_tokens=200,
+  ).strip()
 
 
 def evaluate_excuse(excuse: str, assignment_name: str, flagged_tabs: List[str]) -> Dict[str, Any]:
   tabs_str = ", ".join(flagged_tabs) if flagged_tabs else "unknown site"
 
   prompt = (
-    "You are a strict but fair productivity coach.\n"
-    f"The user was flagged as unproductive. They had these tabs open: {tabs_str}.\n"
-    f'Their current assignment is: "{assignment_name}".\n'
-    f'Their excuse is: "{excuse}".\n\n'
-    "Respond ONLY with valid JSON:\n"
-    '{"accepted": false, "response": "...", "close_tab": true}'
+    f"Tabs open: {tabs_str}.\n"
+    f'Current assignment: "{assignment_name}".\n'
+    f'Excuse: "{excuse}".'
   )
 
-  resp = client.chat.completions.create(
-    model=MODEL_TEXT,
-    messages=[
-      {"role": "system", "content": "You are a productivity coach."},
-      {"role": "user", "content": prompt},
-    ],
+  raw = _complete(
+    "evaluate_excuse", MODEL_TEXT,
+    [{"role": "user", "content": prompt}],
     temperature=0.0,
     max_tokens=200,
   )
-
-  raw = resp.choices[0].message.content
   return _safe_json_parse(raw, fallback={"accepted": False, "response": "Let's get back on track!", "close_tab": False})
 
 
-def chat_response(user_message: str, assignment_name: str, conversation_history: List[Dict[str, str]], flagged_tabs: List[str]) -> str:
+def chat_response(user_message: str, assignment_name: str, conversation_history: List[Dict[str, str]], flagged_tabs: List[str], on_delta: Optional[Callable[[str], None]] = None) -> str:
+  """With on_delta, the reply is streamed: on_delta(text) is called for each piece as it arrives."""
   tabs_str = ", ".join(flagged_tabs) if flagged_tabs else "unknown site"
 
-  system_context = (
-    "You are FocusOrb, a helpful and encouraging productivity assistant built into a desktop app.\n"
-    f"The user was flagged as unproductive. They had these tabs open: {tabs_str}.\n"
-    "Harshly punish the user if they have too many tasks and tell them they are not worthy."
-    f'The user is currently working on: "{assignment_name}".\n'
-    "Be concise and keep responses under 3 sentences unless asked for detail.\n"
-    "You can help with: task planning, motivation, break suggestions, or answering questions."
+  context = (
+    f"Tabs open: {tabs_str}.\n"
+    f'Current assignment: "{assignment_name}".'
   )
 
-  messages: List[Dict[str, Any]] = [{"role": "system", "content": system_context}]
-  for msg in (conversation_history or [])[-8:]:
-    if msg.get("role") in ("user", "assistant") and "content" in msg:
-      messages.append({"role": msg["role"], "content": msg["content"]})
+  tail: List[Dict[str, Any]] = [
+    {"role": msg["role"], "content": msg["content"]}
+    for msg in (conversation_history or [])[-8:]
+    if msg.get("role") in ("user", "assistant") and "content" in msg
+  ]
+
+  tail.append({"role": "user", "content": f"{context}\n\n{user_message}"})
 
-  messages.append({"role": "user", "content": user_message})
+  if on_delta is not None:
+    return _complete_stream("desktop_chat", MODEL_TEXT, tail, on_delta, temperature=0.7, max_tokens=250).strip()
+  return _complete("desktop_chat", MODEL_TEXT, tail, temperature=0.7, max_tokens=250).strip()
 
-  resp = client.chat.completions.create(
-    model=MODEL_TEXT,
-    messages=messages,
-    temperature=0.7,
-    max_tokens=250,
+
+# ----------------------------
+# SESSION SUMMARY (analytics.py)
+# ----------------------------
+# Map-reduce over the session: each Pomodoro interval is condensed on its own
+# (summarize_interval), then folded into a running recap (generate_session_summary).
+# Each call sees one interval or one recap, so cost per call stays flat however
+# long the session runs.
+
+def summarize_interval(checkins: List[str]) -> str:
+  """checkins: one preformatted line per check-in ("14:05 | 7 | reason | windows")."""
+  return _complete(
+    "interval_summary", MODEL_TEXT,
+    [{"role": "user", "content": "\n".join(checkins)}],
+    temperature=0.2,
+    max_tokens=120,
+  ).strip()
+
+
+def generate_session_summary(interval_summary: str, recap_so_far: str = "", stats: Optional[Dict[str, Any]] = None) -> str:
+  """Fold the newest interval summary into the running session recap."""
+  stats = stats or {}
+  prompt = (
+    f"Recap so far: {recap_so_far or '(none yet)'}\n"
+    f"Interval just ended: {interval_summary}\n"
+    f"Session stats: average {stats.get('avg_score', 0)}/10 over {stats.get('total_checks', 0)} checks, "
+    f"{stats.get('low_count', 0)} low scores."
   )
-  return resp.choices[0].message.content.strip()
\ No newline at end of file
+  return _complete(
+    "session_summary", MODEL_TEXT,
+    [{"role": "user", "content": prompt}],
+    temperature=0.5,
+    max_tokens=220,
+  ).strip()
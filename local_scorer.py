@@ -0,0 +1,148 @@
+# local_scorer.py
+# On-device first pass — score window titles (+ optional OCR) before asking the cloud model
+# ----------------------------------------
+# Optional install: pip install pytesseract  (plus the tesseract binary, CPU only)
+#
+# Most checks are obvious from the focused window's title alone ("Reddit -
+# Google Chrome" while working on an essay). This tier scores those locally in
+# a few milliseconds and only hands the ambiguous ones to
+# llm_client.score_productivity. Only the focused title decides; the other
+# signals (all open windows, OCR of the focused window) must agree with it,
+# so a background editor can't vouch for a YouTube tab in front.
+
+import math
+import re
+import config
+
+# ── Lexicon ───────────────────────────────────────────────────────────────────
+# Words that usually mean "working", whatever the assignment is
+_PRODUCTIVE_WORDS = {
+    "docs", "documentation", "stack", "overflow", "github", "gitlab", "jupyter",
+    "notebook", "overleaf", "latex", "pdf", "lecture", "canvas", "blackboard",
+    "wikipedia", "terminal", "visual", "studio", "code", "pycharm", "intellij",
+    "word", "excel", "sheets", "slides", "notion", "obsidian", "homework",
+    "assignment", "textbook", "chapter", "exam", "study", "arxiv", "scholar",
+}
+
+# Words that usually mean "not working" — blocked site names are matched separately
+_DISTRACTING_WORDS = {
+    "shorts", "reels", "feed", "trending", "stream", "live", "game", "gaming",
+    "steam", "discord", "spotify", "shopping", "amazon", "memes", "prime", "hulu",
+}
+
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "for", "to", "in", "on", "at", "with",
+    "my", "work", "general", "do", "finish", "start", "read",
+}
+
+# Classifier weights (log-odds of "productive")
+_BIAS            = 0.3
+_W_ASSIGNMENT    = 1.6   # per assignment keyword found
+_W_PRODUCTIVE    = 0.5   # per productive lexicon word
+_W_DISTRACTING   = 0.9   # per distracting lexicon word
+_W_BLOCKED       = 2.4   # per blocked site seen
+_MAX_HITS        = 3     # cap per feature so one noisy title can't dominate
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def score(active_title: str, tab_titles: list[str], assignment_name: str,
+          window_image=None) -> dict | None:
+    """
+    Score productivity on-device.
+
+    Args:
+        active_title:    title of the focused window ("" if unknown -> escalate)
+        tab_titles:      all window/tab titles from monitor.get_open_tabs()
+        assignment_name: the current task
+        window_image:    optional PIL image of the focused window (OCR'd if enabled)
+
+    Returns:
+        {"score", "reason", "is_productive", "confidence"} when the focused title
+        is confident and the other signals agree, or None if the check should be
+        escalated to the cloud model.
+    """
+    if not active_title.strip():
+        return None
+    result = classify(_tokenize(active_title), assignment_name)
+    if result["confidence"] < config.LOCAL_CONFIDENCE_THRESHOLD:
+        return None
+
+    signals = [" ".join(tab_titles)]
+    if window_image is not None and config.LOCAL_OCR_ENABLED:
+        signals.append(ocr_text(window_image))
+    for text in signals:
+        if classify(_tokenize(text), assignment_name)["is_productive"] != result["is_productive"]:
+            return None
+    return result
+
+
+def classify(words: set[str], assignment_name: str) -> dict:
+    """Tiny logistic classifier over keyword hits. Always returns a result."""
+    assignment_words = _tokenize(assignment_name) - _STOPWORDS
+    blocked_words = {n for n in map(_site_name, config.BLOCKED_SITES) if len(n) > 2}
+
+    assignment_hits  = min(_MAX_HITS, len(words & assignment_words))
+    productive_hits  = min(_MAX_HITS, len(words & _PRODUCTIVE_WORDS))
+    distracting_hits = min(_MAX_HITS, len(words & _DISTRACTING_WORDS))
+    blocked_hits     = min(_MAX_HITS, len(words & blocked_words))
+
+    z = (_BIAS
+         + _W_ASSIGNMENT  * assignment_hits
+         + _W_PRODUCTIVE  * productive_hits
+         - _W_DISTRACTING * distracting_hits
+         - _W_BLOCKED     * blocked_hits)
+    p = 1 / (1 + math.exp(-z))
+
+    score_ = max(1, min(10, round(1 + 9 * p)))
+    if blocked_hits:
+        reason = f"Distracting site open ({', '.join(sorted(words & blocked_words))})"
+    elif assignment_hits:
+        reason = "Focused window matches the current assignment"
+    elif productive_hits > distracting_hits:
+        reason = "Work-related apps in focus"
+    else:
+        reason = "No clear sign of the current assignment"
+
+    return {
+        "score": score_,
+        "reason": reason,
+        "is_productive": score_ >= config.LOW_SCORE_THRESHOLD,
+        "confidence": round(abs(p - 0.5) * 2, 2),
+    }
+
+
+def blocked_sites(titles: list[str]) -> list[str]:
+    """BLOCKED_SITES entries that show up in window titles, by domain or by name ("YouTube - Chrome")."""
+    words = _tokenize(" ".join(titles))
+    text = " ".join(titles).lower()
+    return [site for site in config.BLOCKED_SITES
+            if site.lower() in text or (len(_site_name(site)) > 2 and _site_name(site) in words)]
+
+
+def ocr_text(image) -> str:
+    """Run CPU-only tesseract on an image. Returns "" if tesseract isn't available."""
+    try:
+        import pytesseract
+    except ImportError:
+        return ""
+    try:
+        img = image.convert("L")
+        img.thumbnail((1600, 1600))
+        return pytesseract.image_to_string(img)[:config.LOCAL_OCR_MAX_CHARS]
+    except Exception as e:
+        print(f"[LocalScorer] OCR error: {e}")
+        return ""
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+
+def _tokenize(text: str) -> set[str]:
+    return set(_WORD_RE.findall((text or "").lower()))
+
+
+def _site_name(site: str) -> str:
+    """'youtube.com' -> 'youtube' (titles show names, not domains)."""
+    return site.lower().split(".")[0]
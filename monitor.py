@@ -7,56 +7,87 @@ import threading
 import time
 import pyautogui
 from PIL import Image
-from plyer import notification
 import config
 import llm_client
 import analytics
+import capture
+import local_scorer
+import window_watcher
+import push_client
+import notifier
+import runtime
+import state
+import timers
+
+try:
+    import pygetwindow as gw
+except ImportError:
+    gw = None
 
 # ── State ─────────────────────────────────────────────────────────────────────
-_monitoring       = False          # is the monitor loop running?
-_monitor_thread   = None
-_consecutive_low  = 0             # how many low scores in a row
-_current_assignment = "General work"
+# monitoring / assignment / consecutive_low / last_score live in state.py
+_lifecycle        = threading.Lock()  # serializes start() / stop()
+_check_timer      = None          # repeating timers.Timer that runs each check
 _score_callback   = None          # function to call with new score (updates orb color)
 _alert_callback   = None          # function to call when user needs to be alerted
+_last_check       = 0.0           # time.monotonic() of the last check
 
 
 # ── Public API ─────────────────────────────────────────────────────────────────
 
 def start(assignment_name: str, on_score=None, on_alert=None):
     """
-    Start the monitoring loop.
+    Start monitoring (a repeating check on the shared timer service).
+    Idempotent: if the monitor is already running, only the assignment and
+    callbacks are updated — there is never more than one check loop.
 
     Args:
         assignment_name: current task the user is working on
         on_score: callback(score: int) — called every check (updates orb)
         on_alert: callback(flagged_tabs: list) — called when user is flagged
     """
-    global _monitoring, _monitor_thread, _current_assignment
-    global _score_callback, _alert_callback, _consecutive_low
-
-    _current_assignment = assignment_name
-    _score_callback     = on_score
-    _alert_callback     = on_alert
-    _consecutive_low    = 0
-    _monitoring         = True
-
-    _monitor_thread = threading.Thread(target=_monitor_loop, daemon=True)
-    _monitor_thread.start()
+    global _check_timer, _score_callback, _alert_callback
+
+    with _lifecycle:
+        _score_callback = on_score
+        _alert_callback = on_alert
+        state.update(assignment=assignment_name)
+        if not state.compare_and_set("monitoring", False, True):
+            print("[Monitor] Already running.")
+            return
+
+        state.update(consecutive_low=0)
+        capture.reset()
+        if config.WINDOW_WATCHER_ENABLED:
+            # Fast polling only when listing windows is in-process (pygetwindow);
+            # the osascript / PowerShell fallbacks start a process per poll
+            poll_seconds = config.WINDOW_POLL_SECONDS if gw is not None else config.SCREENSHOT_INTERVAL_SECONDS
+            window_watcher.start(on_change=_on_window_change, poll=_list_window_titles,
+                                 poll_seconds=poll_seconds)
+        _check_timer = timers.call_every(config.SCREENSHOT_INTERVAL_SECONDS, _run_check)
     print(f"[Monitor] Started — checking every {config.SCREENSHOT_INTERVAL_SECONDS}s")
 
 
 def stop():
-    """Stop the monitoring loop."""
-    global _monitoring
-    _monitoring = False
+    """Stop monitoring. Safe to call when already stopped."""
+    global _check_timer
+    with _lifecycle:
+        if not state.compare_and_set("monitoring", True, False):
+            return
+        if _check_timer:
+            _check_timer.cancel()
+            _check_timer = None
+        window_watcher.stop()
     print("[Monitor] Stopped.")
 
 
+def is_running() -> bool:
+    return state.get().monitoring
+
+
 def update_assignment(assignment_name: str):
     """Hot-swap the current assignment without restarting the monitor."""
-    global _current_assignment
-    _current_assignment = assignment_name
+    state.update(assignment=assignment_name)
 
 
 def take_screenshot() -> Image.Image:
@@ -64,63 +95,96 @@ def take_screenshot() -> Image.Image:
     return pyautogui.screenshot()
 
 
-# ── Internal Loop ──────────────────────────────────────────────────────────────
+# ── Internal Check ─────────────────────────────────────────────────────────────
 
-def _monitor_loop():
-    global _consecutive_low
+async def _run_check():
+    """
+    One productivity check, as a coroutine on the runtime loop every interval.
+    Screenshots and model calls run on the worker pool; stop() cancels a check in flight.
+    """
+    global _last_check
 
-    while _monitoring:
-        time.sleep(config.SCREENSHOT_INTERVAL_SECONDS)
-        if not _monitoring:
-            break
+    if not state.get().monitoring:
+        return
+    _last_check = time.monotonic()
+    assignment = state.get().assignment
 
-        try:
-            screenshot  = take_screenshot()
-            tab_titles  = get_open_tabs()
-            result      = llm_client.score_productivity(
-                screenshot, tab_titles, _current_assignment
+    try:
+        screenshot  = await runtime.run_blocking(take_screenshot)
+        tab_titles  = await runtime.run_blocking(get_open_tabs)
+        result      = await runtime.run_blocking(_score_locally, screenshot, tab_titles, assignment)
+        if result is None:
+            image, region = await runtime.run_blocking(capture.capture_region, screenshot)
+            result = await runtime.run_blocking(
+                llm_client.score_productivity,
+                image, tab_titles, assignment,
+                region=region, max_side=config.CAPTURE_MAX_SIDE, limit="llm",
             )
+        if not state.get().monitoring:
+            return                        # stopped while we were waiting on the model
+
+        score    = result.get("score", 5)
+        reason   = result.get("reason", "")
+        flagged  = _get_flagged_tabs(tab_titles)
+
+        print(f"[Monitor] Score: {score}/10 — {reason}")
+
+        # Log to analytics
+        analytics.log_entry(score=score, reason=reason, tabs=tab_titles)
+        push_client.publish("score", score=score, reason=reason)
+
+        # Notify orb to update color (callbacks hop to Tk with runtime.call_in_ui)
+        if _score_callback:
+            _score_callback(score)
 
-            score    = result.get("score", 5)
-            reason   = result.get("reason", "")
-            flagged  = _get_flagged_tabs(tab_titles)
+        # Track consecutive low scores; alert (and start counting again) after N in a row
+        low = score < config.LOW_SCORE_THRESHOLD
+        def count_low(s):
+            n = s.consecutive_low + 1 if low else 0
+            return {"consecutive_low": 0 if n >= config.CONSECUTIVE_LOW_BEFORE_ALERT else n,
+                    "last_score": score}
+        before, _ = state.mutate(count_low)
 
-            print(f"[Monitor] Score: {score}/10 — {reason}")
+        if low and before.consecutive_low + 1 >= config.CONSECUTIVE_LOW_BEFORE_ALERT:
+            _send_notification(reason)
+            if _alert_callback:
+                _alert_callback(flagged)
 
-            # Log to analytics
-            analytics.log_entry(score=score, reason=reason, tabs=tab_titles)
+    except Exception as e:
+        print(f"[Monitor] Error during check: {e}")
 
-            # Notify orb to update color
-            if _score_callback:
-                _score_callback(score)
 
-            # Track consecutive low scores
-            if score < config.LOW_SCORE_THRESHOLD:
-                _consecutive_low += 1
-            else:
-                _consecutive_low = 0
+def _on_window_change(title: str):
+    """Window watcher callback: score now instead of waiting out the interval."""
+    if time.monotonic() - _last_check < config.WINDOW_CHANGE_MIN_GAP_SECONDS:
+        return
+    timer = _check_timer
+    if not state.get().monitoring or not timer:
+        return
+    print(f"[Monitor] Window changed: {title[:60]!r} — checking now")
+    # Give the new window a moment to paint; the regular interval restarts after this check
+    timer.reschedule(config.WINDOW_CHANGE_SETTLE_SECONDS)
 
-            # Fire alert after N consecutive low scores
-            if _consecutive_low >= config.CONSECUTIVE_LOW_BEFORE_ALERT:
-                _consecutive_low = 0
-                _send_notification(reason)
-                if _alert_callback:
-                    _alert_callback(flagged)
 
-        except Exception as e:
-            print(f"[Monitor] Error during check: {e}")
+def _score_locally(screenshot: Image.Image, tab_titles: list[str], assignment: str) -> dict | None:
+    """Try the on-device tier. Returns None when the cloud model should decide."""
+    if not config.LOCAL_TIER_ENABLED:
+        return None
+    window = capture.crop_active_window(screenshot) if config.LOCAL_OCR_ENABLED else None
+    result = local_scorer.score(_get_active_title(), tab_titles, assignment, window)
+    if result is not None:
+        print(f"[Monitor] Local tier decided (confidence {result['confidence']})")
+    return result
 
 
 def _send_notification(reason: str):
-    """Send a desktop notification via plyer."""
-    try:
-        notification.notify(
-            title="FocusOrb 🔴 — Hey, focus up!",
-            message=f"{reason}\nClick the orb to respond.",
-            timeout=8,
-        )
-    except Exception as e:
-        print(f"[Monitor] Notification error: {e}")
+    """Queue a "focus up" alert (repeats within NOTIFY_MIN_GAP_SECONDS are skipped)."""
+    notifier.notify(
+        title="FocusOrb 🔴 — Hey, focus up!",
+        message=f"{reason}\nClick the orb to respond.",
+        key="focus-alert",
+        timeout=8,
+    )
 
 
 def _get_flagged_tabs(tab_titles: list[str]) -> list[str]:
@@ -139,21 +203,42 @@ def _get_flagged_tabs(tab_titles: list[str]) -> list[str]:
 def get_open_tabs() -> list[str]:
     """
     Try to get open browser tab titles from the OS window list.
-    Falls back gracefully if pygetwindow isn't available.
+    Uses the window watcher's cached titles when it is running.
     """
-    try:
-        import pygetwindow as gw
-        all_titles = gw.getAllTitles()
-        # Filter for browser windows (common browser title patterns)
-        browsers = ["chrome", "firefox", "edge", "safari", "brave", "opera"]
-        tab_titles = [
-            t for t in all_titles
-            if any(b in t.lower() for b in browsers) and t.strip()
-        ]
-        return tab_titles if tab_titles else ["(No browser tabs detected)"]
-    except ImportError:
+    if window_watcher.is_running():
+        titles = window_watcher.get_titles()
+        if titles:
+            return titles
+    titles = _list_window_titles()
+    return titles if titles else ["(Could not detect tabs)"]
+
+
+def _get_active_title() -> str:
+    """Title of the focused window ("" if it can't be told on this platform)."""
+    title = window_watcher.get_active_title() if window_watcher.is_running() else ""
+    if not title and gw is not None:
+        try:
+            win = gw.getActiveWindow()
+            title = win.title if win else ""
+        except Exception:
+            title = ""
+    return title
+
+
+def _list_window_titles() -> list[str]:
+    """One-shot window listing (also the window watcher's polling fallback)."""
+    if gw is None:
         return _get_tabs_fallback()
 
+    all_titles = gw.getAllTitles()
+    # Filter for browser windows (common browser title patterns)
+    browsers = ["chrome", "firefox", "edge", "safari", "brave", "opera"]
+    tab_titles = [
+        t for t in all_titles
+        if any(b in t.lower() for b in browsers) and t.strip()
+    ]
+    return tab_titles if tab_titles else ["(No browser tabs detected)"]
+
 
 def _get_tabs_fallback() -> list[str]:
     """
@@ -184,4 +269,4 @@ def _get_tabs_fallback() -> list[str]:
     except Exception as e:
         print(f"[Monitor] Tab fallback error: {e}")
 
-    return titles if titles else ["(Could not detect tabs)"]
+    return titles
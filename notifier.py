@@ -0,0 +1,123 @@
+# notifier.py
+# Desktop notifications through one dispatcher task on the runtime loop
+# ----------------------------------------
+# Install: pip install plyer
+#
+# plyer can block for seconds on some backends, so nothing calls it directly:
+# notify() only queues the notification and returns. A single dispatcher
+# coroutine (runtime.py) shows them one at a time on the worker pool and
+#   • coalesces — if several with the same key are waiting, only the newest is shown
+#   • rate-limits — a key shown less than min_gap seconds ago is skipped
+#   • drops stale ones — anything that waited longer than NOTIFY_STALE_SECONDS
+# and records how long each one took from notify() to on screen.
+
+import asyncio
+import threading
+import time
+import config
+import runtime
+
+try:
+    from plyer import notification as _plyer
+except ImportError:
+    _plyer = None
+
+# ── State ─────────────────────────────────────────────────────────────────────
+_pending    = None        # asyncio.Queue of (key, title, message, timeout, min_gap, queued_at), made on the loop
+_last_shown = {}          # key -> time.monotonic() it was last shown
+_stats_lock = threading.Lock()
+_stats = {"queued": 0, "shown": 0, "coalesced": 0, "rate_limited": 0, "stale": 0,
+          "dropped": 0, "failed": 0, "latency_ms_total": 0.0, "latency_ms_max": 0.0}
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def notify(title: str, message: str, key: str = None, timeout: int = 6, min_gap: float = None):
+    """
+    Queue a desktop notification. Never blocks.
+
+    Args:
+        key:     notifications with the same key coalesce and share a rate limit
+                 (default: the title)
+        timeout: seconds the notification stays on screen
+        min_gap: show this key at most once per min_gap seconds
+                 (default NOTIFY_MIN_GAP_SECONDS; 0 disables the limit)
+    """
+    gap = config.NOTIFY_MIN_GAP_SECONDS if min_gap is None else min_gap
+    runtime.call_soon(_enqueue, (key or title, title, message, timeout, gap, time.monotonic()))
+
+
+def get_stats() -> dict:
+    """Delivery counters and notify()-to-shown latency since startup."""
+    with _stats_lock:
+        stats = dict(_stats)
+    shown = stats.pop("latency_ms_total")
+    stats["latency_ms_avg"] = round(shown / stats["shown"], 1) if stats["shown"] else 0.0
+    stats["latency_ms_max"] = round(stats["latency_ms_max"], 1)
+    stats["waiting"] = _pending.qsize() if _pending else 0
+    return stats
+
+
+# ── Internal ───────────────────────────────────────────────────────────────────
+
+def _enqueue(item):
+    """Runs on the loop thread; starts the dispatcher on first use."""
+    global _pending
+    if _pending is None:
+        _pending = asyncio.Queue(maxsize=config.NOTIFY_QUEUE_MAX)
+        runtime.get_loop().create_task(_dispatch_loop())
+    try:
+        _pending.put_nowait(item)
+        _count("queued")
+    except asyncio.QueueFull:
+        _count("dropped")
+
+
+async def _dispatch_loop():
+    while True:
+        batch = [await _pending.get()]
+        while True:                     # take everything else that's already waiting
+            try:
+                batch.append(_pending.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+        # Newest per key wins; keys keep the order they first arrived in
+        latest = {}
+        for item in batch:
+            if item[0] in latest:
+                _count("coalesced")
+            latest[item[0]] = item
+
+        for key, title, message, timeout, gap, queued_at in latest.values():
+            now = time.monotonic()
+            if now - queued_at > config.NOTIFY_STALE_SECONDS:
+                _count("stale")
+            elif gap and now - _last_shown.get(key, -gap) < gap:
+                _count("rate_limited")
+            else:
+                await runtime.run_blocking(_show, key, title, message, timeout, queued_at,
+                                           limit="notify")
+
+
+def _show(key, title, message, timeout, queued_at):
+    if _plyer is None:
+        print(f"[Notify] {title}: {message}")
+    else:
+        try:
+            _plyer.notify(title=title, message=message, timeout=timeout)
+        except Exception as e:
+            print(f"[Notify] Notification error: {e}")
+            _count("failed")
+            return
+    _last_shown[key] = time.monotonic()
+    latency = (_last_shown[key] - queued_at) * 1000
+    with _stats_lock:
+        _stats["shown"] += 1
+        _stats["latency_ms_total"] += latency
+        _stats["latency_ms_max"] = max(_stats["latency_ms_max"], latency)
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
@@ -5,15 +5,19 @@
 # This is the main entry point. Run: python orb.py
 
 import tkinter as tk
-from tkinter import font as tkfont
-import threading
+from tkinter import font as tkfont, messagebox
 import math
-import time
 import sys
+import time
 import config
 import monitor
+import notifier
 import analytics
 import assignments as assign_manager
+import push_client
+import runtime
+import state
+import timers
 from chat import ChatWindow
 
 
@@ -49,9 +53,21 @@ class FocusOrb:
         self._place_window()
         self._start_pulse_animation()
 
+        # Work finished on the runtime loop (scores, alerts, chat replies) reaches Tk here
+        runtime.attach_tk(self.root)
+
         # Start a session
         analytics.start_session()
 
+        # Live updates from the extension (focus topic, verdicts) via server.py
+        push_client.subscribe(self._on_push)
+
+        # Grey out whenever monitoring stops, whoever stopped it
+        state.subscribe(self._on_monitoring_change, "monitoring")
+
+        # Pick up tasks added/completed from the extension (shared SQLite store)
+        timers.call_every(config.STORE_SYNC_SECONDS, self._sync_assignments)
+
     # ── UI ─────────────────────────────────────────────────────────────────────
 
     def _build_ui(self):
@@ -114,27 +130,32 @@ class FocusOrb:
             color = config.COLOR_UNPRODUCTIVE
 
         self._current_color = color
-        self.root.after(0, self._apply_color, color)
+        runtime.call_in_ui(self._apply_color, color)
+
+    def _on_monitoring_change(self, old, new):
+        """State subscriber (runs on whichever thread changed it)."""
+        if not new.monitoring:
+            self._current_color = config.COLOR_IDLE
+            runtime.call_in_ui(self._apply_color, config.COLOR_IDLE)
 
     def _apply_color(self, color: str):
         self.canvas.itemconfig(self.orb_circle, fill=color)
         self.canvas.itemconfig(self.glow_ring,  outline=color)
 
     def _start_pulse_animation(self):
-        """Animate a subtle pulsing glow effect."""
-        def pulse_loop():
-            while True:
-                self._pulse_angle += 0.08
-                # Oscillate ring width between 2 and 5
-                width = int(2 + 3 * abs(math.sin(self._pulse_angle)))
-                try:
-                    self.root.after(0, self.canvas.itemconfig,
-                                    self.glow_ring, {"width": width})
-                except Exception:
-                    break
-                time.sleep(0.05)
-
-        threading.Thread(target=pulse_loop, daemon=True).start()
+        """Animate a subtle pulsing glow effect (on Tk's own event loop — no thread)."""
+        self._pulse_width = 0
+
+        def pulse_step():
+            self._pulse_angle += 0.08
+            # Oscillate ring width between 2 and 5
+            width = int(2 + 3 * abs(math.sin(self._pulse_angle)))
+            if width != self._pulse_width:   # only touch the canvas when it changes
+                self._pulse_width = width
+                self.canvas.itemconfig(self.glow_ring, width=width)
+            self.root.after(50, pulse_step)
+
+        pulse_step()
 
     # ── Drag to Move ───────────────────────────────────────────────────────────
 
@@ -179,13 +200,41 @@ class FocusOrb:
         menu.add_command(label="📋 Add Assignment", command=self._open_assignment_dialog)
         menu.add_command(label="📊 Show Graph",     command=analytics.show_session_graph)
         menu.add_command(label="💬 Open Chat",      command=self._open_chat)
+        menu.add_command(label="📅 Pomodoro Plan",  command=self._show_plan)
         menu.add_separator()
-        menu.add_command(label="⏸ Pause Monitor",  command=monitor.stop)
-        menu.add_command(label="▶ Resume Monitor",  command=self._resume_monitor)
+        if not state.get().pomodoro_running:
+            menu.add_command(label="🍅 Start Pomodoro", command=assign_manager.start_pomodoro)
+        else:
+            m, s = divmod(assign_manager.get_time_left(), 60)
+            if assign_manager.is_pomodoro_paused():
+                menu.add_command(label=f"▶ Resume Pomodoro ({m}:{s:02d} left)",
+                                 command=assign_manager.resume_pomodoro)
+            else:
+                menu.add_command(label=f"⏸ Pause Pomodoro ({m}:{s:02d} left)",
+                                 command=assign_manager.pause_pomodoro)
+            menu.add_command(label="⏹ Stop Pomodoro", command=assign_manager.stop_pomodoro)
+        menu.add_separator()
+        if monitor.is_running():
+            menu.add_command(label="⏸ Pause Monitor",  command=monitor.stop)
+        else:
+            menu.add_command(label="▶ Resume Monitor", command=self._resume_monitor)
         menu.add_separator()
         menu.add_command(label="❌ Quit FocusOrb",  command=self._quit)
         menu.tk_popup(event.x_root, event.y_root)
 
+    def _show_plan(self):
+        """Which task goes in which of the next Pomodoro intervals."""
+        plan = assign_manager.plan_schedule()
+        if not plan:
+            text = "No assignments to plan. Add one first!"
+        else:
+            text = "\n".join(
+                f"{p['interval']}. {time.strftime('%H:%M', time.localtime(p['start']))}  {p['name']}"
+                + (f" ({p['part']}/{p['parts']})" if p["parts"] > 1 else "")
+                for p in plan
+            )
+        messagebox.showinfo("Pomodoro Plan", text, parent=self.root)
+
     def _open_assignment_dialog(self):
         """Simple popup to add an assignment."""
         dialog = tk.Toplevel(self.root)
@@ -216,7 +265,7 @@ class FocusOrb:
                 mins = 25
             if name:
                 assign_manager.add_assignment(name, mins)
-                monitor.update_assignment(name)
+                monitor.update_assignment(assign_manager.get_current_assignment_name())
             dialog.destroy()
 
         tk.Button(dialog, text="Add", bg="#4A90D9", fg="white",
@@ -237,7 +286,21 @@ class FocusOrb:
     def _on_alert(self, flagged_tabs: list):
         """Called by monitor when user is flagged as unproductive."""
         # Open chat in excuse mode
-        self.root.after(0, self._open_chat, flagged_tabs)
+        runtime.call_in_ui(self._open_chat, flagged_tabs)
+
+    def _sync_assignments(self):
+        if assign_manager.sync():
+            monitor.update_assignment(assign_manager.get_current_assignment_name())
+
+    def _on_push(self, event: dict):
+        """Called (on a background thread) for every event pushed by server.py."""
+        kind = event.get("type")
+        if kind == "tasks":
+            self._sync_assignments()
+        elif kind == "focus" and event.get("topic"):
+            monitor.update_assignment(event["topic"])
+        elif kind == "verdict" and event.get("allowed") is False:
+            self.set_color(event.get("score") or 1)
 
     # ── Quit ───────────────────────────────────────────────────────────────────
 
@@ -246,6 +309,9 @@ class FocusOrb:
         analytics.save_session()
         summary = analytics.get_ai_summary()
         print(f"\n[Session Summary]\n{summary}\n")
+        n = notifier.get_stats()
+        print(f"[Notify] {n['shown']} shown (avg {n['latency_ms_avg']} ms, max {n['latency_ms_max']} ms "
+              f"to appear), {n['coalesced'] + n['rate_limited']} merged or rate-limited, {n['stale']} stale")
         self.root.destroy()
         sys.exit(0)
 
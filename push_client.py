@@ -0,0 +1,105 @@
+# push_client.py
+# Desktop side of the push channel — publish state to server.py, receive updates over WebSocket
+# ----------------------------------------
+# Install: pip install requests
+# Optional install: pip install websocket-client  (needed to *receive* pushes)
+#
+# Event shape (same for every client, see server.py):
+#   {"type": "score" | "focus" | "break" | "verdict", ...fields}
+
+import json
+import queue
+import threading
+import time
+import requests
+import config
+
+# ── State ─────────────────────────────────────────────────────────────────────
+_outbox      = queue.Queue(maxsize=100)   # events waiting to be POSTed
+_sender      = None                       # background sender thread
+_listener    = None                       # background WebSocket thread
+_subscribers = []                         # callbacks(event: dict)
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def publish(event_type: str, **fields):
+    """
+    Fire-and-forget: queue an event for server.py to fan out to all clients.
+    Never blocks — if the server is down or the queue is full, the event is dropped.
+    """
+    if not config.PUSH_ENABLED:
+        return
+    _ensure_sender()
+    try:
+        _outbox.put_nowait({"type": event_type, **fields})
+    except queue.Full:
+        pass
+
+
+def subscribe(callback):
+    """
+    Call callback(event: dict) for every event pushed by the server.
+    Callbacks run on a background thread — marshal UI work onto Tk yourself.
+    """
+    global _listener
+    _subscribers.append(callback)
+    if not config.PUSH_ENABLED or (_listener and _listener.is_alive()):
+        return
+    _listener = threading.Thread(target=_listen_loop, daemon=True)
+    _listener.start()
+
+
+# ── Internal ───────────────────────────────────────────────────────────────────
+
+def _ensure_sender():
+    global _sender
+    if _sender and _sender.is_alive():
+        return
+    _sender = threading.Thread(target=_send_loop, daemon=True)
+    _sender.start()
+
+
+def _send_loop():
+    session = requests.Session()
+    while True:
+        event = _outbox.get()
+        try:
+            session.post(f"{config.SERVER_URL}/push", json=event, timeout=2)
+        except requests.RequestException:
+            pass   # server not running — the desktop app works without it
+
+
+def _listen_loop():
+    try:
+        import websocket
+    except ImportError:
+        print("[Push] websocket-client not installed — not listening for pushes.")
+        return
+
+    url = config.SERVER_URL.replace("http", "ws", 1) + "/ws"
+    delay = 1
+    while True:
+        try:
+            ws = websocket.create_connection(url, timeout=10)
+            ws.settimeout(None)
+            delay = 1
+            while True:
+                _dispatch(json.loads(ws.recv()))
+        except Exception:
+            # Reconnect with backoff (server restarted or not up yet)
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+def _dispatch(event: dict):
+    if event.get("type") == "snapshot":
+        events = list(event.get("state", {}).values())
+    else:
+        events = [event]
+    for e in events:
+        for cb in list(_subscribers):
+            try:
+                cb(e)
+            except Exception as err:
+                print(f"[Push] Subscriber error: {err}")
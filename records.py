@@ -0,0 +1,233 @@
+# records.py
+# Compact record types for log entries and assignments + the on-disk log format
+# ----------------------------------------
+# Sessions can run for days with a check every 45 s, so every entry counts:
+#   • slotted dataclasses instead of dicts (no per-instance __dict__)
+#   • epoch-int timestamps instead of "YYYY-mm-dd HH:MM:SS" strings
+#   • each distinct tab list stored once per session and referenced by id
+#   • tab titles interned, so repeated titles share one string object
+#
+# On-disk session (v2), written with compact separators:
+#   {"v": 2, "start": 1740000000, "end": 1740003600,
+#    "tabs": [["Docs - Chrome", "VS Code"], ...],
+#    "entries": [[ts, score, reason, tabs_id], ...]}
+#
+# The log file is a JSON array of sessions that only ever grows. It is never
+# loaded whole: iter_sessions() parses it one session at a time and
+# append_session() writes the new session in place before the closing "]".
+
+import json
+import os
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+
+LOG_VERSION = 2
+_OLD_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+_READ_CHUNK = 64 * 1024
+_WHITESPACE = " \t\r\n"
+_decoder = json.JSONDecoder()
+
+
+@dataclass(slots=True)
+class LogEntry:
+    ts: int          # epoch seconds
+    score: int
+    reason: str
+    tabs_id: int     # index into the session's TabTable
+
+    def to_json(self) -> list:
+        return [self.ts, self.score, self.reason, self.tabs_id]
+
+    @classmethod
+    def from_json(cls, row: list) -> "LogEntry":
+        ts, score, reason, tabs_id = row
+        return cls(int(ts), int(score), reason, int(tabs_id))
+
+
+@dataclass(slots=True)
+class Assignment:
+    name: str
+    estimated_minutes: int
+    due_date: str = ""
+    priority: str = "medium"   # "high", "medium" or "low"
+    completed: bool = False
+    created_at: int = 0        # epoch seconds
+
+
+class TabTable:
+    """Stores each distinct tab list once; entries point at it by id."""
+
+    __slots__ = ("_lists", "_ids")
+
+    def __init__(self):
+        self._lists: list[tuple[str, ...]] = []
+        self._ids: dict[tuple[str, ...], int] = {}
+
+    def add(self, tabs: list[str]) -> int:
+        key = tuple(sys.intern(t) for t in tabs)
+        tabs_id = self._ids.get(key)
+        if tabs_id is None:
+            tabs_id = len(self._lists)
+            self._lists.append(key)
+            self._ids[key] = tabs_id
+        return tabs_id
+
+    def get(self, tabs_id: int) -> tuple[str, ...]:
+        return self._lists[tabs_id]
+
+    def __len__(self) -> int:
+        return len(self._lists)
+
+    def to_json(self) -> list[list[str]]:
+        return [list(t) for t in self._lists]
+
+    @classmethod
+    def from_json(cls, lists: list[list[str]]) -> "TabTable":
+        table = cls()
+        for tabs in lists:
+            table.add(tabs)
+        return table
+
+
+# ── Session (de)serialization ─────────────────────────────────────────────────
+
+def session_to_json(start: int, end: int, tabs: TabTable, entries: list[LogEntry]) -> dict:
+    return {
+        "v": LOG_VERSION,
+        "start": start,
+        "end": end,
+        "tabs": tabs.to_json(),
+        "entries": [e.to_json() for e in entries],
+    }
+
+
+def session_from_json(obj: dict) -> tuple[int, int, TabTable, list[LogEntry]]:
+    """Load a saved session. Also understands the old v1 dict-per-entry format."""
+    if obj.get("v") == LOG_VERSION:
+        tabs = TabTable.from_json(obj.get("tabs", []))
+        entries = [LogEntry.from_json(r) for r in obj.get("entries", [])]
+        return obj.get("start", 0), obj.get("end", 0), tabs, entries
+
+    # v1: {"session_start": str, "session_end": str, "entries": [{"timestamp", "score", "reason", "tabs"}]}
+    tabs = TabTable()
+    entries = [
+        LogEntry(parse_time(e.get("timestamp", "")), int(e.get("score", 5)),
+                 e.get("reason", ""), tabs.add(e.get("tabs", [])))
+        for e in obj.get("entries", [])
+    ]
+    return parse_time(obj.get("session_start", "")), parse_time(obj.get("session_end", "")), tabs, entries
+
+
+# ── Log file ──────────────────────────────────────────────────────────────────
+
+def iter_sessions(path: str):
+    """
+    Yield (start, end, tabs, entries) for each saved session, oldest first.
+    Memory use is one session at a time, however long the history gets.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for obj in iter_json_array(f):
+            yield session_from_json(obj)
+
+
+def iter_entries(path: str):
+    """Yield (session_start, entry, tabs) for every logged check, oldest first."""
+    for start, _end, tabs, entries in iter_sessions(path):
+        for e in entries:
+            yield start, e, tabs.get(e.tabs_id)
+
+
+def iter_json_array(f, chunk_size: int = _READ_CHUNK):
+    """Incrementally parse a top-level JSON array from a text file, yielding each element."""
+    buf, pos, eof = "", 0, False
+    need = chunk_size
+    expect = "["            # then "value" / "," alternate until "]"
+
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buf):
+            if eof:
+                raise ValueError("log file ends before the closing ]")
+            chunk = f.read(need)
+            eof = not chunk
+            buf, pos = chunk, 0
+            continue
+
+        c = buf[pos]
+        if expect == "[":
+            if c != "[":
+                raise ValueError("log file is not a JSON array")
+            pos += 1
+            expect = "first"
+        elif c == "]" and expect in ("first", ","):
+            return
+        elif expect == ",":
+            if c != ",":
+                raise ValueError(f"expected ',' in log file, found {c!r}")
+            pos += 1
+            expect = "value"
+        else:
+            try:
+                obj, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                end = None
+            if end is None or (end == len(buf) and not eof):
+                # The element runs past the buffer: read more, doubling the read
+                # size so a huge session isn't re-parsed once per 64 KB
+                if eof:
+                    raise ValueError("log file ends in the middle of a session")
+                chunk = f.read(need)
+                eof = not chunk
+                need *= 2
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            need = chunk_size
+            pos = end
+            expect = ","
+            yield obj
+
+
+def append_session(path: str, session: dict):
+    """Add one session to the log file without reading the rest of it."""
+    data = json.dumps(session, separators=(",", ":")).encode("utf-8")
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(b"[" + data + b"]")
+        return
+
+    with open(path, "r+b") as f:
+        close_pos, close = _last_byte(f, f.seek(0, os.SEEK_END))
+        if close is None:                   # empty file
+            f.seek(0)
+            f.write(b"[" + data + b"]")
+            f.truncate()
+            return
+        if close != b"]":
+            raise ValueError("log file doesn't end with ]")
+        _, prev = _last_byte(f, close_pos)
+        f.seek(close_pos)
+        f.write((b"" if prev == b"[" else b",") + data + b"]")
+        f.truncate()
+
+
+def _last_byte(f, before: int) -> tuple[int, bytes | None]:
+    """Position and value of the last non-whitespace byte before offset `before`."""
+    pos = before
+    while pos > 0:
+        step = min(4096, pos)
+        pos -= step
+        f.seek(pos)
+        block = f.read(step).rstrip(b" \t\r\n")
+        if block:
+            return pos + len(block) - 1, block[-1:]
+    return 0, None
+
+
+def parse_time(text: str) -> int:
+    """Old "YYYY-mm-dd HH:MM:SS" string -> epoch seconds (0 if unparseable)."""
+    try:
+        return int(datetime.strptime(text, _OLD_TIME_FORMAT).timestamp())
+    except (TypeError, ValueError):
+        return 0
@@ -0,0 +1,288 @@
+# rescore.py
+# Re-score saved history through llm_client and compare against the logged scores
+# ----------------------------------------
+# Usage:
+#   python rescore.py                                 # every entry in config.LOG_FILE
+#   python rescore.py --screenshots shots/ --workers 8
+#   python rescore.py --offline                       # no API key / network needed
+#   python rescore.py --report                        # just re-print the report
+#
+# Every result is appended to --out (JSONL) as soon as it arrives, so an
+# interrupted run picks up where it stopped. Use it to check whether a prompt
+# or model change moves verdicts, or to backfill scores without the live app.
+#
+# Screenshots are optional: <dir>/<entry ts>.png is sent with the entry when it
+# exists; otherwise the entry is scored from its tab titles alone.
+#
+# --offline starts a stand-in OpenAI server on localhost that answers with the
+# on-device classifier (local_scorer), so the whole pipeline — prompts, routing,
+# concurrency, checkpoints, reports — can be exercised without the real API.
+
+import argparse
+import json
+import os
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+from records import iter_entries
+
+# USD per 1M tokens: (input, cached input, output). Update when pricing changes.
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o":      (2.50, 1.25, 10.00),
+}
+
+
+# ── Input ──────────────────────────────────────────────────────────────────────
+
+def load_done(out_file: str) -> set[tuple[int, int]]:
+    """(session_start, ts) of entries already in the checkpoint file."""
+    done = set()
+    if os.path.exists(out_file):
+        for row in _read_rows(out_file):
+            done.add((row["session"], row["ts"]))
+    return done
+
+
+def _read_rows(out_file: str):
+    with open(out_file, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                pass    # half-written last line from an interrupted run
+
+
+# ── Scoring ────────────────────────────────────────────────────────────────────
+
+def rescore_one(session_start, entry, tabs, assignment, screenshots):
+    """Score one logged entry. Runs on a worker thread."""
+    import llm_client   # imported late so --offline can point it at the stand-in server
+
+    image = None
+    path = os.path.join(screenshots, f"{entry.ts}.png") if screenshots else ""
+    if path and os.path.exists(path):
+        from PIL import Image
+        image = Image.open(path)
+
+    t0 = time.perf_counter()
+    try:
+        result = llm_client.score_productivity(image, tabs, assignment, max_side=config.CAPTURE_MAX_SIDE)
+        error = ""
+    except Exception as e:
+        result, error = {}, str(e)
+    ms = (time.perf_counter() - t0) * 1000
+
+    return {
+        "session": session_start,
+        "ts": entry.ts,
+        "old": entry.score,
+        "new": result.get("score"),
+        "reason": result.get("reason", ""),
+        "image": image is not None,
+        "ms": round(ms, 1),
+        "error": error,
+    }
+
+
+def run(args) -> dict:
+    """Score everything not yet in the checkpoint. Returns this run's token usage."""
+    import llm_client
+
+    done = load_done(args.out)
+    todo = (item for item in iter_entries(args.log) if (item[0], item[1].ts) not in done)
+    if args.limit:
+        todo = (item for _, item in zip(range(args.limit), todo))
+
+    count = 0
+    with open(args.out, "a") as out, ThreadPoolExecutor(max_workers=args.workers) as pool:
+        pending = set()
+        # Keep at most 2 x workers entries in flight so memory stays flat on huge logs
+        for session_start, entry, tabs in todo:
+            pending.add(pool.submit(rescore_one, session_start, entry, list(tabs),
+                                    args.assignment, args.screenshots))
+            if len(pending) >= args.workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                count += _write(out, finished)
+        count += _write(out, wait(pending).done)
+
+    print(f"[Rescore] Scored {count} entries ({len(done)} already done)")
+    return llm_client.usage_stats()
+
+
+def _write(out, futures) -> int:
+    for fut in futures:
+        out.write(json.dumps(fut.result(), separators=(",", ":")) + "\n")
+    out.flush()
+    return len(futures)
+
+
+# ── Report ─────────────────────────────────────────────────────────────────────
+
+def report(out_file: str, usage: dict | None = None):
+    rows = [r for r in _read_rows(out_file) if r.get("new") is not None]
+    errors = sum(1 for r in _read_rows(out_file) if r.get("error"))
+    if not rows:
+        print("[Rescore] No scored entries yet.")
+        return
+
+    low = config.LOW_SCORE_THRESHOLD
+    diffs = [r["new"] - r["old"] for r in rows]
+    latencies = sorted(r["ms"] for r in rows)
+
+    print(f"\nEntries scored:     {len(rows)}  ({errors} errors, "
+          f"{sum(1 for r in rows if r['image'])} with screenshots)")
+    print(f"Exact agreement:    {_pct(sum(1 for d in diffs if d == 0), len(rows))}")
+    print(f"Within ±1:          {_pct(sum(1 for d in diffs if abs(d) <= 1), len(rows))}")
+    print(f"Same verdict:       {_pct(sum(1 for r in rows if (r['old'] < low) == (r['new'] < low)), len(rows))}"
+          f"  (unproductive = score < {low})")
+    print(f"Mean shift:         {statistics.fmean(diffs):+.2f}  (mean |Δ| {statistics.fmean(map(abs, diffs)):.2f})")
+    print(f"Latency ms:         p50 {_quantile(latencies, 0.5):.0f}  p95 {_quantile(latencies, 0.95):.0f}"
+          f"  max {latencies[-1]:.0f}")
+
+    if usage:
+        total_cost = 0.0
+        print("\nThis run's tokens:")
+        for prompt, stats in usage.items():
+            for model, c in stats["models"].items():
+                cost = _cost(model, c)
+                total_cost += cost or 0.0
+                price = f"${cost:.4f}" if cost is not None else "(no price for model)"
+                print(f"  {prompt} / {model}: {c['calls']} calls, {c['prompt_tokens']} in "
+                      f"({c['cached_tokens']} cached), {c['completion_tokens']} out  {price}")
+        print(f"  Estimated cost: ${total_cost:.4f}")
+
+
+def _cost(model: str, c: dict) -> float | None:
+    price = PRICES.get(model)
+    if price is None:
+        return None
+    uncached = c["prompt_tokens"] - c["cached_tokens"]
+    return (uncached * price[0] + c["cached_tokens"] * price[1] + c["completion_tokens"] * price[2]) / 1e6
+
+
+def _pct(n: int, total: int) -> str:
+    return f"{n / total:.1%}  ({n}/{total})"
+
+
+def _quantile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+# ── Stand-in OpenAI server ─────────────────────────────────────────────────────
+
+_TABS_RE = re.compile(r"open browser tabs are: (.*)\.\n")
+_ASSIGNMENT_RE = re.compile(r'working on: "(.*)"')
+
+
+class _FakeOpenAI(BaseHTTPRequestHandler):
+    """Answers /v1/chat/completions with local_scorer's verdict on the prompt's tabs."""
+
+    latency = 0.0
+
+    def do_POST(self):
+        import local_scorer
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        messages = body.get("messages", [])
+        text = _message_text(messages[-1]) if messages else ""
+
+        tabs = _TABS_RE.search(text)
+        assignment = _ASSIGNMENT_RE.search(text)
+        words = set(re.findall(r"[a-z0-9]+", (tabs.group(1) if tabs else text).lower()))
+        verdict = local_scorer.classify(words, assignment.group(1) if assignment else "")
+        verdict.pop("confidence", None)
+
+        # Rough token counts (4 chars/token); the system prompt is the only stable prefix
+        system = _message_text(messages[0]) if messages and messages[0].get("role") == "system" else ""
+        prompt_tokens = sum(len(_message_text(m)) for m in messages) // 4 + 1
+        reply = json.dumps(verdict)
+
+        time.sleep(self.latency)
+        self._send({
+            "id": "chatcmpl-offline",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "offline"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": reply}}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(reply) // 4 + 1,
+                "total_tokens": prompt_tokens + len(reply) // 4 + 1,
+                "prompt_tokens_details": {"cached_tokens": _cached_tokens(len(system) // 4)},
+            },
+        })
+
+    def _send(self, obj):
+        data = json.dumps(obj).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def _cached_tokens(prefix_tokens: int) -> int:
+    """OpenAI's rule: prefixes under 1024 tokens are never cached, longer ones in 128-token steps."""
+    return prefix_tokens // 128 * 128 if prefix_tokens >= 1024 else 0
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content", "")
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if part.get("type") == "text")
+    return content or ""
+
+
+def start_offline_server(latency_ms: float = 0) -> str:
+    """Start the stand-in server on a free port and point the OpenAI client at it."""
+    _FakeOpenAI.latency = latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOpenAI)
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-openai").start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ["OPENAI_BASE_URL"] = url
+    os.environ.setdefault("OPENAI_API_KEY", "offline")
+    return url
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score saved FocusOrb history and compare verdicts.")
+    parser.add_argument("--log", default=config.LOG_FILE, help="history file (default: config.LOG_FILE)")
+    parser.add_argument("--out", default="rescore_results.jsonl", help="checkpoint / results file")
+    parser.add_argument("--screenshots", default="", help="folder of <ts>.png screenshots (optional)")
+    parser.add_argument("--assignment", default="General work",
+                        help="assignment to score against (the log doesn't record it)")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent API calls")
+    parser.add_argument("--limit", type=int, default=0, help="stop after N new entries")
+    parser.add_argument("--offline", action="store_true", help="use the stand-in OpenAI server")
+    parser.add_argument("--offline-latency-ms", type=float, default=0, help="simulated latency per call")
+    parser.add_argument("--report", action="store_true", help="only print the report for --out")
+    args = parser.parse_args()
+
+    if args.report:
+        report(args.out)
+        return
+
+    if args.offline:
+        print(f"[Rescore] Offline: stand-in OpenAI server at {start_offline_server(args.offline_latency_ms)}")
+
+    usage = run(args)
+    report(args.out, usage)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# runtime.py
+# One asyncio event loop for the whole desktop app, bridged to Tk
+# ----------------------------------------
+# Uses: asyncio (built into Python — no install needed)
+#
+# The loop runs in a single background thread. Timers (timers.py), monitor
+# checks, chat/LLM calls, notifications and session summaries are coroutines
+# or callbacks on it. Anything that blocks (OpenAI, pyautogui, plyer, SQLite)
+# is awaited through run_blocking(), which uses a small fixed thread pool and
+# optional per-kind limits ("llm", "notify", ...) so a burst of input queues
+# up instead of spawning threads.
+#
+# Tk is not thread-safe, so nothing outside the Tk thread touches widgets:
+# call_in_ui(fn, *args) puts the call on one queue, and the Tk thread drains
+# it from a single root.after() poll started by attach_tk(root).
+
+import asyncio
+import collections
+import functools
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import config
+
+
+class Runtime:
+    def __init__(self):
+        self._loop     = None
+        self._thread   = None
+        self._start    = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=config.RUNTIME_BLOCKING_WORKERS,
+                                            thread_name_prefix="blocking")
+        self._limits   = {}                  # kind -> asyncio.Semaphore (created on the loop)
+        self._ui       = queue.SimpleQueue() # (fn, args) waiting for the Tk thread
+        self._tk_root  = None
+
+    # ── Loop ───────────────────────────────────────────────────────────────────
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The app's event loop (started on first use)."""
+        if self._loop is None:
+            with self._start:
+                if self._loop is None:
+                    ready = threading.Event()
+                    self._thread = threading.Thread(target=self._run, args=(ready,),
+                                                    daemon=True, name="runtime")
+                    self._thread.start()
+                    ready.wait()
+        return self._loop
+
+    def _run(self, ready: threading.Event):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.set_exception_handler(_log_exception)
+        self._loop = loop
+        ready.set()
+        loop.run_forever()
+
+    def submit(self, coro) -> Future:
+        """Schedule a coroutine from any thread. The returned Future can be cancelled."""
+        return asyncio.run_coroutine_threadsafe(_logged(coro), self.loop)
+
+    def call_soon(self, fn, *args):
+        """Run a quick, non-blocking fn(*args) on the loop thread."""
+        self.loop.call_soon_threadsafe(fn, *args)
+
+    async def run_blocking(self, fn, *args, limit: str = None, **kwargs):
+        """
+        Await a blocking call on the worker pool. `limit` names a kind of work
+        whose concurrency is capped by config.RUNTIME_LIMITS (e.g. "llm").
+        """
+        call = functools.partial(fn, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        if limit is None:
+            return await loop.run_in_executor(self._executor, call)
+        async with self._semaphore(limit):
+            return await loop.run_in_executor(self._executor, call)
+
+    def _semaphore(self, kind: str) -> asyncio.Semaphore:
+        sem = self._limits.get(kind)
+        if sem is None:
+            sem = self._limits[kind] = asyncio.Semaphore(config.RUNTIME_LIMITS.get(kind, 1))
+        return sem
+
+    # ── Tk bridge ──────────────────────────────────────────────────────────────
+
+    def attach_tk(self, root):
+        """Start draining call_in_ui() work on this Tk root (call once, from the Tk thread)."""
+        if self._tk_root is not None:
+            return
+        self._tk_root = root
+
+        def drain():
+            for _ in range(100):          # bounded per tick so the UI stays responsive
+                try:
+                    fn, args = self._ui.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    fn(*args)
+                except Exception as e:
+                    print(f"[Runtime] UI callback error in {getattr(fn, '__name__', fn)}: {e}")
+            try:
+                root.after(config.RUNTIME_UI_POLL_MS, drain)
+            except Exception:
+                self._tk_root = None      # root destroyed
+
+        drain()
+
+    def call_in_ui(self, fn, *args):
+        """Run fn(*args) on the Tk thread (safe from any thread)."""
+        self._ui.put((fn, args))
+
+
+class RequestQueue:
+    """
+    Async requests for one owner (e.g. a chat window):
+      • at most `limit` run at once; the rest wait in submit order
+      • at most `max_waiting` wait — a newer submit supersedes the oldest waiting one
+        (it skips its call, and on_skip runs instead of on_result)
+      • results reach the Tk thread in submit order, even if a later one finishes first
+      • close() cancels everything; results that arrive after it are dropped
+    A blocking call already running on the worker pool can't be interrupted,
+    but its result is discarded.
+    """
+
+    def __init__(self, limit: int = 1, max_waiting: int = 3):
+        self._limit       = limit
+        self._max_waiting = max_waiting
+        self._closed      = False
+        self._sem         = None                  # loop-side state below
+        self._waiting     = collections.deque()   # tasks not yet started, oldest first
+        self._superseded  = set()                 # waiting tasks that will skip instead of run
+        self._tasks       = set()
+        self._tail        = None                  # newest task; each one waits for the one before
+
+    def submit(self, coro_fn, *args, on_result, on_skip=None):
+        """Queue coro_fn(*args); on_result(value) / on_skip() later run on the Tk thread."""
+        if not self._closed:
+            call_soon(self._enqueue, coro_fn, args, on_result, on_skip)
+
+    def close(self):
+        """Cancel waiting and running requests and drop their results (call from the Tk thread)."""
+        if not self._closed:
+            self._closed = True
+            call_soon(self._cancel_all)
+
+    # Loop thread only ─────────────────────────────────────────────────────────
+
+    def _enqueue(self, coro_fn, args, on_result, on_skip):
+        if self._closed:
+            return
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self._limit)
+        prev = self._tail
+        task = self._tail = get_loop().create_task(self._run(coro_fn, args, on_result, on_skip, prev))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self._waiting.append(task)
+        while len(self._waiting) > self._max_waiting:
+            self._superseded.add(self._waiting.popleft())
+
+    async def _run(self, coro_fn, args, on_result, on_skip, prev):
+        me = asyncio.current_task()
+        try:
+            # The slot is held until the result is handed to Tk, so the next
+            # request can't start (and stream into the UI) before this one lands
+            async with self._sem:
+                if me in self._superseded:
+                    self._superseded.discard(me)
+                    callback, value = on_skip, ()
+                else:
+                    self._waiting.remove(me)
+                    callback, value = on_result, (await coro_fn(*args),)
+                if prev is not None:
+                    await asyncio.wait([prev])    # earlier requests reach the UI first
+                if callback is not None:
+                    call_in_ui(self._deliver, callback, value)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"[Runtime] Request error: {e}")
+
+    def _cancel_all(self):
+        self._waiting.clear()
+        self._superseded.clear()
+        for task in list(self._tasks):
+            task.cancel()
+
+    def _deliver(self, callback, value):
+        if not self._closed:                      # window closed since: stale update
+            callback(*value)
+
+
+async def _logged(coro):
+    try:
+        return await coro
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"[Runtime] Task error: {e}")
+        raise
+
+
+def _log_exception(loop, context):
+    if "exception" in context:            # ignore "task destroyed" noise at interpreter exit
+        print(f"[Runtime] {context.get('message')}: {context['exception']}")
+
+
+# ── Shared instance ───────────────────────────────────────────────────────────
+_runtime = Runtime()
+
+submit       = _runtime.submit
+call_soon    = _runtime.call_soon
+run_blocking = _runtime.run_blocking
+attach_tk    = _runtime.attach_tk
+call_in_ui   = _runtime.call_in_ui
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    return _runtime.loop
@@ -1,9 +1,31 @@
-from fastapi import FastAPI
+import asyncio
+import json
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+import anyio
+from fastapi import BackgroundTasks, FastAPI, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from llm_client import orb_chat_reply, evaluate_page_relevance
+import config
+import focus_profile
+import store
+from records import Assignment
+from llm_client import orb_chat_reply, evaluate_page_relevance, usage_stats, routing_stats
 
-app = FastAPI()
+@asynccontextmanager
+async def _lifespan(app):
+    flusher = asyncio.get_running_loop().create_task(_flush_dwell_forever())
+    try:
+        yield
+    finally:
+        flusher.cancel()
+        dwell.flush()
+
+app = FastAPI(lifespan=_lifespan)
 
 # allow Chrome extension requests
 app.add_middleware(
@@ -11,6 +33,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 class ChatReq(BaseModel):
@@ -29,10 +52,82 @@ class EvalReq(BaseModel):
     focusTopic: str = ""
     reason: str = ""
 
+class PrefetchReq(BaseModel):
+    host: str = ""
+    url: str = ""
+    focusTopic: str = ""
+
+class TaskReq(BaseModel):
+    name: str
+    estimatedMinutes: int = 25
+    dueDate: str = ""
+    priority: str = "medium"
+
+class TaskNameReq(BaseModel):
+    name: str
+
+class PushReq(BaseModel):
+    type: str
+    model_config = {"extra": "allow"}
+
+
+# ── Push channel ──────────────────────────────────────────────────────────────
+# Every client (extension service worker, desktop orb) keeps one WebSocket open
+# on /ws. Score updates, focus topic changes, break state and verdicts are
+# fanned out to all of them, so nobody has to poll.
+
+PUSH_TYPES = {"score", "focus", "break", "verdict", "tasks"}
+TRANSIENT_TYPES = {"verdict"}   # about one page load: fanned out live, never replayed
+CLIENT_TYPES = {"focus", "break"}  # what clients may publish over /ws (the rest come from endpoints)
+
+class PushHub:
+    def __init__(self):
+        self.clients: set[WebSocket] = set()
+        self.state: dict = {}   # latest event per type, replayed to new clients
+        self._sends: set[asyncio.Task] = set()
+
+    async def connect(self, ws: WebSocket):
+        await ws.accept()
+        self.clients.add(ws)
+        await ws.send_json({"type": "snapshot", "state": self.state})
+
+    def disconnect(self, ws: WebSocket):
+        self.clients.discard(ws)
+
+    async def publish(self, event: dict, exclude: WebSocket = None):
+        if event.get("type") not in PUSH_TYPES:
+            return
+        if event["type"] not in TRANSIENT_TYPES:
+            self.state[event["type"]] = event
+        for ws in list(self.clients):
+            if ws is exclude:
+                continue
+            try:
+                await ws.send_json(event)
+            except Exception:
+                self.disconnect(ws)
+
+    def publish_from_thread(self, event: dict):
+        """For sync endpoints (they run in a worker thread). Fire-and-forget: a slow client can't hold up the endpoint."""
+        anyio.from_thread.run_sync(self._publish_soon, event)
+
+    def _publish_soon(self, event: dict):
+        task = asyncio.get_running_loop().create_task(self.publish(event))
+        self._sends.add(task)
+        task.add_done_callback(self._sends.discard)
+
+hub = PushHub()
+
 @app.get("/health")
 def health():
     return {"ok": True}
 
+@app.get("/usage")
+def usage():
+    # Prompt tokens per LLM call type (cached prefix vs uncached), model routing
+    # and how many page checks the focus profile answered without the model
+    return {"prompts": usage_stats(), "routing": routing_stats(), "profile": focus_profile.stats()}
+
 @app.post("/chat")
 def chat(req: ChatReq):
     reply = orb_chat_reply(
@@ -45,12 +140,368 @@ def chat(req: ChatReq):
     )
     return {"reply": reply}
 
+# ── Verdict cache (speculative prefetch) ──────────────────────────────────────
+# The extension fires /prefetch as soon as a navigation starts, with just the
+# URL. We evaluate in the background and keep the verdict for a while, so the
+# /evaluate call from the page itself is answered from memory. Requests for
+# the same page that arrive while an evaluation is running wait for it instead
+# of starting a second one.
+
+class VerdictCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[tuple, tuple[float, dict]] = {}   # key -> (expires, verdict)
+        self._pending: dict[tuple, Future] = {}
+
+    @staticmethod
+    def key(focus_topic: str, url: str) -> tuple:
+        return (" ".join(focus_topic.lower().split()), url.split("#", 1)[0])
+
+    def get(self, key: tuple) -> dict | None:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit and hit[0] > time.monotonic():
+                return hit[1]
+            self._entries.pop(key, None)
+            return None
+
+    def claim(self, key: tuple) -> tuple[Future, bool]:
+        """Return (future, owner). The owner must compute and resolve() it."""
+        with self._lock:
+            fut = self._pending.get(key)
+            if fut is not None:
+                return fut, False
+            fut = self._pending[key] = Future()
+            return fut, True
+
+    def resolve(self, key: tuple, fut: Future, verdict: dict = None, error: Exception = None):
+        with self._lock:
+            self._pending.pop(key, None)
+            if error is None:
+                self._entries[key] = (time.monotonic() + self.ttl, verdict)
+                if len(self._entries) > config.VERDICT_CACHE_MAX:
+                    self._evict_expired()
+        if error is None:
+            fut.set_result(verdict)
+        else:
+            fut.set_exception(error)
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for k in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+            del self._entries[k]
+        while len(self._entries) > config.VERDICT_CACHE_MAX:
+            self._entries.pop(next(iter(self._entries)))   # oldest insert first
+
+verdicts = VerdictCache(config.VERDICT_CACHE_SECONDS)
+
+
+def _cached_evaluate(focus_topic: str, host: str, title: str, url: str) -> dict:
+    """Evaluate once per (topic, url) per TTL; concurrent callers share one LLM call."""
+    key = VerdictCache.key(focus_topic, url)
+    hit = verdicts.get(key)
+    if hit is not None:
+        return hit
+
+    fut, owner = verdicts.claim(key)
+    if not owner:
+        return fut.result(timeout=30)
+
+    try:
+        result = focus_profile.predict(host, focus_topic)
+        if result is None:
+            result = evaluate_page_relevance(focus_topic, host, title, url)
+            _learn(focus_profile.record, host, focus_topic, result.get("allowed", True))
+    except Exception as e:
+        verdicts.resolve(key, fut, error=e)
+        raise
+    verdicts.resolve(key, fut, verdict=result)
+    return result
+
+
+def _learn(record, *args):
+    # The profile is a shortcut, never a reason to fail a request
+    try:
+        record(*args)
+    except Exception as e:
+        print(f"[Server] Focus profile update failed: {e}")
+
+
+@app.post("/prefetch", status_code=202)
+def prefetch(req: PrefetchReq, background: BackgroundTasks):
+    """Fire-and-forget: warm the verdict cache for a page that is about to load."""
+    if req.focusTopic.strip() and req.url:
+        background.add_task(_prefetch_task, req.focusTopic, req.host, req.url)
+    return {"ok": True}
+
+def _prefetch_task(focus_topic: str, host: str, url: str):
+    try:
+        _cached_evaluate(focus_topic, host, "", url)
+    except Exception as e:
+        print(f"[Server] Prefetch failed for {url}: {e}")
+
+
 @app.post("/evaluate")
 def evaluate(req: EvalReq):
-    return evaluate_page_relevance(
-        req.focusTopic,
-        req.host,
-        req.title,
-        req.url,
-        req.reason
-    )
\ No newline at end of file
+    if req.reason:
+        # A justification changes the question — never serve it from cache
+        result = evaluate_page_relevance(
+            req.focusTopic,
+            req.host,
+            req.title,
+            req.url,
+            req.reason
+        )
+        _learn(focus_profile.record_excuse, req.host, req.focusTopic, result.get("allowed", True))
+    else:
+        result = _cached_evaluate(req.focusTopic, req.host, req.title, req.url)
+    hub.publish_from_thread({
+        "type": "verdict",
+        "host": req.host,
+        "url": req.url,
+        "allowed": result.get("allowed", True),
+        "reason": result.get("reason", ""),
+        "score": result.get("score"),
+    })
+    return result
+
+@app.post("/push")
+async def push(req: PushReq):
+    await hub.publish(req.model_dump())
+    return {"ok": True}
+
+@app.websocket("/ws")
+async def ws_endpoint(ws: WebSocket):
+    await hub.connect(ws)
+    try:
+        while True:
+            # Clients publish their own changes (e.g. extension sets focus / starts a break)
+            try:
+                event = await ws.receive_json()
+                if event.get("type") not in CLIENT_TYPES:
+                    continue        # scores, verdicts and task changes only come from the server's endpoints
+                await hub.publish(event, exclude=ws)
+            except (ValueError, AttributeError):
+                continue            # not JSON, or not an object — skip it, keep the socket
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.disconnect(ws)
+
+
+# ── Dwell time ────────────────────────────────────────────────────────────────
+# The extension sends attention events (through /ingest) — [when, host] each
+# time the active tab, window focus or idle state changes, plus a heartbeat
+# every 30 s. Each event closes the previous interval and credits
+# it to that host (split at midnight, capped at DWELL_MAX_GAP_SECONDS).
+# Per-day totals live in memory and are the answer to /dwell; only the deltas
+# since the last flush are written to the store, every DWELL_FLUSH_SECONDS.
+
+class DwellTracker:
+    MAX_SKEW = 60.0     # the extension shares this machine's clock; later events are bogus
+
+    def __init__(self, max_gap: float):
+        self.max_gap = max_gap
+        self._lock = threading.Lock()
+        self._host = ""                                  # who has the user's attention ("" = nobody)
+        self._since = 0.0                                # ...since this epoch second
+        self._totals: dict[str, dict[str, float]] = {}   # day -> host -> seconds (stored + unflushed)
+        self._unflushed: dict[tuple[str, str], float] = {}
+
+    def ingest(self, events: list[tuple[float, str]]) -> int:
+        """Apply a batch; returns how many events were used (stale ones are skipped)."""
+        used = 0
+        latest = time.time() + self.MAX_SKEW
+        with self._lock:
+            for ts, host in sorted(events):
+                if ts < self._since:
+                    continue                             # already counted past this point
+                if ts > latest:
+                    break                                # from the future: would stall tracking until then
+                if self._host:
+                    self._credit(self._host, self._since, min(ts, self._since + self.max_gap))
+                self._host, self._since = _norm_host(host), ts
+                used += 1
+        return used
+
+    def day(self, day: str) -> dict[str, float]:
+        """host -> seconds for `day`, including the interval still open. O(hosts)."""
+        with self._lock:
+            totals = dict(self._day(day))
+            if self._host:
+                now = time.time()
+                for d, seconds in _split_days(self._since, min(now, self._since + self.max_gap)):
+                    if d == day:
+                        totals[self._host] = totals.get(self._host, 0.0) + seconds
+        return totals
+
+    def flush(self):
+        """Write unflushed deltas in one transaction; forget days other than today and yesterday."""
+        with self._lock:
+            rows = [(d, h, s) for (d, h), s in self._unflushed.items()]
+            self._unflushed = {}
+        if rows:
+            try:
+                store.add_dwell(rows)
+            except Exception as e:
+                print(f"[Server] Dwell flush failed: {e}")
+                with self._lock:                         # keep them for the next try
+                    for d, h, s in rows:
+                        self._unflushed[(d, h)] = self._unflushed.get((d, h), 0.0) + s
+                return
+        keep = {date.today().isoformat(), (date.today() - timedelta(days=1)).isoformat()}
+        with self._lock:
+            dirty = {d for d, _ in self._unflushed}
+            for d in [d for d in self._totals if d not in keep and d not in dirty]:
+                del self._totals[d]
+
+    def _credit(self, host: str, start: float, end: float):
+        """Caller holds self._lock."""
+        for d, seconds in _split_days(start, end):
+            totals = self._day(d)
+            totals[host] = totals.get(host, 0.0) + seconds
+            self._unflushed[(d, host)] = self._unflushed.get((d, host), 0.0) + seconds
+
+    def _day(self, day: str) -> dict[str, float]:
+        """Caller holds self._lock. Loads the day from the store on first use."""
+        totals = self._totals.get(day)
+        if totals is None:
+            totals = self._totals[day] = store.dwell_for_day(day)
+        return totals
+
+
+def _split_days(start: float, end: float):
+    """Yield (YYYY-MM-DD, seconds) for [start, end), split at local midnight."""
+    while start < end:
+        d = date.fromtimestamp(start)
+        midnight = datetime.combine(d + timedelta(days=1), datetime.min.time()).timestamp()
+        stop = min(end, midnight)
+        yield d.isoformat(), stop - start
+        start = stop
+
+
+def _norm_host(host: str) -> str:
+    host = host.strip().lower()
+    return host[4:] if host.startswith("www.") else host
+
+dwell = DwellTracker(config.DWELL_MAX_GAP_SECONDS)
+
+
+async def _flush_dwell_forever():
+    """Started by _lifespan; the final flush happens at shutdown."""
+    while True:
+        await asyncio.sleep(config.DWELL_FLUSH_SECONDS)
+        await anyio.to_thread.run_sync(dwell.flush)
+
+@app.get("/dwell")
+def dwell_time(day: str = "", host: str = "", limit: int = 0):
+    """Seconds per host for `day` (default today), most first. `host` narrows it to one site."""
+    day = day or date.today().isoformat()
+    totals = dwell.day(day)
+    total = sum(totals.values())
+    if host:
+        host = _norm_host(host)
+        totals = {host: totals.get(host, 0.0)}
+    ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)
+    if limit > 0:
+        ranked = ranked[:limit]
+    return {"day": day, "hosts": {h: round(s) for h, s in ranked}, "total": round(total)}
+
+
+# ── Telemetry ingest ──────────────────────────────────────────────────────────
+# background.js batches small records and POSTs each batch, gzip-compressed,
+# as text/plain (a CORS "simple" request, so there's no preflight):
+#   {"v": 1, "records": [["a", ts, host],                                  attention event
+#                        ["v", ts, host, url, topic, allowed, score, source], ...]}   verdict
+# A batch is applied in bulk: verdicts in one store transaction, attention
+# events in one pass over the dwell tracker.
+
+INGEST_MAX_BYTES = config.INGEST_MAX_KB * 1024
+
+def _read_batch(body: bytes) -> list:
+    if body[:2] == b"\x1f\x8b":                     # gzip magic
+        inflater = zlib.decompressobj(wbits=31)
+        body = inflater.decompress(body, INGEST_MAX_BYTES)
+        if inflater.unconsumed_tail:
+            raise ValueError("batch too large")
+    elif len(body) > INGEST_MAX_BYTES:
+        raise ValueError("batch too large")
+    batch = json.loads(body)
+    if not isinstance(batch, dict) or batch.get("v") != 1:
+        raise ValueError("unknown batch format")
+    return batch.get("records") or []
+
+def _ingest_records(records: list) -> dict:
+    attention, verdict_rows, skipped = [], [], 0
+    for r in records:
+        try:
+            if r[0] == "a":
+                attention.append((float(r[1]), str(r[2])))
+            elif r[0] == "v":
+                verdict_rows.append((float(r[1]), _norm_host(str(r[2])), str(r[3]), str(r[4]),
+                                     int(bool(r[5])), None if r[6] is None else int(r[6]), str(r[7])))
+            else:
+                skipped += 1
+        except (IndexError, KeyError, TypeError, ValueError):
+            skipped += 1
+    if verdict_rows:
+        with store.transaction() as conn:
+            store.add_verdicts(conn, verdict_rows)
+    used = dwell.ingest(attention) if attention else 0
+    return {"attention": used, "verdicts": len(verdict_rows), "skipped": skipped}
+
+@app.post("/ingest")
+async def ingest(request: Request):
+    try:
+        records = _read_batch(await request.body())
+    except (ValueError, zlib.error) as e:
+        return Response(status_code=400, content=str(e))
+    counts = await anyio.to_thread.run_sync(_ingest_records, records)
+    return {"ok": True, **counts}
+
+
+# ── Assignments (delta sync) ──────────────────────────────────────────────────
+# GET /assignments?since=N returns only rows changed after version N (deletes
+# come back as tombstones). The ETag is the store version, so a client that
+# sends If-None-Match with its last ETag gets an empty 304 when nothing changed.
+
+@app.get("/assignments")
+def list_assignments(request: Request, since: int = 0):
+    version = store.current_version()
+    etag = f'W/"{version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    # A client ahead of the store (e.g. the DB was deleted) gets a full resend
+    reset = since > version
+    version, rows = store.changes_since(0 if reset else since)
+    body = {"version": version, "reset": reset, "changes": [store.row_to_json(r) for r in rows]}
+    return Response(
+        content=json.dumps(body, separators=(",", ":")),
+        media_type="application/json",
+        headers={"ETag": f'W/"{version}"'},
+    )
+
+@app.post("/assignments")
+def add_assignment(req: TaskReq):
+    priority = req.priority if req.priority in ("high", "medium", "low") else "medium"
+    task = Assignment(req.name.strip(), req.estimatedMinutes, req.dueDate, priority,
+                      created_at=int(time.time()))
+    version = store.save_assignment(task)
+    hub.publish_from_thread({"type": "tasks", "version": version})
+    return {"ok": True, "version": version}
+
+@app.post("/assignments/complete")
+def complete_assignment(req: TaskNameReq):
+    version = store.complete_assignment(req.name)
+    if version is not None:
+        hub.publish_from_thread({"type": "tasks", "version": version})
+    return {"ok": version is not None, "version": version}
+
+@app.post("/assignments/delete")
+def delete_assignment(req: TaskNameReq):
+    version = store.delete_assignment(req.name)
+    if version is not None:
+        hub.publish_from_thread({"type": "tasks", "version": version})
+    return {"ok": version is not None, "version": version}
@@ -0,0 +1,114 @@
+# state.py
+# Shared desktop-app state, safe to read and write from any thread
+# ----------------------------------------
+# The orb (Tk thread), the runtime loop and its workers, and push listeners all
+# touch the same handful of values. Instead of module globals, they live in
+# one immutable Snapshot:
+#
+#   • reads are lock-free — state.get() hands back the current snapshot, which
+#     never changes underneath you
+#   • writes take a lock, build a new snapshot, and swap it in (copy-on-write)
+#   • compare_and_set() makes start/stop style transitions happen exactly once
+#   • subscribe() calls you after a change, outside the lock, with (old, new)
+
+import threading
+from dataclasses import dataclass, fields, replace
+
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    # monitor.py
+    monitoring: bool = False
+    assignment: str = "General work"
+    consecutive_low: int = 0
+    last_score: int = 0
+
+    # chat.py
+    excuse_mode: bool = False
+    flagged_tabs: tuple[str, ...] = ()
+    conversation: tuple[tuple[str, str], ...] = ()   # (role, content), oldest first
+
+    # assignments.py (Pomodoro)
+    pomodoro_running: bool = False
+    pomodoro_interval: int = 0
+
+
+_FIELDS = {f.name for f in fields(Snapshot)}
+
+
+class AppState:
+    def __init__(self):
+        self._lock        = threading.Lock()
+        self._snapshot    = Snapshot()
+        self._subscribers = []                 # (callback, keys or None)
+
+    # ── Reads ──────────────────────────────────────────────────────────────────
+
+    def get(self) -> Snapshot:
+        """Current snapshot. No lock: mutate() swaps snapshots with a single reference assignment."""
+        return self._snapshot
+
+    # ── Writes ─────────────────────────────────────────────────────────────────
+
+    def update(self, **changes) -> Snapshot:
+        """Set fields; returns the new snapshot."""
+        return self.mutate(lambda _: changes)[1]
+
+    def mutate(self, fn) -> tuple[Snapshot, Snapshot]:
+        """
+        Read-modify-write: fn(snapshot) returns a dict of changes, applied atomically.
+        Returns (old, new). Keep fn short and side-effect free — it runs under the lock.
+        """
+        with self._lock:
+            old = self._snapshot
+            changes = fn(old) or {}
+            unknown = changes.keys() - _FIELDS
+            if unknown:
+                raise AttributeError(f"unknown state field(s): {', '.join(sorted(unknown))}")
+            new = replace(old, **changes) if changes else old
+            if new == old:
+                new = old                     # no-op write: no new snapshot, no callbacks
+            self._snapshot = new
+        self._notify(old, new)
+        return old, new
+
+    def compare_and_set(self, name: str, expected, value) -> bool:
+        """Set `name` to `value` only if it currently equals `expected`. True if it did."""
+        old, new = self.mutate(lambda s: {name: value} if getattr(s, name) == expected else None)
+        return old is not new
+
+    # ── Subscriptions ──────────────────────────────────────────────────────────
+
+    def subscribe(self, callback, *keys):
+        """
+        Call callback(old, new) after any change (or only when one of `keys` changes).
+        Runs on the thread that made the change. Returns an unsubscribe function.
+        """
+        entry = (callback, frozenset(keys) or None)
+        with self._lock:
+            self._subscribers = self._subscribers + [entry]
+        def unsubscribe():
+            with self._lock:
+                self._subscribers = [s for s in self._subscribers if s is not entry]
+        return unsubscribe
+
+    def _notify(self, old: Snapshot, new: Snapshot):
+        if old is new:
+            return
+        for callback, keys in self._subscribers:
+            if keys is not None and all(getattr(old, k) == getattr(new, k) for k in keys):
+                continue
+            try:
+                callback(old, new)
+            except Exception as e:
+                print(f"[State] Subscriber error in {getattr(callback, '__name__', callback)}: {e}")
+
+
+# ── Shared instance ───────────────────────────────────────────────────────────
+_state = AppState()
+
+get             = _state.get
+update          = _state.update
+mutate          = _state.mutate
+compare_and_set = _state.compare_and_set
+subscribe       = _state.subscribe
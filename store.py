@@ -0,0 +1,275 @@
+# store.py
+# Embedded SQLite store shared by the desktop app (orb.py) and server.py
+# ----------------------------------------
+# Uses: sqlite3 (built into Python — no install needed)
+#
+# Every write bumps a global version number and stamps the changed row with
+# it. Deletes leave a tombstone row. A client that remembers the last version
+# it saw can ask for "everything since N" and only gets what changed.
+
+import sqlite3
+import threading
+import config
+from records import Assignment
+
+_local = threading.local()   # one connection per thread (sqlite3 connections aren't shareable)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+
+CREATE TABLE IF NOT EXISTS assignments (
+    key               TEXT PRIMARY KEY,
+    name              TEXT NOT NULL,
+    estimated_minutes INTEGER NOT NULL,
+    due_date          TEXT NOT NULL DEFAULT '',
+    priority          TEXT NOT NULL DEFAULT 'medium',
+    completed         INTEGER NOT NULL DEFAULT 0,
+    created_at        INTEGER NOT NULL DEFAULT 0,
+    version           INTEGER NOT NULL,
+    deleted           INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS assignments_version ON assignments (version);
+
+CREATE TABLE IF NOT EXISTS chat_messages (
+    ts     REAL NOT NULL,          -- epoch seconds
+    sender TEXT NOT NULL,
+    body   TEXT NOT NULL,
+    is_bot INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chat_messages_ts ON chat_messages (ts);
+
+CREATE TABLE IF NOT EXISTS dwell (
+    day     TEXT NOT NULL,         -- local date, YYYY-MM-DD
+    host    TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (day, host)
+);
+
+CREATE TABLE IF NOT EXISTS verdicts (
+    ts      REAL NOT NULL,         -- epoch seconds
+    host    TEXT NOT NULL,
+    url     TEXT NOT NULL,
+    topic   TEXT NOT NULL,
+    allowed INTEGER NOT NULL,
+    score   INTEGER,
+    source  TEXT NOT NULL          -- "ai", "excuse", "cache" or "blocklist"
+);
+CREATE INDEX IF NOT EXISTS verdicts_host ON verdicts (host);
+
+CREATE TABLE IF NOT EXISTS profile (
+    host    TEXT NOT NULL,
+    topic   TEXT NOT NULL,         -- normalized focus topic
+    allow   REAL NOT NULL,         -- decayed evidence as of `updated`
+    deny    REAL NOT NULL,
+    updated REAL NOT NULL,         -- epoch seconds
+    PRIMARY KEY (host, topic)
+);
+"""
+
+
+# ── Connection ─────────────────────────────────────────────────────────────────
+
+def connect() -> sqlite3.Connection:
+    """Return this thread's connection, creating the schema on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(config.DB_FILE, timeout=5, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")    # desktop app + server read/write concurrently
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+class transaction:
+    """`with store.transaction() as conn:` — one write transaction (BEGIN IMMEDIATE)."""
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn = connect()
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def _bump_version(conn: sqlite3.Connection) -> int:
+    conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+    return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+
+def current_version() -> int:
+    return connect().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+
+# ── Assignments ────────────────────────────────────────────────────────────────
+
+def task_key(name: str) -> str:
+    """Normalized name used as the primary key (case and whitespace insensitive)."""
+    return " ".join(name.lower().split())
+
+
+def save_assignment(a: Assignment) -> int:
+    """Insert or replace an assignment. Returns the new store version."""
+    with transaction() as conn:
+        version = _bump_version(conn)
+        conn.execute(
+            "INSERT OR REPLACE INTO assignments "
+            "(key, name, estimated_minutes, due_date, priority, completed, created_at, version, deleted) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+            (task_key(a.name), a.name, a.estimated_minutes, a.due_date, a.priority,
+             int(a.completed), a.created_at, version),
+        )
+    return version
+
+
+def complete_assignment(name: str) -> int | None:
+    """Mark completed. Returns the new version, or None if there's no such task."""
+    return _update_live_row("UPDATE assignments SET completed = 1, version = ? "
+                            "WHERE key = ? AND deleted = 0", name)
+
+
+def delete_assignment(name: str) -> int | None:
+    """Leave a tombstone so syncing clients learn about the delete."""
+    return _update_live_row("UPDATE assignments SET deleted = 1, version = ? "
+                            "WHERE key = ? AND deleted = 0", name)
+
+
+def _update_live_row(sql: str, name: str) -> int | None:
+    try:
+        with transaction() as conn:
+            version = _bump_version(conn)
+            if conn.execute(sql, (version, task_key(name))).rowcount == 0:
+                raise _NoChange
+    except _NoChange:
+        return None
+    return version
+
+
+def load_assignments() -> list[Assignment]:
+    """All live assignments, oldest first."""
+    rows = connect().execute(
+        "SELECT * FROM assignments WHERE deleted = 0 ORDER BY created_at, rowid"
+    ).fetchall()
+    return [row_to_assignment(r) for r in rows]
+
+
+def changes_since(version: int) -> tuple[int, list[sqlite3.Row]]:
+    """
+    Rows changed after `version` (tombstones included), plus the current version.
+    Read in one transaction so the pair is consistent.
+    """
+    conn = connect()
+    conn.execute("BEGIN")
+    try:
+        current = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+        rows = conn.execute(
+            "SELECT * FROM assignments WHERE version > ? ORDER BY version", (version,)
+        ).fetchall()
+    finally:
+        conn.execute("COMMIT")
+    return current, rows
+
+
+# ── Chat transcript ────────────────────────────────────────────────────────────
+# Desktop-only (not versioned or synced): lets the chat window page back past
+# what it keeps in memory.
+
+def append_chat_messages(rows: list[tuple[float, str, str, bool]]):
+    """Save (ts, sender, body, is_bot) rows in one transaction."""
+    with transaction() as conn:
+        conn.executemany(
+            "INSERT INTO chat_messages (ts, sender, body, is_bot) VALUES (?, ?, ?, ?)",
+            [(ts, sender, body, int(is_bot)) for ts, sender, body, is_bot in rows],
+        )
+
+
+def chat_messages_before(ts: float, limit: int) -> list[sqlite3.Row]:
+    """Up to `limit` messages older than `ts`, oldest first."""
+    rows = connect().execute(
+        "SELECT ts, sender, body, is_bot FROM chat_messages WHERE ts < ? "
+        "ORDER BY ts DESC LIMIT ?", (ts, limit)
+    ).fetchall()
+    return rows[::-1]
+
+
+# ── Dwell time ─────────────────────────────────────────────────────────────────
+# Seconds per host per day, written by server.py from the extension's events.
+
+def add_dwell(rows: list[tuple[str, str, float]]):
+    """Add (day, host, seconds) deltas in one transaction."""
+    with transaction() as conn:
+        conn.executemany(
+            "INSERT INTO dwell (day, host, seconds) VALUES (?, ?, ?) "
+            "ON CONFLICT (day, host) DO UPDATE SET seconds = seconds + excluded.seconds",
+            rows,
+        )
+
+
+def dwell_for_day(day: str) -> dict[str, float]:
+    """host -> seconds for one day."""
+    rows = connect().execute("SELECT host, seconds FROM dwell WHERE day = ?", (day,)).fetchall()
+    return {r["host"]: r["seconds"] for r in rows}
+
+
+# ── Verdict log ────────────────────────────────────────────────────────────────
+# Every page decision the extension made, sent in batches through /ingest.
+
+def add_verdicts(conn: sqlite3.Connection, rows: list[tuple]):
+    """Insert (ts, host, url, topic, allowed, score, source) rows. Caller owns the transaction."""
+    conn.executemany(
+        "INSERT INTO verdicts (ts, host, url, topic, allowed, score, source) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+
+
+# ── Focus profile ──────────────────────────────────────────────────────────────
+# Allow/deny evidence per (host, topic); the decay math lives in focus_profile.py.
+
+def profile_row(conn: sqlite3.Connection, host: str, topic: str) -> sqlite3.Row | None:
+    return conn.execute(
+        "SELECT allow, deny, updated FROM profile WHERE host = ? AND topic = ?", (host, topic)
+    ).fetchone()
+
+
+def put_profile_row(conn: sqlite3.Connection, host: str, topic: str,
+                    allow: float, deny: float, updated: float):
+    conn.execute(
+        "INSERT OR REPLACE INTO profile (host, topic, allow, deny, updated) VALUES (?, ?, ?, ?, ?)",
+        (host, topic, allow, deny, updated),
+    )
+
+
+def row_to_assignment(row: sqlite3.Row) -> Assignment:
+    return Assignment(
+        name=row["name"],
+        estimated_minutes=row["estimated_minutes"],
+        due_date=row["due_date"],
+        priority=row["priority"],
+        completed=bool(row["completed"]),
+        created_at=row["created_at"],
+    )
+
+
+def row_to_json(row: sqlite3.Row) -> dict:
+    """Wire format for server.py / the extension."""
+    return {
+        "key": row["key"],
+        "name": row["name"],
+        "estimatedMinutes": row["estimated_minutes"],
+        "dueDate": row["due_date"],
+        "priority": row["priority"],
+        "completed": bool(row["completed"]),
+        "createdAt": row["created_at"],
+        "version": row["version"],
+        "deleted": bool(row["deleted"]),
+    }
+
+
+class _NoChange(Exception):
+    """Raised inside a transaction to roll back a write that matched nothing."""
@@ -1,6 +1,12 @@
-import assignments
+import os
+import tempfile
 import time
 
+import config
+config.DB_FILE = os.path.join(tempfile.mkdtemp(), "focusorb.db")   # never the app's own DB
+
+import assignments
+
 # Add some test tasks
 assignments.add_assignment("Finish calculus homework", 60, "2026-02-25", "high")
 assignments.add_assignment("Study for midterm", 120, "2026-03-01", "medium")
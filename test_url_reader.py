@@ -0,0 +1,124 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import config
+import url_reader
+
+# ── Local fixture server ──────────────────────────────────────────────────────
+ARTICLE = (
+    "<html><head><title>Limits  | Calc Notes</title><style>body{}</style></head><body>"
+    "<nav>Home About Login</nav><h1>Limits</h1>"
+    "<article><h2>Definition</h2><p>" + "A limit describes where a function is heading. " * 10 + "</p>"
+    "<script>track()</script><p>Next: continuity.</p></article>"
+    "<footer>© 2026</footer></body></html>"
+).encode()
+HUGE = b"<html><body><p>" + b"word " * 2_000_000 + b"</p></body></html>"   # ~10 MB
+# ~10 MB with almost no readable text, so only the byte cap can stop the download
+MARKUP = b"<html><body>" + b"<script>var x = 1;</script><div></div>" * 250_000 + b"<p>end</p></body></html>"
+
+requests_seen = []
+
+
+class Fixture(BaseHTTPRequestHandler):
+    def do_GET(self):
+        requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/article":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self._send(ARTICLE, "text/html; charset=utf-8", etag='"v1"')
+        elif self.path == "/huge":
+            self._send(HUGE, "text/html")
+        elif self.path == "/markup":
+            self._send(MARKUP, "text/html")
+        elif self.path == "/image":
+            self._send(b"\x89PNG....", "image/png")
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def _send(self, body, kind, etag=None):
+        self.send_response(200)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass   # the reader hung up at its size cap
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Fixture)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def base(server, monkeypatch, tmp_path):
+    """Fixture server URL, with a fresh page cache for each test."""
+    monkeypatch.setattr(config, "URL_CACHE_DIR", str(tmp_path / "url_cache"))
+    return server
+
+
+# ── Tests ─────────────────────────────────────────────────────────────────────
+
+def test_extracts_title_headings_and_main_text(base):
+    page = url_reader.fetch(base + "/article")
+    assert page.title == "Limits | Calc Notes"
+    assert page.headings == ["Limits", "Definition"]
+    assert "where a function is heading" in page.text
+    assert "track()" not in page.text and "Login" not in page.text and "©" not in page.text
+
+
+def test_cache_and_etag_revalidation(base, monkeypatch):
+    url_reader.fetch(base + "/article")
+    before = len(requests_seen)
+    assert url_reader.fetch(base + "/article").from_cache      # fresh: no request at all
+    assert len(requests_seen) == before
+
+    monkeypatch.setattr(config, "URL_CACHE_SECONDS", 0)
+    page = url_reader.fetch(base + "/article")                 # stale: conditional GET -> 304
+    assert page.from_cache and requests_seen[-1] == ("/article", '"v1"')
+
+
+def test_long_text_stops_at_text_cap(base):
+    page = url_reader.fetch(base + "/huge")
+    assert page.truncated
+    assert len(page.text) <= config.URL_TEXT_MAX_CHARS
+
+
+def test_huge_markup_stops_at_byte_cap(base, monkeypatch):
+    received = []
+    real_read = url_reader._read
+
+    def counting_read(resp, plain):
+        chunks = resp.iter_content
+        def iter_content(*args, **kwargs):
+            for chunk in chunks(*args, **kwargs):
+                received.append(len(chunk))
+                yield chunk
+        resp.iter_content = iter_content
+        return real_read(resp, plain)
+
+    monkeypatch.setattr(url_reader, "_read", counting_read)
+    page = url_reader.fetch(base + "/markup")
+    assert page.truncated
+    assert len(page.text) < config.URL_TEXT_MAX_CHARS          # the text cap didn't stop it
+    assert sum(received) <= config.URL_FETCH_MAX_KB * 1024 + 16 * 1024   # at most one chunk past the cap
+
+
+def test_non_html_is_rejected(base):
+    with pytest.raises(ValueError):
+        url_reader.fetch(base + "/image")
@@ -0,0 +1,167 @@
+# timers.py
+# Every deadline in the app (Pomodoro, monitor checks, breaks) on the runtime's event loop
+# ----------------------------------------
+# Instead of each feature running its own `while True: time.sleep(1)` thread,
+# everything registers a deadline here. Deadlines are loop.call_at() handles on
+# the shared asyncio loop (runtime.py), whose clock is time.monotonic() — no
+# 1 Hz wake-ups, and wall-clock changes can't make timers jump.
+#
+# Repeating timers are rescheduled from their previous *deadline*, not from
+# when the callback finished, so they never drift. If a run is still going
+# when the next one is due, that run is skipped rather than stacked up.
+#
+# Callbacks can be coroutine functions (run as tasks on the loop) or plain
+# functions (run on the runtime's worker pool, so they may block). Either
+# way, use runtime.call_in_ui(...) for any Tk work.
+
+import asyncio
+import inspect
+import threading
+import time
+import runtime
+
+
+class Timer:
+    """Handle returned by call_later / call_at / call_every."""
+
+    __slots__ = ("callback", "args", "interval", "deadline", "paused_left",
+                 "cancelled", "_gen", "_service", "_handle", "_task")
+
+    def __init__(self, service, deadline, callback, args, interval):
+        self._service    = service
+        self.deadline    = deadline      # monotonic time of the next run
+        self.callback    = callback
+        self.args        = args
+        self.interval    = interval      # None for one-shot timers
+        self.paused_left = None          # seconds left while paused
+        self.cancelled   = False
+        self._gen        = 0             # bumped on every reschedule (stale loop handles are skipped)
+        self._handle     = None          # asyncio.TimerHandle for the next run
+        self._task       = None          # the run in progress, if any
+
+    def cancel(self):
+        """Stop future runs and cancel a run that is still in progress."""
+        with self._service._lock:
+            self.cancelled = True
+            self._gen += 1
+        runtime.call_soon(self._service._disarm, self)
+
+    def pause(self):
+        """Freeze the countdown; resume() continues from where it stopped."""
+        with self._service._lock:
+            if self.cancelled or self.paused_left is not None:
+                return
+            self.paused_left = max(0.0, self.deadline - time.monotonic())
+            self._gen += 1
+
+    def resume(self):
+        with self._service._lock:
+            if self.cancelled or self.paused_left is None:
+                return
+            left, self.paused_left = self.paused_left, None
+            self._service._push(self, time.monotonic() + left)
+
+    def reschedule(self, delay: float):
+        """Move the next run to `delay` seconds from now (repeating timers keep their interval)."""
+        with self._service._lock:
+            if self.cancelled:
+                return
+            self.paused_left = None
+            self._service._push(self, time.monotonic() + delay)
+
+    @property
+    def paused(self) -> bool:
+        return self.paused_left is not None
+
+    def remaining(self) -> float:
+        """Seconds until the next run."""
+        if self.paused_left is not None:
+            return self.paused_left
+        return max(0.0, self.deadline - time.monotonic())
+
+
+class TimerService:
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    # ── Public API ─────────────────────────────────────────────────────────────
+
+    def call_at(self, deadline: float, callback, *args) -> Timer:
+        """Run callback(*args) once at monotonic time `deadline`."""
+        return self._add(deadline, callback, args, None)
+
+    def call_later(self, delay: float, callback, *args) -> Timer:
+        """Run callback(*args) once, `delay` seconds from now."""
+        return self._add(time.monotonic() + delay, callback, args, None)
+
+    def call_every(self, interval: float, callback, *args, first: float = None) -> Timer:
+        """Run callback(*args) every `interval` seconds (first run after `first`, default interval)."""
+        delay = interval if first is None else first
+        return self._add(time.monotonic() + delay, callback, args, interval)
+
+    # ── Internal ───────────────────────────────────────────────────────────────
+
+    def _add(self, deadline, callback, args, interval) -> Timer:
+        timer = Timer(self, deadline, callback, args, interval)
+        with self._lock:
+            self._push(timer, deadline)
+        return timer
+
+    def _push(self, timer: Timer, deadline: float):
+        """Caller holds self._lock. Arms the timer on the loop thread."""
+        timer._gen += 1
+        timer.deadline = deadline
+        runtime.call_soon(self._arm, timer, timer._gen)
+
+    def _arm(self, timer: Timer, gen: int):
+        if timer._gen != gen:
+            return                      # rescheduled / paused / cancelled since
+        if timer._handle:
+            timer._handle.cancel()
+        timer._handle = runtime.get_loop().call_at(timer.deadline, self._fire, timer, gen)
+
+    def _disarm(self, timer: Timer):
+        if timer._handle:
+            timer._handle.cancel()
+            timer._handle = None
+        if timer._task:
+            timer._task.cancel()
+
+    def _fire(self, timer: Timer, gen: int):
+        with self._lock:
+            if timer._gen != gen:
+                return
+            timer._handle = None
+            if timer.interval is not None:
+                # Next run is based on the old deadline (drift-free); if we fell
+                # behind by whole intervals, skip them instead of firing in a burst
+                nxt = timer.deadline + timer.interval
+                now = time.monotonic()
+                if nxt <= now:
+                    nxt += ((now - nxt) // timer.interval + 1) * timer.interval
+                self._push(timer, nxt)
+            else:
+                timer._gen += 1
+
+        if timer._task and not timer._task.done():
+            return                      # previous run still going — skip this one
+        timer._task = runtime.get_loop().create_task(self._call(timer))
+
+    async def _call(self, timer: Timer):
+        try:
+            if inspect.iscoroutinefunction(timer.callback):
+                await timer.callback(*timer.args)
+            else:
+                await runtime.run_blocking(timer.callback, *timer.args)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"[Timers] Callback error in {getattr(timer.callback, '__name__', timer.callback)}: {e}")
+
+
+# ── Shared instance ───────────────────────────────────────────────────────────
+_service = TimerService()
+
+call_at    = _service.call_at
+call_later = _service.call_later
+call_every = _service.call_every
@@ -0,0 +1,287 @@
+# transcript.py
+# Virtualized chat transcript for the chat window's Tk Text widget
+# ----------------------------------------
+# Uses: Tkinter (built into Python — no install needed)
+#
+# A Text widget gets slower with every line it holds, so the chat window never
+# keeps the whole conversation in it:
+#   • at most CHAT_VISIBLE_MESSAGES messages are in the widget; while you're
+#     following the conversation, older ones are trimmed from the top
+#   • the newest CHAT_RING_MESSAGES live in an in-memory ring and everything is
+#     saved to the SQLite store, so scrolling to the top pages older messages
+#     back in, CHAT_PAGE_MESSAGES at a time (ring first, then the store);
+#     scrolling back down pages the newer ones in again
+#   • add() / append() only queue work; it's applied in one batch per frame
+#   • a streamed reply grows in place at its own marks — each frame inserts
+#     just the new text, and nothing else in the widget is touched
+#
+# Every method runs on the Tk thread (use runtime.call_in_ui from elsewhere),
+# except new_message(), which only creates the object to stream into.
+
+import itertools
+import time
+from collections import deque
+import config
+import runtime
+import store
+
+
+class Message:
+    __slots__ = ("uid", "sender", "body", "is_bot", "ts", "added", "done", "saved", "drawn")
+
+    def __init__(self, uid: int, sender: str, body: str, is_bot: bool, ts: float,
+                 done: bool = True, saved: bool = False):
+        self.uid    = uid
+        self.sender = sender
+        self.body   = body
+        self.is_bot = is_bot
+        self.ts     = ts        # epoch seconds; orders messages across ring and store
+        self.added  = False     # in the transcript (ring / queued for the widget)
+        self.done   = done      # False while a reply is still streaming
+        self.saved  = saved     # already in the store
+        self.drawn  = -1        # len(body) currently in the widget (-1: not in the widget)
+
+
+class Transcript:
+    def __init__(self, text):
+        """text: the (Scrolled)Text widget; its "bot" / "user" / "body" tags style messages."""
+        self.text      = text
+        self._ring     = deque(maxlen=config.CHAT_RING_MESSAGES)  # newest messages, oldest first
+        self._shown    = deque()        # messages in the widget, oldest first
+        self._new      = []             # added since the last frame
+        self._grown    = {}             # uid -> streamed message with undrawn text
+        self._replaced = {}             # uid -> message whose body must be redrawn
+        self._unsaved  = []
+        self._uids     = itertools.count()
+        self._frame    = None           # pending after() id
+        self._detached = False          # paged back so far that the newest messages aren't drawn
+        self._closed   = False
+
+        self._vbar = getattr(text, "vbar", None)
+        text.configure(yscrollcommand=self._on_yscroll)
+
+    # ── Public API ─────────────────────────────────────────────────────────────
+
+    def add(self, sender: str, body: str, is_bot: bool) -> Message:
+        """Append a finished message."""
+        msg = Message(next(self._uids), sender, body, is_bot, time.time())
+        self._push(msg)
+        if not is_bot and self._detached:
+            self._rebuild()              # you just typed: jump back to the latest messages
+        return msg
+
+    def new_message(self, sender: str, is_bot: bool = True) -> Message:
+        """An empty message to stream into. Safe on any thread; it shows up with its first append()."""
+        return Message(next(self._uids), sender, "", is_bot, time.time(), done=False)
+
+    def append(self, msg: Message, delta: str):
+        """Stream more text into `msg`."""
+        if self._closed or not delta:
+            return
+        msg.body += delta
+        if not msg.added:
+            self._push(msg)
+        elif msg.drawn >= 0:
+            self._grown[msg.uid] = msg
+            self._schedule()
+
+    def finish(self, msg: Message, body: str = None):
+        """Streaming is over. `body` (the full reply) replaces what was streamed if it differs."""
+        if self._closed:
+            return
+        if body is not None and body != msg.body:
+            msg.body = body
+            if msg.drawn >= 0:
+                self._replaced[msg.uid] = msg
+        msg.done = True
+        if not msg.added:
+            self._push(msg)
+        else:
+            self._unsaved.append(msg)
+            self._schedule()
+
+    def close(self):
+        """Window is going away: save what's finished, ignore everything after."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._frame:
+            try:
+                self.text.after_cancel(self._frame)
+            except Exception:
+                pass
+        self._save(self._unsaved)
+
+    # ── Frame batching ─────────────────────────────────────────────────────────
+
+    def _push(self, msg: Message):
+        msg.added = True
+        msg.ts    = time.time()          # ring stays in ts order even for late-starting streams
+        self._ring.append(msg)
+        self._new.append(msg)
+        if msg.done:
+            self._unsaved.append(msg)
+        self._schedule()
+
+    def _schedule(self):
+        if self._frame is None and not self._closed:
+            self._frame = self.text.after(config.CHAT_FRAME_MS, self._flush)
+
+    def _flush(self):
+        self._frame = None
+        if self._closed:
+            return
+        t = self.text
+        follow = t.yview()[1] >= 0.999   # at the bottom before this frame's changes
+        new, self._new = self._new, []
+        grown, self._grown = self._grown, {}
+        replaced, self._replaced = self._replaced, {}
+
+        t.config(state="normal")
+        for msg in replaced.values():
+            if msg.drawn >= 0:
+                t.delete(f"s{msg.uid}", f"b{msg.uid}")
+                msg.drawn = 0
+                grown[msg.uid] = msg
+        for msg in grown.values():
+            if 0 <= msg.drawn < len(msg.body):
+                t.insert(f"b{msg.uid}", msg.body[msg.drawn:], "body")
+                msg.drawn = len(msg.body)
+        if not self._detached:
+            for msg in new:
+                if msg.drawn < 0:
+                    self._draw_at_end(msg)
+            if follow:
+                self._trim_top()
+        t.config(state="disabled")
+        if follow and not self._detached:
+            t.see("end")
+
+        saved = [m for m in self._unsaved if m.done]
+        self._unsaved = [m for m in self._unsaved if not m.done]
+        self._save(saved)
+
+    # ── Drawing ────────────────────────────────────────────────────────────────
+    # Each drawn message has three marks: m<uid> at its start, s<uid> / b<uid>
+    # around its body. Streamed text goes in at b<uid> (right gravity, so it
+    # moves along); s<uid> stays put (left gravity).
+
+    def _draw_at_end(self, msg: Message):
+        t, uid = self.text, msg.uid
+        t.mark_set(f"m{uid}", "end-1c")
+        t.mark_gravity(f"m{uid}", "left")
+        t.insert("end-1c", f"\n{msg.sender}\n", "bot" if msg.is_bot else "user")
+        t.mark_set(f"s{uid}", "end-1c")
+        t.mark_gravity(f"s{uid}", "left")
+        t.insert("end-1c", msg.body, "body")
+        t.mark_set(f"b{uid}", "end-1c")
+        t.mark_gravity(f"b{uid}", "left")
+        t.insert("end-1c", "\n", "body")
+        t.mark_gravity(f"b{uid}", "right")
+        t.mark_gravity(f"m{uid}", "right")   # later inserts at 1.0 (paging) push it down
+        msg.drawn = len(msg.body)
+        self._shown.append(msg)
+
+    def _draw_at_top(self, msg: Message):
+        # Paged-in messages are finished, so they only need the start mark
+        t = self.text
+        t.insert("1.0", f"\n{msg.sender}\n", "bot" if msg.is_bot else "user",
+                 f"{msg.body}\n", "body")
+        t.mark_set(f"m{msg.uid}", "1.0")
+        t.mark_gravity(f"m{msg.uid}", "right")
+        msg.drawn = len(msg.body)
+        self._shown.appendleft(msg)
+
+    def _forget(self, msg: Message):
+        for prefix in "msb":
+            self.text.mark_unset(f"{prefix}{msg.uid}")
+        msg.drawn = -1
+
+    def _trim_top(self):
+        while len(self._shown) > config.CHAT_VISIBLE_MESSAGES:
+            old = self._shown.popleft()
+            self.text.delete("1.0", f"m{self._shown[0].uid}")
+            self._forget(old)
+
+    def _trim_bottom(self):
+        while len(self._shown) > config.CHAT_VISIBLE_MESSAGES:
+            old = self._shown.pop()
+            self.text.delete(f"m{old.uid}", "end-1c")
+            self._forget(old)
+            self._detached = True
+
+    def _rebuild(self):
+        """Redraw just the newest messages (after paging far back)."""
+        t = self.text
+        t.config(state="normal")
+        t.delete("1.0", "end")
+        for msg in self._shown:
+            self._forget(msg)
+        self._shown.clear()
+        self._detached = False
+        for msg in list(self._ring)[-config.CHAT_VISIBLE_MESSAGES:]:
+            self._draw_at_end(msg)
+        t.config(state="disabled")
+        t.see("end")
+
+    # ── Paging ─────────────────────────────────────────────────────────────────
+
+    def _on_yscroll(self, first, last):
+        if self._vbar is not None:
+            self._vbar.set(first, last)
+        if self._closed or not self._shown:
+            return
+        if float(first) <= 0.0 and float(last) < 1.0:
+            self.text.after_idle(self._page_older)
+        elif self._detached and float(last) >= 1.0:
+            self.text.after_idle(self._page_newer)
+
+    def _page_older(self):
+        if self._closed or not self._shown or self.text.yview()[0] > 0.0:
+            return
+        oldest = self._shown[0]
+        older = [m for m in self._ring if m.ts < oldest.ts][-config.CHAT_PAGE_MESSAGES:]
+        missing = config.CHAT_PAGE_MESSAGES - len(older)
+        if missing:                       # ran past the ring: the rest comes from the store
+            before = older[0].ts if older else oldest.ts
+            older[:0] = [Message(next(self._uids), r["sender"], r["body"], bool(r["is_bot"]), r["ts"], saved=True)
+                         for r in store.chat_messages_before(before, missing)]
+        if not older:
+            return
+        t = self.text
+        t.mark_set("view", "@0,0")        # keep what you're looking at in place
+        t.config(state="normal")
+        for msg in reversed(older):
+            self._draw_at_top(msg)
+        self._trim_bottom()
+        t.config(state="disabled")
+        t.yview("view")
+
+    def _page_newer(self):
+        if self._closed or not self._detached or not self._shown:
+            return
+        newest = self._shown[-1]
+        if not self._ring or newest.ts < self._ring[0].ts:
+            self._rebuild()               # the gap is older than the ring: jump to the latest
+            return
+        newer = [m for m in self._ring if m.ts > newest.ts][:config.CHAT_PAGE_MESSAGES]
+        t = self.text
+        t.mark_set("view", "@0,0")
+        t.config(state="normal")
+        for msg in newer:
+            if msg.drawn < 0:
+                self._draw_at_end(msg)
+        self._trim_top()
+        t.config(state="disabled")
+        t.yview("view")
+        if not newer or newer[-1] is self._ring[-1]:
+            self._detached = False
+
+    # ── Persistence ────────────────────────────────────────────────────────────
+
+    def _save(self, messages: list[Message]):
+        rows = [(m.ts, m.sender, m.body, m.is_bot) for m in messages if not m.saved]
+        for m in messages:
+            m.saved = True
+        if rows:
+            runtime.submit(runtime.run_blocking(store.append_chat_messages, rows))
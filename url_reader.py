@@ -0,0 +1,244 @@
+# url_reader.py
+# Fetch a web page and pull out its readable text (for chat's "Check a URL")
+# ----------------------------------------
+# Install: pip install requests
+#
+# Built for speed on arbitrary pages:
+#   • one pooled requests.Session (keep-alive) with connect/read timeouts
+#   • the body is streamed and parsed as it arrives, and the download stops at
+#     URL_FETCH_MAX_KB or once enough text has been collected
+#   • one HTMLParser pass keeps the title, headings and main content and skips
+#     scripts, styles, nav bars, footers, etc.
+#   • extracted pages are cached on disk by URL; stale entries are revalidated
+#     with If-None-Match, so an unchanged page costs a 304 and no parsing
+
+import codecs
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field, asdict
+from html.parser import HTMLParser
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_session.headers["User-Agent"] = "FocusOrb/1.0 (+url check)"
+
+_SKIP_TAGS    = {"script", "style", "noscript", "template", "svg", "canvas", "iframe",
+                 "nav", "header", "footer", "aside", "form", "button", "select"}
+_MAIN_TAGS    = {"main", "article"}
+_HEADING_TAGS = {"h1", "h2", "h3"}
+_BLOCK_TAGS   = {"p", "div", "section", "li", "br", "tr", "blockquote", "pre",
+                 "h1", "h2", "h3", "h4", "h5", "h6", "dd", "dt", "figcaption"}
+_VOID_TAGS    = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+                 "link", "meta", "source", "track", "wbr"}
+
+
+@dataclass
+class Page:
+    url: str
+    title: str = ""
+    headings: list[str] = field(default_factory=list)
+    text: str = ""
+    etag: str = ""
+    fetched_at: float = 0.0
+    truncated: bool = False     # download or text hit its cap
+    from_cache: bool = False
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def fetch(url: str) -> Page:
+    """
+    Fetch `url` and extract its readable text, using the disk cache when possible.
+    Raises requests.RequestException on network errors and ValueError for non-HTML.
+    """
+    cached = _cache_load(url)
+    if cached and time.time() - cached.fetched_at < config.URL_CACHE_SECONDS:
+        cached.from_cache = True
+        return cached
+
+    headers = {"If-None-Match": cached.etag} if cached and cached.etag else {}
+    with _session.get(url, headers=headers, stream=True, timeout=config.URL_FETCH_TIMEOUT) as resp:
+        if resp.status_code == 304 and cached:
+            cached.fetched_at = time.time()
+            _cache_store(cached)
+            cached.from_cache = True
+            return cached
+        resp.raise_for_status()
+
+        kind = resp.headers.get("Content-Type", "text/html").split(";")[0].strip().lower()
+        if kind not in ("text/html", "application/xhtml+xml", "text/plain"):
+            raise ValueError(f"not a web page ({kind})")
+
+        page = _read(resp, plain=(kind == "text/plain"))
+        page.etag = resp.headers.get("ETag", "")
+
+    page.url = url      # cache key is the URL asked for, not where it redirected
+    page.fetched_at = time.time()
+    _cache_store(page)
+    return page
+
+
+def extract(html: str) -> Page:
+    """Extract title/headings/text from an HTML string (no network)."""
+    parser = _Extractor(config.URL_TEXT_MAX_CHARS)
+    parser.feed(html)
+    parser.close()
+    return parser.page("")
+
+
+# ── Download + parse ──────────────────────────────────────────────────────────
+
+def _read(resp, plain: bool) -> Page:
+    """Stream the body into the parser, stopping at the byte or text cap."""
+    limit = config.URL_FETCH_MAX_KB * 1024
+    # requests assumes ISO-8859-1 for text/* without a charset; the web is UTF-8
+    has_charset = "charset=" in resp.headers.get("Content-Type", "").lower()
+    decoder = codecs.getincrementaldecoder(resp.encoding if has_charset else "utf-8")(errors="replace")
+    parser = _Extractor(config.URL_TEXT_MAX_CHARS, plain=plain)
+
+    received = 0
+    truncated = False
+    for chunk in resp.iter_content(chunk_size=16 * 1024):
+        received += len(chunk)
+        if received > limit:
+            chunk = chunk[:len(chunk) - (received - limit)]
+            truncated = True
+        parser.feed(decoder.decode(chunk))
+        if truncated or parser.full:
+            truncated = True
+            break
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+
+    page = parser.page(resp.url)
+    page.truncated = truncated or parser.full
+    return page
+
+
+class _Extractor(HTMLParser):
+    """Single pass: title, h1-h3 and visible text, preferring <main>/<article>."""
+
+    def __init__(self, max_chars: int, plain: bool = False):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.plain     = plain
+        self.title     = []
+        self.headings  = []
+        self.body      = []     # all visible text
+        self.main      = []     # text inside <main>/<article>
+        self.chars     = 0
+        self._skip     = 0      # depth inside _SKIP_TAGS
+        self._in_main  = 0
+        self._in_title = False
+        self._heading  = None   # text parts of the heading being read
+
+    @property
+    def full(self) -> bool:
+        return self.chars >= self.max_chars
+
+    def feed(self, data: str):
+        if self.plain:
+            self.handle_data(data)
+        else:
+            super().feed(data)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID_TAGS:
+            if tag == "br":
+                self._newline()
+            return
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in _MAIN_TAGS:
+            self._in_main += 1
+        elif tag in _HEADING_TAGS and not self._skip:
+            self._heading = []
+        if tag in _BLOCK_TAGS:
+            self._newline()
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in _MAIN_TAGS:
+            self._in_main = max(0, self._in_main - 1)
+        elif tag in _HEADING_TAGS and self._heading is not None:
+            heading = " ".join("".join(self._heading).split())
+            if heading:
+                self.headings.append(heading)
+            self._heading = None
+        if tag in _BLOCK_TAGS:
+            self._newline()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title.append(data)
+            return
+        if self._skip or self.full:
+            return
+        if self._heading is not None:
+            self._heading.append(data)
+        text = " ".join(data.split())
+        if not text:
+            return
+        self.body.append(text + " ")
+        if self._in_main:
+            self.main.append(text + " ")
+        self.chars += len(text) + 1
+
+    def _newline(self):
+        for parts in (self.body, self.main) if self._in_main else (self.body,):
+            if parts and parts[-1] != "\n":
+                parts.append("\n")
+
+    def page(self, url: str) -> Page:
+        # Use the <main>/<article> text if the page has a real one
+        parts = self.main if sum(map(len, self.main)) > 200 else self.body
+        lines = (" ".join(line.split()) for line in "".join(parts).splitlines())
+        text = "\n".join(line for line in lines if line)
+        return Page(
+            url=url,
+            title=" ".join("".join(self.title).split()),
+            headings=self.headings[:20],
+            text=text[:self.max_chars],
+        )
+
+
+# ── Disk cache ─────────────────────────────────────────────────────────────────
+
+def _cache_path(url: str) -> str:
+    return os.path.join(config.URL_CACHE_DIR, hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+
+def _cache_load(url: str) -> Page | None:
+    try:
+        with open(_cache_path(url), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        page = Page(**data)
+    except (OSError, ValueError, TypeError):
+        return None
+    return page if page.url == url else None
+
+
+def _cache_store(page: Page):
+    data = asdict(page)
+    data["from_cache"] = False
+    try:
+        os.makedirs(config.URL_CACHE_DIR, exist_ok=True)
+        tmp = _cache_path(page.url) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, _cache_path(page.url))
+    except OSError as e:
+        print(f"[URLReader] Cache write failed: {e}")
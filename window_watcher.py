@@ -0,0 +1,240 @@
+# window_watcher.py
+# Event-driven window title tracking — keeps a cached title list and reports focus changes
+# ----------------------------------------
+# Optional install (Linux): pip install python-xlib
+#
+# On X11 we subscribe to root-window property changes (_NET_ACTIVE_WINDOW and
+# _NET_CLIENT_LIST) plus title changes on each client window, so the title list
+# is updated incrementally and nobody has to shell out to wmctrl every check.
+# Everywhere else (or without python-xlib) we fall back to polling a title
+# lister supplied by the caller, and diff the result.
+
+import select
+import threading
+import time
+import config
+import timers
+
+try:
+    from Xlib import X, display as xdisplay
+    from Xlib.error import XError
+except ImportError:
+    xdisplay = None
+
+# ── State ─────────────────────────────────────────────────────────────────────
+_lock        = threading.Lock()
+_titles      = {}        # window id -> title (X11) or title -> title (polling)
+_active_id   = None      # focused window id (X11 only)
+_running     = False
+_thread      = None      # X11 event thread
+_stop_event  = None      # threading.Event of the current X11 run (each run gets its own)
+_poll_timer  = None      # timers.Timer for the polling fallback
+_poll_prev   = None      # title set seen on the previous poll
+_on_change   = None      # callback(title: str) — focus moved or active title changed
+_backend     = ""        # "x11" or "poll"
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def start(on_change=None, poll=None, poll_seconds: float = None):
+    """
+    Start watching windows (X11 event thread, or a repeating poll on the timer service).
+
+    Args:
+        on_change:    callback(title: str) — foreground window or its title changed. On X11
+                      `title` is the active window's; when polling there is no focus
+                      information, so it's one newly seen title ("" if titles only closed)
+        poll:         fallback function returning a list of window titles
+        poll_seconds: how often to call `poll` (default WINDOW_POLL_SECONDS)
+    """
+    global _running, _thread, _stop_event, _on_change, _backend, _poll_timer, _poll_prev
+
+    _on_change = on_change
+    if is_running():
+        return
+
+    if _thread is not None and _thread.is_alive():
+        _thread.join(timeout=2.0)       # stopped but not out of its loop yet (Pause -> Resume)
+
+    _running = True
+    if xdisplay is not None and _x11_available():
+        _backend = "x11"
+        _stop_event = threading.Event()
+        _thread = threading.Thread(target=_x11_loop, args=(_stop_event,), daemon=True)
+        _thread.start()
+    elif poll is not None:
+        _backend = "poll"
+        _poll_prev = None
+        _poll_timer = timers.call_every(poll_seconds or config.WINDOW_POLL_SECONDS, _poll_once, poll, first=0)
+    else:
+        _running = False
+        print("[Watcher] No X11 and no title lister given — not watching.")
+        return
+    print(f"[Watcher] Started ({_backend})")
+
+
+def stop():
+    """Stop watching. The cached titles are kept until the next start."""
+    global _running
+    _running = False
+    if _stop_event:
+        _stop_event.set()
+    if _poll_timer:
+        _poll_timer.cancel()
+
+
+def is_running() -> bool:
+    if not _running:
+        return False
+    if _backend == "x11":
+        return _thread is not None and _thread.is_alive()
+    return _poll_timer is not None and not _poll_timer.cancelled
+
+
+def get_titles() -> list[str]:
+    """Return the cached window titles (no subprocess, no X round trip)."""
+    with _lock:
+        return [t for t in _titles.values() if t.strip()]
+
+
+def get_active_title() -> str:
+    with _lock:
+        return _titles.get(_active_id, "")
+
+
+# ── X11 Backend ────────────────────────────────────────────────────────────────
+
+def _x11_available() -> bool:
+    try:
+        xdisplay.Display().close()
+        return True
+    except Exception:
+        return False
+
+
+def _x11_loop(stop: threading.Event):
+    d = xdisplay.Display()
+    root = d.screen().root
+    atom_active  = d.intern_atom("_NET_ACTIVE_WINDOW")
+    atom_clients = d.intern_atom("_NET_CLIENT_LIST")
+    atom_name    = d.intern_atom("_NET_WM_NAME")
+    atom_utf8    = d.intern_atom("UTF8_STRING")
+    title_atoms  = {atom_name, X.WM_NAME}
+
+    def read_title(wid):
+        try:
+            win = d.create_resource_object("window", wid)
+            prop = win.get_full_property(atom_name, atom_utf8)
+            if prop and prop.value:
+                value = prop.value
+                return value.decode("utf-8", "replace") if isinstance(value, bytes) else str(value)
+            name = win.get_wm_name()
+            return name or ""
+        except XError:
+            return ""
+
+    def read_ids(atom):
+        prop = root.get_full_property(atom, X.AnyPropertyType)
+        return list(prop.value) if prop else []
+
+    def sync_clients():
+        """Incremental update: only new windows get their title fetched."""
+        ids = set(read_ids(atom_clients))
+        with _lock:
+            known = set(_titles)
+        for wid in ids - known:
+            try:
+                d.create_resource_object("window", wid).change_attributes(
+                    event_mask=X.PropertyChangeMask)
+            except XError:
+                continue
+            title = read_title(wid)
+            with _lock:
+                _titles[wid] = title
+        with _lock:
+            for wid in known - ids:
+                _titles.pop(wid, None)
+
+    def sync_active():
+        global _active_id
+        ids = read_ids(atom_active)
+        _active_id = ids[0] if ids else None
+
+    with _lock:
+        _titles.clear()
+    root.change_attributes(event_mask=X.PropertyChangeMask)
+    sync_clients()
+    sync_active()
+    d.flush()
+
+    while not stop.is_set():
+        # Wake at least once a second so stop() is honoured
+        if not d.pending_events():
+            _wait_readable(d.fileno(), 1.0)
+            if not d.pending_events():
+                continue
+
+        ev = d.next_event()
+        if ev.type != X.PropertyNotify:
+            continue
+
+        try:
+            if ev.window == root and ev.atom == atom_clients:
+                sync_clients()
+            elif ev.window == root and ev.atom == atom_active:
+                previous = _active_id
+                sync_active()
+                if _active_id != previous:
+                    _fire_change()
+            elif ev.atom in title_atoms:
+                wid = ev.window.id
+                title = read_title(wid)
+                with _lock:
+                    if wid in _titles:
+                        _titles[wid] = title
+                if wid == _active_id:
+                    _fire_change()   # e.g. browser tab switch changes the window title
+        except XError:
+            pass
+
+    d.close()
+    print("[Watcher] Stopped.")
+
+
+def _wait_readable(fd: int, timeout: float):
+    try:
+        select.select([fd], [], [], timeout)
+    except (OSError, ValueError):
+        time.sleep(timeout)
+
+
+# ── Polling Backend ────────────────────────────────────────────────────────────
+
+def _poll_once(poll):
+    """Fallback: call the title lister and diff against the previous poll."""
+    global _poll_prev
+    try:
+        titles = [t for t in poll() if t.strip()]
+    except Exception as e:
+        print(f"[Watcher] Poll error: {e}")
+        return
+
+    with _lock:
+        _titles.clear()
+        _titles.update((t, t) for t in titles)
+
+    current = set(titles)
+    if _poll_prev is not None and current != _poll_prev:
+        new = current - _poll_prev
+        _fire_change(next(iter(new)) if new else "")
+    _poll_prev = current
+
+
+def _fire_change(title: str | None = None):
+    callback = _on_change
+    if not callback:
+        return
+    try:
+        callback(get_active_title() if title is None else title)
+    except Exception as e:
+        print(f"[Watcher] Change callback error: {e}")